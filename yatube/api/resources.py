@@ -0,0 +1,196 @@
+"""Models readable by the API.
+
+Objects are read by `values()` as dictionaries and serialized by renaming
+their keys, so no model is instantiated and a page of objects costs one
+query with the fields selected by the client.
+"""
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from django.core.files.storage import default_storage
+from django.db.models import Model, QuerySet
+
+from core.paginator import CursorPaginator, InvalidCursor, encode_cursor
+from posts.models import Comment, Follow, Group, Post
+
+
+class InvalidQuery(ValueError):
+    pass
+
+
+def _file_url(name: str) -> Optional[str]:
+    return default_storage.url(name) if name else None
+
+
+class Resource:
+    """Fields of the `model` exposed under names of the API.
+
+    `fields` maps names of the API to lookups of `values()`, `filters` maps
+    query parameters to lookups of `filter()`. Objects are ordered by the
+    datetime `ordering_field` and `id` or by `id` only. Objects with the
+    `owner_field` are private, they are read by their owners only.
+    """
+    def __init__(
+        self,
+        model: Model,
+        fields: Dict[str, str],
+        filters: Optional[Dict[str, str]] = None,
+        transforms: Optional[Dict[str, Callable]] = None,
+        ordering_field: Optional[str] = None,
+        descending: bool = False,
+        owner_field: Optional[str] = None,
+    ):
+        self.model = model
+        self.fields = fields
+        self.filters = filters or {}
+        self.transforms = transforms or {}
+        self.ordering_field = ordering_field
+        self.descending = descending
+        self.owner_field = owner_field
+
+    def parse_fields(self, value: Optional[str]) -> List[str]:
+        """Returns names of the `fields=a,b` parameter, all by default."""
+        if not value:
+            return list(self.fields)
+        names = list(dict.fromkeys(value.split(',')))
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise InvalidQuery(f'Unknown fields: {", ".join(unknown)}')
+        return names
+
+    def queryset(
+        self,
+        names: Sequence[str],
+        params=None,
+        user=None,
+    ) -> QuerySet:
+        """Returns rows with `names` fields of objects filtered by `params`.
+
+        Keys of the order are read even if they are not selected. Private
+        objects are limited to the ones of the `user`.
+        """
+        lookups = {self.fields[name] for name in names} | {'id'}
+        if self.ordering_field:
+            lookups.add(self.ordering_field)
+        queryset = self.model.objects.all()
+        for name, value in (params or {}).items():
+            if name not in self.filters:
+                continue
+            # Lookups follow single-valued relations, so chained filters
+            # select the same objects as one filter
+            try:
+                queryset = queryset.filter(**{self.filters[name]: value})
+            except (TypeError, ValueError) as error:
+                raise InvalidQuery(f'Invalid value of {name}') from error
+        if self.owner_field:
+            queryset = queryset.filter(
+                **{self.owner_field: getattr(user, 'id', None)}
+            )
+        return queryset.values(*sorted(lookups))
+
+    def serialize(self, rows, names: Sequence[str]) -> List[dict]:
+        transforms = self.transforms
+        fields = [
+            (name, self.fields[name], transforms.get(name))
+            for name in names
+        ]
+        return [
+            {
+                name: transform(row[lookup]) if transform else row[lookup]
+                for name, lookup, transform in fields
+            }
+            for row in rows
+        ]
+
+    def page(
+        self,
+        queryset: QuerySet,
+        after: Optional[str],
+        per_page: int,
+    ) -> Tuple[List[dict], Optional[str]]:
+        """Returns rows following the `after` cursor and the next cursor."""
+        if self.ordering_field:
+            paginator = CursorPaginator(
+                queryset,
+                per_page,
+                field=self.ordering_field,
+                descending=self.descending,
+            )
+            if after:
+                # Pages of the API have no link to the previous one
+                rows = paginator.page_after(after, with_previous=False)
+            else:
+                rows = paginator.first_page()
+            last = rows[-1] if rows.has_next() else None
+            return list(rows), last and encode_cursor(
+                last[self.ordering_field], last['id']
+            )
+
+        if after:
+            try:
+                queryset = queryset.filter(id__gt=int(after))
+            except ValueError as error:
+                raise InvalidCursor(after) from error
+        rows = list(queryset.order_by('id')[:per_page + 1])
+        if len(rows) > per_page:
+            return rows[:per_page], str(rows[per_page - 1]['id'])
+        return rows, None
+
+
+COMMENTS = Resource(
+    Comment,
+    fields={
+        'author': 'author__username',
+        'created': 'created',
+        'id': 'id',
+        'post': 'post_id',
+        'text': 'text',
+    },
+    filters={
+        'author': 'author__username',
+        'post': 'post_id',
+    },
+    ordering_field='created',
+)
+# Follows of other users are not shown by the site, only their numbers
+FOLLOWS = Resource(
+    Follow,
+    fields={
+        'author': 'author__username',
+        'id': 'id',
+        'user': 'user__username',
+    },
+    filters={
+        'author': 'author__username',
+    },
+    owner_field='user_id',
+)
+GROUPS = Resource(
+    Group,
+    fields={
+        'description': 'description',
+        'id': 'id',
+        'slug': 'slug',
+        'title': 'title',
+    },
+)
+POSTS = Resource(
+    Post,
+    fields={
+        'author': 'author__username',
+        'comments_count': 'comments_count',
+        'group': 'group__slug',
+        'id': 'id',
+        'image': 'image',
+        'pub_date': 'pub_date',
+        'text': 'text',
+    },
+    filters={
+        'author': 'author__username',
+        'group': 'group__slug',
+    },
+    transforms={
+        'image': _file_url,
+    },
+    ordering_field='pub_date',
+    descending=True,
+)
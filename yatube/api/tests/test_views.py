@@ -0,0 +1,201 @@
+from http import HTTPStatus
+
+from django.test import Client, TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+@override_settings(API_PAGE_SIZE=3)
+class ApiViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Test group',
+            slug='test-slug',
+            description='Test description',
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Test post {post_num}',
+                author=cls.author,
+                group=cls.group if post_num % 2 else None,
+            )
+            for post_num in range(5)
+        ]
+        cls.comments = [
+            Comment.objects.create(
+                text=f'Test comment {comment_num}',
+                author=cls.reader,
+                post=cls.posts[0],
+            )
+            for comment_num in range(4)
+        ]
+        cls.follow = Follow.objects.create(user=cls.reader, author=cls.author)
+
+        cls.guest_client = Client()
+
+        cls.authorized_client_reader = Client()
+        cls.authorized_client_reader.force_login(user=ApiViewsTests.reader)
+
+    def test_pages_follow_each_other(self):
+        url = reverse('api:posts_list')
+        response = ApiViewsTests.guest_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        data = response.json()
+        self.assertEqual(
+            [post['id'] for post in data['results']],
+            [post.id for post in ApiViewsTests.posts[::-1][:3]]
+        )
+        first = data['results'][0]
+        self.assertTrue(first.pop('pub_date').startswith(
+            ApiViewsTests.posts[-1].pub_date.date().isoformat()
+        ))
+        self.assertEqual(first, {
+            'author': 'Author',
+            'comments_count': 0,
+            'group': None,
+            'id': ApiViewsTests.posts[-1].id,
+            'image': None,
+            'text': 'Test post 4',
+        })
+
+        with self.assertNumQueries(1):
+            data = ApiViewsTests.guest_client.get(
+                url, {'after': data['next']}
+            ).json()
+        self.assertEqual(
+            [post['id'] for post in data['results']],
+            [post.id for post in ApiViewsTests.posts[::-1][3:]]
+        )
+        self.assertIsNone(data['next'])
+
+    def test_comments_and_groups_are_paginated(self):
+        url = reverse('api:comments_list')
+        data = ApiViewsTests.guest_client.get(
+            url, {'post': ApiViewsTests.posts[0].id}
+        ).json()
+        data = ApiViewsTests.guest_client.get(
+            url, {'after': data['next']}
+        ).json()
+        self.assertEqual(
+            [comment['id'] for comment in data['results']],
+            [ApiViewsTests.comments[-1].id]
+        )
+
+        data = ApiViewsTests.guest_client.get(
+            reverse('api:groups_list'), {'limit': 1}
+        ).json()
+        self.assertEqual(data['results'], [{
+            'description': 'Test description',
+            'id': ApiViewsTests.group.id,
+            'slug': 'test-slug',
+            'title': 'Test group',
+        }])
+        self.assertIsNone(data['next'])
+
+    def test_fields_are_selected(self):
+        data = ApiViewsTests.guest_client.get(
+            reverse('api:posts_list'),
+            {'fields': 'text,author', 'group': 'test-slug'}
+        ).json()
+        self.assertEqual(data['results'], [
+            {'author': 'Author', 'text': 'Test post 3'},
+            {'author': 'Author', 'text': 'Test post 1'},
+        ])
+
+        response = ApiViewsTests.guest_client.get(
+            reverse('api:posts_list'), {'fields': 'text,password'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertEqual(
+            response.json(), {'error': 'Unknown fields: password'}
+        )
+
+    def test_objects_are_fetched_by_ids_in_one_query(self):
+        ids = [
+            ApiViewsTests.posts[2].id,
+            ApiViewsTests.posts[0].id,
+            ApiViewsTests.posts[-1].id + 100,
+        ]
+        with self.assertNumQueries(1):
+            data = ApiViewsTests.guest_client.get(
+                reverse('api:posts_list'),
+                {'ids': ','.join(map(str, ids)), 'fields': 'id,group'}
+            ).json()
+        self.assertEqual(data['results'], [
+            {'group': None, 'id': ids[0]},
+            {'group': None, 'id': ids[1]},
+        ])
+
+    def test_object_is_returned(self):
+        response = ApiViewsTests.guest_client.get(
+            reverse(
+                'api:posts_detail',
+                kwargs={'pk': ApiViewsTests.posts[0].id}
+            ),
+            {'fields': 'id,text'}
+        )
+        self.assertEqual(response.json(), {
+            'id': ApiViewsTests.posts[0].id,
+            'text': 'Test post 0',
+        })
+
+        response = ApiViewsTests.guest_client.get(
+            reverse('api:posts_detail', kwargs={'pk': 0})
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_follows_are_shown_to_their_users_only(self):
+        detail_url = reverse(
+            'api:follows_detail', kwargs={'pk': ApiViewsTests.follow.id}
+        )
+        list_url = reverse('api:follows_list')
+        for url in (detail_url, list_url):
+            with self.subTest(url=url):
+                response = ApiViewsTests.guest_client.get(url)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.UNAUTHORIZED
+                )
+
+        response = ApiViewsTests.authorized_client_reader.get(detail_url)
+        self.assertEqual(response.json(), {
+            'author': 'Author',
+            'id': ApiViewsTests.follow.id,
+            'user': 'Reader',
+        })
+
+        author_client = Client()
+        author_client.force_login(user=ApiViewsTests.author)
+        response = author_client.get(detail_url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        response = author_client.get(list_url, {'author': 'Author'})
+        self.assertEqual(response.json()['results'], [])
+
+    def test_invalid_queries_are_rejected(self):
+        url = reverse('api:posts_list')
+        invalid_queries = [
+            {'after': 'invalid'},
+            {'ids': '1,a'},
+            {'ids': ','.join(map(str, range(1000)))},
+            {'limit': 0},
+        ]
+        for query in invalid_queries:
+            with self.subTest(query=query):
+                response = ApiViewsTests.guest_client.get(url, query)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.BAD_REQUEST
+                )
+        response = ApiViewsTests.guest_client.get(
+            reverse('api:comments_list'), {'post': 'a'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertEqual(response.json(), {'error': 'Invalid value of post'})
+
+        response = ApiViewsTests.guest_client.post(url)
+        self.assertEqual(response.status_code, HTTPStatus.METHOD_NOT_ALLOWED)
@@ -0,0 +1,31 @@
+from django.urls import path
+
+from . import resources, views
+
+app_name = 'api'
+
+RESOURCES = {
+    'comments': resources.COMMENTS,
+    'follows': resources.FOLLOWS,
+    'groups': resources.GROUPS,
+    'posts': resources.POSTS,
+}
+
+urlpatterns = [
+    url
+    for name, resource in RESOURCES.items()
+    for url in (
+        path(
+            f'{name}/',
+            views.object_list,
+            {'resource': resource},
+            name=f'{name}_list'
+        ),
+        path(
+            f'{name}/<int:pk>/',
+            views.object_detail,
+            {'resource': resource},
+            name=f'{name}_detail'
+        ),
+    )
+]
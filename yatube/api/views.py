@@ -0,0 +1,93 @@
+from http import HTTPStatus
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.http import require_safe
+
+from core.paginator import InvalidCursor
+
+from .resources import InvalidQuery, Resource
+
+
+def error(message: str, status: HTTPStatus) -> JsonResponse:
+    return JsonResponse({'error': message}, status=status)
+
+
+def parse_ids(value: str) -> list:
+    try:
+        ids = list(dict.fromkeys(int(pk) for pk in value.split(',')))
+    except ValueError:
+        raise InvalidQuery(f'Invalid ids: {value}')
+    if len(ids) > settings.API_MAX_IDS:
+        raise InvalidQuery(f'More than {settings.API_MAX_IDS} ids')
+    return ids
+
+
+def parse_limit(value: str) -> int:
+    if not value:
+        return settings.API_PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        raise InvalidQuery(f'Invalid limit: {value}')
+    if not 0 < limit <= settings.API_MAX_PAGE_SIZE:
+        raise InvalidQuery(
+            f'The limit is not in 1..{settings.API_MAX_PAGE_SIZE}'
+        )
+    return limit
+
+
+def unauthorized(request, resource: Resource) -> bool:
+    return bool(resource.owner_field) and not request.user.is_authenticated
+
+
+@require_safe
+def object_detail(request, resource: Resource, pk: int):
+    if unauthorized(request, resource):
+        return error('Authentication required', HTTPStatus.UNAUTHORIZED)
+    try:
+        names = resource.parse_fields(request.GET.get('fields'))
+    except InvalidQuery as invalid:
+        return error(str(invalid), HTTPStatus.BAD_REQUEST)
+    rows = list(resource.queryset(names, user=request.user).filter(id=pk))
+    if not rows:
+        return error('Not found', HTTPStatus.NOT_FOUND)
+    return JsonResponse(resource.serialize(rows, names)[0])
+
+
+@require_safe
+def object_list(request, resource: Resource):
+    """Returns a page of objects or the objects of `ids`.
+
+    Objects of `ids=1,2,3` are returned in the order of `ids` at once, ids
+    of missing ones are skipped. Pages follow the `after` cursor, the cursor
+    of the next page is `next`.
+    """
+    if unauthorized(request, resource):
+        return error('Authentication required', HTTPStatus.UNAUTHORIZED)
+    try:
+        names = resource.parse_fields(request.GET.get('fields'))
+        queryset = resource.queryset(
+            names, request.GET.dict(), user=request.user
+        )
+        if 'ids' in request.GET:
+            ids = parse_ids(request.GET['ids'])
+            rows = {row['id']: row for row in queryset.filter(id__in=ids)}
+            return JsonResponse({
+                'results': resource.serialize(
+                    [rows[pk] for pk in ids if pk in rows], names
+                ),
+            })
+        rows, cursor = resource.page(
+            queryset,
+            request.GET.get('after'),
+            parse_limit(request.GET.get('limit')),
+        )
+    except InvalidCursor:
+        return error('Invalid cursor', HTTPStatus.BAD_REQUEST)
+    except InvalidQuery as invalid:
+        return error(str(invalid), HTTPStatus.BAD_REQUEST)
+    return JsonResponse({
+        'next': cursor,
+        'results': resource.serialize(rows, names),
+    })
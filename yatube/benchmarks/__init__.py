@@ -0,0 +1,6 @@
+"""Benchmarks of views of posts.
+
+Run from the directory of `manage.py`, see `python -m benchmarks --help`.
+A synthetic dataset is seeded into a throwaway test database, then each
+scenario is driven through the WSGI application of the project.
+"""
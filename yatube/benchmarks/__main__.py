@@ -0,0 +1,216 @@
+"""Seeds a dataset into a throwaway database and benchmarks the views.
+
+    $ python -m benchmarks --users 1000 --posts 20000 --concurrency 8 \\
+        --baseline benchmarks/baseline.json
+
+Results are compared with the baseline if it exists, `--save` replaces it.
+The command exits with `1` if a statistic regressed by more than
+`--threshold`. With `--templates` it compares render times of pages with
+templates of the debug mode and of production instead. With `--api` it
+runs scenarios of the JSON API instead of the ones of pages.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+import django
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    dataset = parser.add_argument_group('dataset')
+    dataset.add_argument('--seed', type=int, default=1)
+    dataset.add_argument('--users', type=int, default=200)
+    dataset.add_argument('--groups', type=int, default=10)
+    dataset.add_argument('--posts', type=int, default=2000)
+    dataset.add_argument(
+        '--follows', type=int, default=20,
+        help='Average number of authors followed by a user.',
+    )
+    dataset.add_argument('--comments', type=int, default=5000)
+    dataset.add_argument('--images', type=int, default=20)
+    dataset.add_argument(
+        '--exponent', type=float, default=1.1,
+        help='Exponent of the power law of popularity of authors and posts.',
+    )
+    parser.add_argument(
+        '--requests', type=int, default=200,
+        help='Number of requests of each scenario.',
+    )
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument(
+        '--logged-in', action='store_true',
+        help='Request pages of guests by logged in users.',
+    )
+    parser.add_argument(
+        '--scenarios', nargs='+', metavar='SCENARIO',
+        help='Scenarios to run, all by default.',
+    )
+    parser.add_argument(
+        '--templates', action='store_true',
+        help='Compare templates of the debug mode and of production.',
+    )
+    parser.add_argument(
+        '--api', action='store_true',
+        help='Run scenarios of the JSON API instead of pages.',
+    )
+    parser.add_argument('--baseline', metavar='PATH')
+    parser.add_argument(
+        '--save', action='store_true',
+        help='Save results as the new baseline.',
+    )
+    parser.add_argument(
+        '--threshold', type=float, default=0.2,
+        help='Share of change of a statistic that is a regression.',
+    )
+    return parser.parse_args(argv)
+
+
+def print_results(results, out=sys.stdout):
+    out.write(
+        f'{"scenario":<14}{"requests":>9}{"errors":>7}{"p50 ms":>9}'
+        f'{"p95 ms":>9}{"p99 ms":>9}{"queries":>9}{"req/s":>9}\n'
+    )
+    for name, statistics in results.items():
+        out.write(
+            f'{name:<14}{statistics["requests"]:>9}{statistics["errors"]:>7}'
+            f'{statistics["p50"] * 1000:>9.1f}'
+            f'{statistics["p95"] * 1000:>9.1f}'
+            f'{statistics["p99"] * 1000:>9.1f}'
+            f'{statistics["queries"]:>9.1f}'
+            f'{statistics["throughput"]:>9.1f}\n'
+        )
+
+
+def print_template_results(results, out=sys.stdout):
+    modes = list(next(iter(results.values())))
+    out.write(f'{"page":<14}' + ''.join(
+        f'{mode + " ms":>14}' for mode in modes
+    ) + '\n')
+    for name, latencies in results.items():
+        out.write(f'{name:<14}' + ''.join(
+            f'{latencies[mode] * 1000:>14.1f}' for mode in modes
+        ) + '\n')
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import override_settings
+
+    from core.tasks import run_pending
+    from yatube.wsgi import application
+
+    from . import runner
+    from .api import build_api_scenarios
+    from .datasets import Dataset, seed
+    from .templates import run_template_modes
+
+    directory = tempfile.mkdtemp(prefix='yatube-benchmark-')
+    settings_override = override_settings(
+        CACHES={
+            'default': {
+                'BACKEND': 'core.cache.backends.SQLiteCache',
+                'LOCATION': os.path.join(directory, 'cache.sqlite3'),
+            },
+        },
+        MEDIA_ROOT=os.path.join(directory, 'media'),
+        POST_THUMBNAIL_WORKERS=0,
+        # Tasks are run between scenarios, out of timed requests
+        TASKS_MODE='worker',
+    )
+    settings_override.enable()
+    connection.settings_dict['TEST']['NAME'] = os.path.join(
+        directory, 'db.sqlite3'
+    )
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False
+    )
+    try:
+        dataset = Dataset(
+            seed=args.seed,
+            users=args.users,
+            groups=args.groups,
+            posts=args.posts,
+            follows=args.follows,
+            comments=args.comments,
+            images=args.images,
+            exponent=args.exponent,
+        )
+        seed(dataset)
+        if args.api:
+            scenarios = build_api_scenarios(
+                args.seed, args.warmup + args.requests, args.exponent
+            )
+        else:
+            scenarios = runner.build_scenarios(
+                args.seed,
+                args.warmup + args.requests,
+                args.exponent,
+                args.logged_in,
+            )
+        if args.scenarios:
+            scenarios = {name: scenarios[name] for name in args.scenarios}
+        session = runner.Session(
+            {
+                request.user
+                for requests in scenarios.values()
+                for request in requests
+                if request.user is not None
+            }
+        )
+        if args.templates:
+            results = run_template_modes(
+                application, session, scenarios, args.warmup
+            )
+        else:
+            results = {}
+            for name, requests in scenarios.items():
+                runner.run_scenario(
+                    application, session, requests[:args.warmup],
+                    args.concurrency,
+                )
+                results[name] = runner.run_scenario(
+                    application, session, requests[args.warmup:],
+                    args.concurrency,
+                )
+                run_pending()
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        settings_override.disable()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if args.templates:
+        print_template_results(results)
+        return 0
+    print_results(results)
+    report = {
+        'api': args.api,
+        'concurrency': args.concurrency,
+        'dataset': dataset._asdict(),
+        'logged_in': args.logged_in,
+        'results': results,
+    }
+    regressions = []
+    if args.baseline and os.path.exists(args.baseline):
+        baseline = runner.load_baseline(args.baseline)
+        if baseline['dataset'] != report['dataset']:
+            print('The baseline was measured on another dataset.')
+        regressions = runner.compare(
+            results, baseline['results'], args.threshold
+        )
+        for regression in regressions:
+            print(f'Regression: {regression}')
+    if args.baseline and args.save:
+        runner.save_baseline(args.baseline, report)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
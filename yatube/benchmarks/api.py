@@ -0,0 +1,64 @@
+"""Scenarios of the JSON API, see `api`.
+
+Mobile clients read lists of posts through cursors with sparse fieldsets,
+fetch posts they saw by `ids` and comments of popular posts.
+"""
+import random
+from typing import Dict, List
+
+from django.urls import reverse
+
+from core.paginator import encode_cursor
+from posts.models import Post
+
+from .datasets import popularity
+from .runner import Request
+
+# Number of posts fetched by a batch of `ids`
+BATCH_SIZE: int = 20
+LIST_FIELDS = 'id,author,group,pub_date,text'
+
+
+def build_api_scenarios(
+    seed: int,
+    number: int,
+    exponent: float,
+) -> Dict[str, List[Request]]:
+    """Returns `number` requests of each scenario of the API."""
+    rng = random.Random(seed)
+    # Recent posts are more popular
+    posts = list(Post.objects.values_list('id', 'pub_date'))
+    weights = popularity(len(posts), exponent)
+    posts_url = reverse('api:posts_list')
+
+    def popular_post():
+        return rng.choices(posts, weights)[0]
+
+    def after_cursor():
+        post_id, pub_date = popular_post()
+        return encode_cursor(pub_date, post_id)
+
+    makers = {
+        'api_posts': lambda: Request(
+            'GET', f'{posts_url}?fields={LIST_FIELDS}'
+        ),
+        'api_next': lambda: Request(
+            'GET', f'{posts_url}?fields={LIST_FIELDS}&after={after_cursor()}'
+        ),
+        'api_batch': lambda: Request(
+            'GET',
+            posts_url + '?ids=' + ','.join(
+                str(post_id) for post_id, _ in rng.choices(
+                    posts, weights, k=BATCH_SIZE
+                )
+            ),
+        ),
+        'api_comments': lambda: Request(
+            'GET',
+            f'{reverse("api:comments_list")}?post={popular_post()[0]}',
+        ),
+    }
+    return {
+        name: [make() for _ in range(number)]
+        for name, make in makers.items()
+    }
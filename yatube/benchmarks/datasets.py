@@ -0,0 +1,163 @@
+"""Deterministic synthetic datasets.
+
+The same arguments always produce the same rows: every random choice is
+made by a generator seeded with `seed`. Popularity of authors follows a
+power law, so a few authors have most of the followers, as on a real
+social network.
+"""
+import datetime
+import io
+import random
+from typing import List, NamedTuple
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageDraw
+
+from core.images import make_variants
+from posts import feed, search
+from posts.counters import reconcile_posts, reconcile_profiles
+from posts.models import Comment, Follow, Group, Post
+from posts.thumbnails import store_variants, variants_args
+from users.models import Profile
+
+User = get_user_model()
+
+START = datetime.datetime(2022, 1, 1, tzinfo=timezone.utc)
+BATCH_SIZE = 500
+IMAGE_SIZE = (1200, 800)
+WORDS = (
+    'кот собака город утро вечер дорога книга музыка море лес река солнце '
+    'друг работа дом окно кофе поезд фото история новый старый большой '
+    'маленький красивый быстро медленно сегодня вчера завтра python django '
+    'код тест база данных запрос ответ сервер кэш индекс'
+).split()
+
+
+class Dataset(NamedTuple):
+    seed: int
+    users: int
+    groups: int
+    posts: int
+    follows: int
+    comments: int
+    images: int
+    exponent: float
+
+
+def popularity(count: int, exponent: float) -> List[float]:
+    """Returns power-law weights of `count` items ranked by popularity."""
+    return [1 / rank ** exponent for rank in range(1, count + 1)]
+
+
+def _image(rng):
+    image = Image.new('RGB', IMAGE_SIZE, tuple(rng.choices(range(256), k=3)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(8):
+        x, y = rng.randrange(IMAGE_SIZE[0]), rng.randrange(IMAGE_SIZE[1])
+        draw.ellipse(
+            (x, y, x + rng.randrange(50, 400), y + rng.randrange(50, 400)),
+            fill=tuple(rng.choices(range(256), k=3)),
+        )
+    content = io.BytesIO()
+    image.save(content, 'JPEG', quality=85)
+    return ContentFile(content.getvalue())
+
+
+def _follows(rng, dataset):
+    weights = popularity(dataset.users, dataset.exponent)
+    authors = range(dataset.users)
+    for user in range(dataset.users):
+        # On average a user follows `follows` authors
+        number = min(rng.randint(0, 2 * dataset.follows), dataset.users - 1)
+        followed = set()
+        while len(followed) < number:
+            author = rng.choices(authors, weights)[0]
+            if author != user:
+                followed.add(author)
+        for author in sorted(followed):
+            yield user, author
+
+
+@transaction.atomic
+def seed(dataset: Dataset) -> None:
+    """Fills the empty database with the `dataset`."""
+    rng = random.Random(dataset.seed)
+    weights = popularity(dataset.users, dataset.exponent)
+
+    User.objects.bulk_create(
+        (
+            User(username=f'user{number}', password='!')
+            for number in range(dataset.users)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    users = list(User.objects.order_by('id').values_list('id', flat=True))
+    Profile.objects.bulk_create(
+        (Profile(user_id=user_id) for user_id in users),
+        batch_size=BATCH_SIZE,
+    )
+    Group.objects.bulk_create(
+        Group(
+            title=f'Group {number}',
+            slug=f'group-{number}',
+            description=f'Description of group {number}',
+        )
+        for number in range(dataset.groups)
+    )
+    groups = list(Group.objects.order_by('id').values_list('id', flat=True))
+    Follow.objects.bulk_create(
+        (
+            Follow(author_id=users[author], user_id=users[user])
+            for user, author in _follows(rng, dataset)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    # Popular authors write more posts
+    authors = rng.choices(users, weights, k=dataset.posts)
+    Post.objects.bulk_create(
+        (
+            Post(
+                author_id=author_id,
+                group_id=rng.choice(groups + [None]) if groups else None,
+                text=f'Пост {number} ' + ' '.join(
+                    rng.choices(WORDS, k=rng.randint(5, 60))
+                ),
+            )
+            for number, author_id in enumerate(authors)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    posts = list(Post.objects.order_by('id').values_list('id', flat=True))
+    # `pub_date` is set to the current time on insert
+    for number, post_id in enumerate(posts):
+        Post.objects.filter(id=post_id).update(
+            pub_date=START + datetime.timedelta(minutes=number)
+        )
+    Comment.objects.bulk_create(
+        (
+            Comment(
+                author_id=rng.choice(users),
+                post_id=rng.choice(posts),
+                text=' '.join(rng.choices(WORDS, k=rng.randint(3, 20))),
+            )
+            for _ in range(dataset.comments)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    reconcile_profiles()
+    reconcile_posts()
+    feed.update_pulled_authors()
+    for follow in Follow.objects.iterator():
+        feed.add_follow(follow)
+    search.get_backend().rebuild()
+
+    for post_id in rng.sample(posts, min(dataset.images, len(posts))):
+        name = default_storage.save(f'posts/bench_{post_id}.jpg', _image(rng))
+        Post.objects.filter(id=post_id).update(image=name)
+        store_variants(post_id, name, make_variants(*variants_args(name)))
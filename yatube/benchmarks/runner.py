@@ -0,0 +1,266 @@
+"""Driving scenarios through the WSGI application and reporting results.
+
+Requests of a scenario are built up front from a seeded generator, so
+every run sends the same requests. Each request is timed and its queries
+are counted by a wrapper installed on the database connections of the
+thread that serves it.
+"""
+import io
+import json
+import math
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import Client
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+
+from core.db.queries import wrap_queries
+from posts.models import Group, Post
+
+from .datasets import WORDS, popularity
+
+User = get_user_model()
+
+# Statistics compared with the baseline
+STATISTICS = ('p50', 'p95', 'p99', 'queries', 'throughput')
+
+
+class Request(NamedTuple):
+    method: str
+    path: str
+    data: Optional[Dict[str, str]] = None
+    user: Optional[str] = None
+
+
+class Session:
+    """Cookies of logged in users, the CSRF token is shared by all."""
+    def __init__(self, usernames):
+        self.csrf_token = get_random_string(64)
+        self.cookies = {}
+        for username in usernames:
+            client = Client()
+            client.force_login(User.objects.get(username=username))
+            self.cookies[username] = (
+                f'{settings.SESSION_COOKIE_NAME}='
+                f'{client.cookies[settings.SESSION_COOKIE_NAME].value}'
+            )
+
+    def environ(self, request: Request) -> dict:
+        path, _, query = request.path.partition('?')
+        cookies = [f'{settings.CSRF_COOKIE_NAME}={self.csrf_token}']
+        if request.user is not None:
+            cookies.append(self.cookies[request.user])
+        body = b''
+        environ = {
+            'HTTP_COOKIE': '; '.join(cookies),
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'REMOTE_ADDR': '127.0.0.1',
+            'REQUEST_METHOD': request.method,
+            'SCRIPT_NAME': '',
+            'SERVER_NAME': 'testserver',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'wsgi.errors': io.StringIO(),
+            'wsgi.multiprocess': False,
+            'wsgi.multithread': True,
+            'wsgi.run_once': False,
+            'wsgi.url_scheme': 'http',
+            'wsgi.version': (1, 0),
+        }
+        if request.data is not None:
+            body = urlencode(
+                {**request.data, 'csrfmiddlewaretoken': self.csrf_token}
+            ).encode()
+            environ['CONTENT_TYPE'] = 'application/x-www-form-urlencoded'
+        environ['CONTENT_LENGTH'] = str(len(body))
+        environ['wsgi.input'] = io.BytesIO(body)
+        return environ
+
+
+def call(application: Callable, environ: dict) -> Tuple[int, float, int]:
+    """Returns status, latency and number of queries of the request."""
+    statuses = []
+    queries = 0
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split()[0]))
+
+    def count(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    with wrap_queries(count):
+        started = time.perf_counter()
+        response = application(environ, start_response)
+        try:
+            for _ in response:
+                pass
+        finally:
+            # Fires `request_finished`, as a WSGI server does
+            response.close()
+        latency = time.perf_counter() - started
+    return statuses[0], latency, queries
+
+
+def percentile(values: List[float], share: float) -> float:
+    """Returns the nearest-rank percentile of `values`."""
+    ordered = sorted(values)
+    rank = max(math.ceil(share * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def run_scenario(
+    application: Callable,
+    session: Session,
+    requests: List[Request],
+    concurrency: int = 1,
+) -> dict:
+    """Sends `requests` by `concurrency` threads, returns statistics.
+
+    With `concurrency` of `1` requests are sent from the calling thread.
+    """
+    environs = [session.environ(request) for request in requests]
+    started = time.perf_counter()
+    if concurrency == 1:
+        results = [call(application, environ) for environ in environs]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(
+                executor.map(lambda environ: call(application, environ),
+                             environs)
+            )
+    elapsed = time.perf_counter() - started
+    latencies = [latency for _, latency, _ in results]
+    return {
+        'requests': len(results),
+        # Redirects are the expected responses of forms
+        'errors': sum(status >= 400 for status, _, _ in results),
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+        'queries': sum(queries for _, _, queries in results) / len(results),
+        'throughput': len(results) / elapsed,
+    }
+
+
+def build_scenarios(
+    seed: int,
+    number: int,
+    exponent: float,
+    logged_in: bool = False,
+) -> Dict[str, List[Request]]:
+    """Returns `number` requests of each scenario.
+
+    Pages are requested with power-law popularity. Pages that need a user
+    and pages of guests, if `logged_in` is set, are requested by users
+    logged in by the `Session`.
+    """
+    rng = random.Random(seed)
+    usernames = list(
+        User.objects.order_by('id').values_list('username', flat=True)
+    )
+    user_weights = popularity(len(usernames), exponent)
+    slugs = list(Group.objects.order_by('id').values_list('slug', flat=True))
+    # Recent posts are more popular
+    post_ids = list(Post.objects.values_list('id', flat=True))
+    post_weights = popularity(len(post_ids), exponent)
+    groups = [''] + [str(group_id) for group_id in Group.objects.order_by(
+        'id'
+    ).values_list('id', flat=True)]
+
+    def reader():
+        return rng.choice(usernames) if logged_in else None
+
+    def post_url(name):
+        post_id = rng.choices(post_ids, post_weights)[0]
+        return reverse(f'posts:{name}', kwargs={'post_id': post_id})
+
+    makers = {
+        'index': lambda: Request(
+            'GET',
+            reverse('posts:index') + f'?page={rng.randint(1, 3)}',
+            user=reader(),
+        ),
+        'group_posts': lambda: Request(
+            'GET',
+            reverse('posts:group_list', kwargs={'slug': rng.choice(slugs)}),
+            user=reader(),
+        ),
+        'profile': lambda: Request(
+            'GET',
+            reverse(
+                'posts:profile',
+                kwargs={'username': rng.choices(usernames, user_weights)[0]}
+            ),
+            user=reader(),
+        ),
+        'post_detail': lambda: Request(
+            'GET', post_url('post_detail'), user=reader()
+        ),
+        'follow_index': lambda: Request(
+            'GET', reverse('posts:follow_index'), user=rng.choice(usernames)
+        ),
+        'add_comment': lambda: Request(
+            'POST',
+            post_url('add_comment'),
+            {'text': ' '.join(rng.choices(WORDS, k=rng.randint(3, 20)))},
+            rng.choice(usernames),
+        ),
+        'post_create': lambda: Request(
+            'POST',
+            reverse('posts:post_create'),
+            {
+                'group': rng.choice(groups),
+                'text': ' '.join(rng.choices(WORDS, k=rng.randint(5, 60))),
+            },
+            rng.choice(usernames),
+        ),
+    }
+    if not slugs:
+        del makers['group_posts']
+    return {
+        name: [make() for _ in range(number)]
+        for name, make in makers.items()
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[str]:
+    """Returns regressions of `results` by more than `threshold` share.
+
+    Latencies and queries regress when they grow, throughput when it
+    falls.
+    """
+    regressions = []
+    for name, statistics in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for statistic in STATISTICS:
+            old, new = previous[statistic], statistics[statistic]
+            if statistic == 'throughput':
+                old, new = new, old
+            if new > old * (1 + threshold):
+                regressions.append(
+                    f'{name}: {statistic} {previous[statistic]:.4g} -> '
+                    f'{statistics[statistic]:.4g}'
+                )
+    return regressions
+
+
+def load_baseline(path: str) -> dict:
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_baseline(path: str, report: dict) -> None:
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2, sort_keys=True)
+        file.write('\n')
@@ -0,0 +1,62 @@
+"""Render times of pages with templates of the debug mode and of production.
+
+Debug templates are read and compiled on every render, cached ones are
+compiled once by the Django cached loader, production ones are compiled
+once with includes resolved, see `core.template.loaders`.
+Cached fragments are disabled, so every request renders its page in full.
+"""
+import copy
+from typing import Callable, Dict, List
+
+from django.conf import settings
+from django.test.utils import override_settings
+
+from core.template.loaders import warm_up
+
+from .runner import Request, Session, run_scenario
+
+# Loaders of template sources as in the settings
+SOURCE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+MODES = {
+    'debug': SOURCE_LOADERS,
+    'cached': [
+        ('django.template.loaders.cached.Loader', SOURCE_LOADERS),
+    ],
+    'production': [
+        ('core.template.loaders.Loader', SOURCE_LOADERS),
+    ],
+}
+NO_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+}
+
+
+def run_template_modes(
+    application: Callable,
+    session: Session,
+    scenarios: Dict[str, List[Request]],
+    warmup: int,
+) -> Dict[str, Dict[str, float]]:
+    """Returns median latencies of pages of `scenarios` per template mode.
+
+    Scenarios that post forms are skipped, they render no page.
+    """
+    results = {}
+    for mode, loaders in MODES.items():
+        templates = copy.deepcopy(settings.TEMPLATES)
+        templates[0]['OPTIONS']['loaders'] = loaders
+        with override_settings(CACHES=NO_CACHE, TEMPLATES=templates):
+            warm_up()
+            for name, requests in scenarios.items():
+                if any(request.method != 'GET' for request in requests):
+                    continue
+                run_scenario(application, session, requests[:warmup])
+                results.setdefault(name, {})[mode] = run_scenario(
+                    application, session, requests[warmup:]
+                )['p50']
+    return results
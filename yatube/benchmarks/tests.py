@@ -0,0 +1,122 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_finished
+from django.db import close_old_connections
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from posts.models import Comment, FeedEntry, Follow, Group, Post, User
+from yatube.wsgi import application
+
+from . import runner
+from .api import build_api_scenarios
+from .datasets import Dataset, seed
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+DATASET = Dataset(
+    seed=1,
+    users=10,
+    groups=2,
+    posts=40,
+    follows=3,
+    comments=30,
+    images=1,
+    exponent=1.1,
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        seed(DATASET)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        # The connection must stay open inside the transaction of the test
+        request_finished.disconnect(close_old_connections)
+
+    def tearDown(self):
+        super().tearDown()
+        request_finished.connect(close_old_connections)
+        cache.clear()
+
+    def test_dataset_is_seeded(self):
+        self.assertEqual(User.objects.count(), DATASET.users)
+        self.assertEqual(Post.objects.count(), DATASET.posts)
+        self.assertEqual(Comment.objects.count(), DATASET.comments)
+        self.assertEqual(Post.objects.exclude(image='').count(), 1)
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(FeedEntry.objects.exists())
+
+    def test_dataset_is_reproducible(self):
+        follows = list(Follow.objects.order_by('id').values_list(
+            'user__username', 'author__username'
+        ))
+        texts = list(Post.objects.values_list('text', flat=True))
+        Group.objects.all().delete()
+        User.objects.all().delete()
+        seed(DATASET)
+        self.assertEqual(follows, list(Follow.objects.order_by(
+            'id'
+        ).values_list('user__username', 'author__username')))
+        self.assertEqual(texts, list(Post.objects.values_list(
+            'text', flat=True
+        )))
+
+    def test_scenarios_are_served_without_errors(self):
+        scenarios = runner.build_scenarios(1, 3, DATASET.exponent)
+        session = runner.Session(
+            {
+                request.user
+                for requests in scenarios.values()
+                for request in requests
+                if request.user is not None
+            }
+        )
+        for name, requests in scenarios.items():
+            with self.subTest(scenario=name):
+                results = runner.run_scenario(application, session, requests)
+                self.assertEqual(results['requests'], 3)
+                self.assertEqual(results['errors'], 0)
+                self.assertGreater(results['queries'], 0)
+
+    def test_api_scenarios_are_served_without_errors(self):
+        scenarios = build_api_scenarios(1, 3, DATASET.exponent)
+        session = runner.Session(set())
+        for name, requests in scenarios.items():
+            with self.subTest(scenario=name):
+                results = runner.run_scenario(application, session, requests)
+                self.assertEqual(results['errors'], 0)
+                self.assertGreater(results['queries'], 0)
+
+    def test_regressions_are_reported(self):
+        baseline = {
+            'index': {
+                'p50': 0.01,
+                'p95': 0.02,
+                'p99': 0.03,
+                'queries': 2,
+                'throughput': 100,
+            },
+        }
+        results = {'index': {**baseline['index'], 'throughput': 50}}
+        self.assertEqual(runner.compare(results, baseline, 0.2), [
+            'index: throughput 100 -> 50',
+        ])
+        self.assertEqual(runner.compare(baseline, baseline, 0.2), [])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(runner.percentile(values, 0.5), 50)
+        self.assertEqual(runner.percentile(values, 0.99), 99)
+        self.assertEqual(runner.percentile([7], 0.95), 7)
@@ -0,0 +1,18 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'name',
+        'run_at',
+        'attempts',
+        'failed',
+    )
+    list_filter = ('failed', 'name',)
+    readonly_fields = ('args', 'attempts', 'error', 'locked_until', 'name')
+
+
+admin.site.register(Task, TaskAdmin)
@@ -0,0 +1,263 @@
+"""Serving a WSGI application over ASGI.
+
+Django 2.2 has neither an ASGI handler nor async views, so views run in a
+bounded pool of threads while the event loop of the ASGI server holds
+keep-alive and slow clients, which cost no thread. A request is served
+from the start to `close()` of the response in one thread, because
+database connections belong to threads. With `CONN_MAX_AGE` every thread
+keeps its connection, so the pool is also the pool of connections.
+Files of `FileResponse` are sent by the server without copying them to the
+process if it supports the `http.response.zerocopysend` extension.
+
+Request bodies are read before the view runs, chunked ones included, so
+`CONTENT_LENGTH` is the size of the read body, and bodies larger than
+`max_body_size` are rejected while they are received.
+"""
+import asyncio
+import sys
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+# Chunks of a response waiting for a slow client, the thread serving the
+# response waits when there are more
+MAX_PENDING_CHUNKS = 8
+# Larger request bodies, e.g. uploaded images, are spooled to disk
+MAX_MEMORY_BODY = 2 * 1024 * 1024
+# Files are read in larger chunks than the default of `FileResponse`
+FILE_CHUNK_SIZE = 64 * 1024
+ZERO_COPY = 'http.response.zerocopysend'
+
+START, BODY, FILE, END = 'start', 'body', 'file', 'end'
+
+
+class FileWrapper:
+    """`wsgi.file_wrapper` of the adapter."""
+    def __init__(self, file, block_size=FILE_CHUNK_SIZE):
+        self.file = file
+        self.block_size = max(block_size, FILE_CHUNK_SIZE)
+
+    def __iter__(self):
+        while True:
+            chunk = self.file.read(self.block_size)
+            if not chunk:
+                break
+            yield chunk
+
+    def close(self):
+        if hasattr(self.file, 'close'):
+            self.file.close()
+
+    def fileno(self):
+        try:
+            return self.file.fileno()
+        except (AttributeError, OSError, ValueError):
+            return None
+
+
+def _environ(scope: dict, body, size: int) -> dict:
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode().decode('latin-1'),
+        # WSGI passes the path as bytes decoded from latin-1
+        'PATH_INFO': scope['path'].encode().decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'REMOTE_ADDR': client[0],
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'wsgi.errors': sys.stderr,
+        'wsgi.file_wrapper': FileWrapper,
+        'wsgi.input': body,
+        'wsgi.multiprocess': True,
+        'wsgi.multithread': True,
+        'wsgi.run_once': False,
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.version': (1, 0),
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name not in ('CONTENT_LENGTH', 'CONTENT_TYPE'):
+            name = f'HTTP_{name}'
+        if name in environ:
+            separator = '; ' if name == 'HTTP_COOKIE' else ','
+            value = f'{environ[name]}{separator}{value}'
+        environ[name] = value
+    # The body is read, e.g. a chunked one has no `Content-Length` header
+    environ['CONTENT_LENGTH'] = str(size)
+    return environ
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+class ASGIAdapter:
+    """ASGI 3 application serving the WSGI `application`.
+
+    At most `max_workers` requests are served at once, others wait in the
+    event loop. Requests with bodies larger than `max_body_size` bytes are
+    answered with 413 without running the application.
+    """
+    def __init__(
+        self,
+        application: Callable,
+        max_workers: int,
+        max_body_size: Optional[int] = None,
+    ):
+        self.application = application
+        self.max_body_size = max_body_size
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='asgi',
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError(f'Unsupported scope type {scope["type"]}')
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        """Returns the spooled body and its size.
+
+        The body is `None` if the client is disconnected, `BodyTooLarge` is
+        raised once the size exceeds `max_body_size`.
+        """
+        body = tempfile.SpooledTemporaryFile(max_size=MAX_MEMORY_BODY)
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None, size
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if self.max_body_size is not None and size > self.max_body_size:
+                body.close()
+                raise BodyTooLarge(size)
+            body.write(chunk)
+            if not message.get('more_body', False):
+                body.seek(0)
+                return body, size
+
+    @staticmethod
+    async def send_error(send, status: int, text: bytes):
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+        })
+        await send({'type': 'http.response.body', 'body': text})
+
+    def serve(self, environ, loop, queue, zero_copy=False):
+        """Runs the WSGI application in a thread of the pool."""
+        def put(message):
+            asyncio.run_coroutine_threadsafe(queue.put(message), loop).result()
+
+        def start_response(status, headers, exc_info=None):
+            put((START, int(status.split(' ', 1)[0]), [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers
+            ]))
+
+        try:
+            response = self.application(environ, start_response)
+            try:
+                if (
+                    zero_copy
+                    and isinstance(response, FileWrapper)
+                    and response.fileno() is not None
+                ):
+                    # The file is closed once the server has sent it
+                    sent = Future()
+                    put((FILE, response.file, sent))
+                    sent.result()
+                else:
+                    for chunk in response:
+                        if chunk:
+                            put((BODY, chunk))
+            finally:
+                if hasattr(response, 'close'):
+                    response.close()
+        finally:
+            put((END,))
+
+    async def http(self, scope, receive, send):
+        try:
+            body, size = await self.read_body(receive)
+        except BodyTooLarge:
+            await self.send_error(send, 413, b'Request Entity Too Large')
+            return
+        if body is None:
+            return
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=MAX_PENDING_CHUNKS)
+        served = loop.run_in_executor(
+            self.executor,
+            self.serve,
+            _environ(scope, body, size),
+            loop,
+            queue,
+            ZERO_COPY in scope.get('extensions', {}),
+        )
+        started, connected = False, True
+        try:
+            while True:
+                message = await queue.get()
+                if message[0] == END:
+                    break
+                try:
+                    if not connected:
+                        # The thread is released only when the response is
+                        # read
+                        continue
+                    if message[0] == START:
+                        await send({
+                            'type': 'http.response.start',
+                            'status': message[1],
+                            'headers': message[2],
+                        })
+                        started = True
+                    elif message[0] == FILE:
+                        await send({
+                            'type': ZERO_COPY,
+                            'file': message[1],
+                            'more_body': True,
+                        })
+                    else:
+                        await send({
+                            'type': 'http.response.body',
+                            'body': message[1],
+                            'more_body': True,
+                        })
+                except OSError:
+                    connected = False
+                finally:
+                    if message[0] == FILE:
+                        message[2].set_result(None)
+            await served
+        except Exception:
+            if started or not connected:
+                raise
+            await self.send_error(send, 500, b'Internal Server Error')
+            raise
+        finally:
+            body.close()
+        if connected:
+            await send({'type': 'http.response.body', 'body': b''})
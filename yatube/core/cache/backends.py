@@ -0,0 +1,206 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .. import metrics
+
+# Access time of an entry is refreshed not more often than once in the
+# period (in seconds) to spare writes on reads of hot entries
+TOUCH_PERIOD: float = 1.0
+# Default number of writes of a process between checks of the number of
+# entries, counting them on every write would scan the table
+CULL_EVERY: int = 100
+
+
+class SQLiteCache(BaseCache):
+    """Cache in a SQLite file shared by all processes of the site.
+
+    The number of entries is bounded by the `MAX_ENTRIES` option, it is
+    checked once in `CULL_EVERY` writes of a process. When it is exceeded
+    expired entries and then `1 / CULL_FREQUENCY` of least recently used
+    entries are deleted. Integers are stored as is, so `incr` and
+    `decr` are atomic.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+        self._cull_every = int(
+            params.get('OPTIONS', {}).get('CULL_EVERY', CULL_EVERY)
+        )
+        # Not locked, a lost increment only delays the check
+        self._writes = 0
+
+    @property
+    def _connection(self):
+        # Connections are not shared between threads and forked processes
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(
+                self._path,
+                isolation_level=None,
+                timeout=5,
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+                'expires REAL, accessed REAL NOT NULL)'
+            )
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS cache_accessed '
+                'ON cache (accessed)'
+            )
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @staticmethod
+    def _dumps(value):
+        if type(value) is int:
+            return value
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _loads(value):
+        if type(value) is int:
+            return value
+        return pickle.loads(value)
+
+    def _cull(self):
+        connection = self._connection
+        connection.execute(
+            'DELETE FROM cache WHERE expires <= ?',
+            (time.time(),)
+        )
+        count = connection.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if count > self._max_entries:
+            connection.execute(
+                'DELETE FROM cache WHERE key IN ('
+                'SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+                (max(count // self._cull_frequency, 1),)
+            )
+
+    def _write(self, key, value, timeout, version, statement):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        cursor = self._connection.execute(
+            statement,
+            (
+                key,
+                self._dumps(value),
+                self.get_backend_timeout(timeout),
+                time.time(),
+            )
+        )
+        if cursor.rowcount:
+            self._writes += 1
+            if self._writes % self._cull_every == 0:
+                self._cull()
+        return cursor.rowcount > 0
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._connection.execute(
+            'DELETE FROM cache WHERE key = ? AND expires <= ?',
+            (self.make_key(key, version=version), time.time())
+        )
+        return self._write(
+            key, value, timeout, version,
+            'INSERT OR IGNORE INTO cache VALUES (?, ?, ?, ?)'
+        )
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._write(
+            key, value, timeout, version,
+            'INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)'
+        )
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        now = time.time()
+        row = self._connection.execute(
+            'SELECT value, expires, accessed FROM cache WHERE key = ?',
+            (key,)
+        ).fetchone()
+        if row is None:
+            metrics.add('cache_misses')
+            return default
+        value, expires, accessed = row
+        if expires is not None and expires <= now:
+            self._connection.execute(
+                'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                (key, now)
+            )
+            metrics.add('cache_misses')
+            return default
+        metrics.add('cache_hits')
+        if accessed < now - TOUCH_PERIOD:
+            self._connection.execute(
+                'UPDATE cache SET accessed = ? WHERE key = ?',
+                (now, key)
+            )
+        return self._loads(value)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        cursor = self._connection.execute(
+            'UPDATE cache SET expires = ? '
+            'WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time())
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self._connection.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return self._connection.execute(
+            'SELECT 1 FROM cache '
+            'WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time())
+        ).fetchone() is not None
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        connection = self._connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            cursor = connection.execute(
+                'UPDATE cache SET value = value + ? '
+                "WHERE key = ? AND typeof(value) = 'integer' "
+                'AND (expires IS NULL OR expires > ?)',
+                (delta, key, time.time())
+            )
+            row = connection.execute(
+                'SELECT value FROM cache WHERE key = ?',
+                (key,)
+            ).fetchone() if cursor.rowcount else None
+        finally:
+            connection.execute('COMMIT')
+        if row is None:
+            raise ValueError("Key '%s' not found" % key)
+        return row[0]
+
+    def clear(self):
+        self._connection.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Connections are kept open between requests, as Django does with
+        # persistent database connections
+        pass
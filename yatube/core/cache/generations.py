@@ -0,0 +1,55 @@
+"""Explicit invalidation of cached pages and fragments.
+
+Cached pages of a namespace are stored under a key containing the current
+generation of the namespace. Bumping the generation makes all the pages
+stale at once, they are evicted later by the cache itself. The time of the
+last bump is kept as well, it is the time pages of the namespace were last
+modified.
+"""
+import time
+
+from django.core.cache import cache
+
+
+def _generation_key(namespace: str) -> str:
+    return f'generation.{namespace}'
+
+
+def _modified_key(namespace: str) -> str:
+    return f'modified.{namespace}'
+
+
+def get_generation(namespace: str) -> int:
+    # A lost generation restarts from the current time, so it never returns
+    # to a value that cached pages were stored with
+    return cache.get_or_set(
+        _generation_key(namespace),
+        time.time_ns(),
+        timeout=None,
+    )
+
+
+def get_modified(namespace: str) -> float:
+    """Returns the timestamp of the last bump.
+
+    A lost timestamp restarts from the current time, pages could only be
+    reported as modified later than they were.
+    """
+    return cache.get_or_set(
+        _modified_key(namespace),
+        time.time(),
+        timeout=None,
+    )
+
+
+def bump_generation(namespace: str) -> None:
+    try:
+        cache.incr(_generation_key(namespace))
+    except ValueError:
+        cache.set(_generation_key(namespace), time.time_ns(), timeout=None)
+    cache.set(_modified_key(namespace), time.time(), timeout=None)
+
+
+def bumped_within(namespace: str, seconds: float) -> bool:
+    """Returns whether the generation was bumped in the last `seconds`."""
+    return time.time() - get_modified(namespace) < seconds
@@ -0,0 +1,8 @@
+from django.conf import settings
+
+
+def cache_timeouts(request):
+    """Adds timeouts of cached template fragments."""
+    return {
+        'post_cache_timeout': settings.POST_CACHE_TIMEOUT,
+    }
@@ -0,0 +1,17 @@
+from contextlib import ExitStack, contextmanager
+from typing import Callable
+
+from django.db import connections
+
+
+@contextmanager
+def wrap_queries(wrapper: Callable):
+    """Installs the execute wrapper on connections of every database.
+
+    Reads routed to replicas go through their own connections, so a
+    wrapper of the `default` one does not see them.
+    """
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        yield
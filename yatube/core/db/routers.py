@@ -0,0 +1,76 @@
+"""Routing of reads to replicas of the database.
+
+Reads of requests go to a replica of `DATABASE_REPLICAS`, writes go to
+the primary `default` database. `core.middleware.ReplicaMiddleware` picks
+one replica per request with `reset`, so a page is read from a single
+snapshot. Other reads, e.g. of migrations, management commands and
+background threads, go to the primary.
+
+The middleware pins requests that write, and requests of users who wrote
+less than `REPLICA_STICKY_SECONDS` ago, to the primary, so users read
+their writes despite the replication lag.
+"""
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_state = threading.local()
+
+
+def reset(read_replica: bool = False):
+    """Starts routing of the thread anew.
+
+    Reads go to a random replica with `read_replica`, to the primary
+    otherwise.
+    """
+    replicas = settings.DATABASE_REPLICAS
+    _state.replica = (
+        random.choice(replicas) if read_replica and replicas else None
+    )
+    _state.wrote = False
+
+
+def wrote() -> bool:
+    """Returns whether the thread wrote to the database since `reset`."""
+    return getattr(_state, 'wrote', False)
+
+
+@contextmanager
+def primary():
+    """Routes reads of the block to the primary database."""
+    pinned = getattr(_state, 'pinned', False)
+    _state.pinned = True
+    try:
+        yield
+    finally:
+        _state.pinned = pinned
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replica = getattr(_state, 'replica', None)
+        if (
+            replica not in settings.DATABASE_REPLICAS
+            or getattr(_state, 'pinned', False)
+        ):
+            return DEFAULT_DB_ALIAS
+        return replica
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get the schema by the replication
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -0,0 +1,69 @@
+import time
+import zlib
+
+from django.db import models
+from django.template.defaultfilters import linebreaksbr
+from django.utils.safestring import SafeString, mark_safe
+
+
+def render_text(text: str) -> SafeString:
+    """Returns the escaped `text` with line breaks as `<br>`."""
+    return linebreaksbr(text, autoescape=True)
+
+
+def text_version(text: str) -> str:
+    return format(zlib.crc32(text.encode()), 'x')
+
+
+class RenderedTextField(models.TextField):
+    """Keeps the HTML of the `source` text field rendered by `render_text`.
+
+    The HTML is rendered when the model is saved, including `bulk_create`,
+    and is prefixed by the version of the text it was rendered from, so
+    `rendered` detects HTML left stale by `QuerySet.update` of the text.
+    """
+    def __init__(self, *args, source='text', **kwargs):
+        self.source = source
+        kwargs.setdefault('blank', True)
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.source != 'text':
+            kwargs['source'] = self.source
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        text = getattr(model_instance, self.source)
+        value = f'{text_version(text)}:{render_text(text)}'
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+def new_version() -> int:
+    return time.time_ns()
+
+
+class VersionField(models.BigIntegerField):
+    """Changes when the model is saved, to key cached renders of the model.
+
+    `QuerySet.update` of the rendered fields should set `new_version()`.
+    """
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('default', 0)
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
+
+    def pre_save(self, model_instance, add):
+        value = new_version()
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+def rendered(html: str, text: str) -> SafeString:
+    """Returns the saved `html` of the `text`, or renders a stale one."""
+    version, _, html = html.partition(':')
+    if version == text_version(text):
+        return mark_safe(html)
+    return render_text(text)
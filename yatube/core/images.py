@@ -0,0 +1,129 @@
+"""CPU-bound image processing run in worker processes.
+
+The module does not import Django, so it is cheap to import in processes
+started with the `spawn` method.
+"""
+import os
+from typing import Iterable, List, Tuple
+
+from PIL import Image, ImageOps
+
+EXTENSIONS = {
+    'AVIF': 'avif',
+    'JPEG': 'jpg',
+    'WEBP': 'webp',
+}
+MIME_TYPES = {
+    'AVIF': 'image/avif',
+    'JPEG': 'image/jpeg',
+    'WEBP': 'image/webp',
+}
+ORIENTATION_TAG = 0x0112
+SAVE_OPTIONS = {
+    'AVIF': {'quality': 60},
+    'JPEG': {'optimize': True, 'progressive': True, 'quality': 85},
+    'WEBP': {'method': 4, 'quality': 80},
+}
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+def supported_formats(formats: Iterable[str]) -> List[str]:
+    """Returns `formats` that the installed Pillow is able to write.
+
+    AVIF is written only if Pillow is built with it or with a plugin.
+    """
+    Image.init()
+    return [format_ for format_ in formats if format_ in Image.SAVE]
+
+
+def variant_name(stem: str, size: Tuple[int, int], format_: str) -> str:
+    width, height = size
+    return f'{stem}_{width}x{height}.{EXTENSIONS[format_]}'
+
+
+def prepare_image(source: str) -> None:
+    """Decodes the `source` image and removes its EXIF metadata.
+
+    Uploads are checked only by headers, a broken image raises
+    `InvalidImage`. Metadata may hold the location of the author, so the
+    image is saved again without it, rotated by its orientation. JPEG
+    images that need no rotation keep their quantization tables, so they
+    are not degraded by the second encoding. Animated images are kept.
+    """
+    directory, name = os.path.split(source)
+    temporary = os.path.join(directory, f'.{name}.tmp')
+    try:
+        with Image.open(source) as image:
+            image.load()
+            exif = image.getexif()
+            if not exif or getattr(image, 'n_frames', 1) > 1:
+                return
+            format_ = image.format
+            # Pillow copies metadata of the source unless it is replaced
+            options = {'exif': b''}
+            if format_ == 'JPEG' and exif.get(ORIENTATION_TAG, 1) == 1:
+                options['quality'] = 'keep'
+            else:
+                image = ImageOps.exif_transpose(image)
+                options.update(SAVE_OPTIONS.get(format_, {}))
+            image.save(temporary, format_, **options)
+    except (Image.DecompressionBombError, OSError, SyntaxError,
+            ValueError) as error:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise InvalidImage(f'{source}: {error}') from error
+    os.replace(temporary, source)
+
+
+def make_variants(
+    source: str,
+    target: str,
+    size: Tuple[int, int],
+    widths: Iterable[int],
+    formats: Iterable[str],
+) -> List[Tuple[str, str, int, int]]:
+    """Saves variants of the `source` image cropped by center.
+
+    The variants keep the aspect ratio of `size`, have the given `widths`
+    and are encoded in each of `formats`. The crop works as the
+    `{% thumbnail %}` tag of sorl with `crop="center"` and `upscale=True`.
+    Files are named by `variant_name` in the directory of `target` path,
+    the base name of `target` is used as the stem.
+
+    Returns format, file name, width and height of each variant.
+    """
+    directory, stem = os.path.split(target)
+    os.makedirs(directory, exist_ok=True)
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image).convert('RGB')
+    variants = []
+    for width in sorted(set(widths)):
+        variant_size = (width, round(width * size[1] / size[0]))
+        variant = ImageOps.fit(image, variant_size, Image.LANCZOS)
+        for format_ in formats:
+            name = variant_name(stem, variant_size, format_)
+            variant.save(
+                os.path.join(directory, name),
+                format_,
+                **SAVE_OPTIONS.get(format_, {})
+            )
+            variants.append((format_, name, *variant_size))
+    return variants
+
+
+def process_image(
+    source: str,
+    target: str,
+    size: Tuple[int, int],
+    widths: Iterable[int],
+    formats: Iterable[str],
+) -> List[Tuple[str, str, int, int]]:
+    """Prepares the uploaded `source` image and saves its variants.
+
+    See `prepare_image` and `make_variants`.
+    """
+    prepare_image(source)
+    return make_variants(source, target, size, widths, formats)
@@ -0,0 +1,67 @@
+"""Sending emails by background tasks.
+
+`QueuedEmailBackend` stores messages as tasks, so views, e.g. the password
+reset, do not wait for the mail server. The tasks send them with
+`QUEUED_EMAIL_BACKEND`. Messages that are not stored in full, e.g. with
+attachments or of other classes, are sent at once.
+"""
+from django.conf import settings
+from django.core.mail import (
+    EmailMessage, EmailMultiAlternatives, get_connection
+)
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .tasks import task
+
+FIELDS = ('subject', 'body', 'from_email', 'to', 'cc', 'bcc', 'reply_to')
+# Attributes of messages set after they are created
+ATTRIBUTES = (
+    'alternative_subtype', 'content_subtype', 'encoding', 'mixed_subtype'
+)
+
+
+def _sender():
+    return get_connection(settings.QUEUED_EMAIL_BACKEND)
+
+
+@task()
+def send_message(fields: dict) -> None:
+    alternatives = fields.pop('alternatives')
+    attributes = fields.pop('attributes', {})
+    message = EmailMultiAlternatives(connection=_sender(), **fields)
+    for name, value in attributes.items():
+        setattr(message, name, value)
+    for content, mimetype in alternatives:
+        message.attach_alternative(content, mimetype)
+    message.send()
+
+
+def _is_queued(message) -> bool:
+    return (
+        type(message) in (EmailMessage, EmailMultiAlternatives)
+        and not message.attachments
+        # A `Charset` object is not stored, only the name of the charset
+        and (message.encoding is None or isinstance(message.encoding, str))
+    )
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Sends messages by tasks, messages not stored in full at once."""
+
+    def send_messages(self, email_messages):
+        sent = 0
+        for message in email_messages:
+            if not _is_queued(message):
+                sent += _sender().send_messages([message])
+                continue
+            fields = {field: getattr(message, field) for field in FIELDS}
+            fields['headers'] = message.extra_headers
+            fields['alternatives'] = getattr(message, 'alternatives', [])
+            fields['attributes'] = {
+                name: getattr(message, name)
+                for name in ATTRIBUTES
+                if hasattr(message, name)
+            }
+            send_message.delay(fields)
+            sent += 1
+        return sent
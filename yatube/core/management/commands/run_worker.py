@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.tasks import run_pending
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs background tasks stored by write requests, e.g. generation '
+        'of image variants, feed fan-out, search indexing and emails.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Run due tasks and exit.',
+        )
+        parser.add_argument(
+            '--poll',
+            default=settings.TASKS_POLL_SECONDS,
+            type=float,
+            help='Seconds to wait for new tasks when there are none.',
+        )
+
+    def handle(self, *args, **options):
+        if options['once']:
+            run = run_pending()
+            self.stdout.write(self.style.SUCCESS(f'Run {run} tasks.'))
+            return
+
+        self.stdout.write('Waiting for tasks, press CTRL-C to quit.')
+        try:
+            while True:
+                close_old_connections()
+                if not run_pending():
+                    time.sleep(options['poll'])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,252 @@
+"""In-process metrics exposed in the Prometheus text format.
+
+A share of requests, `METRICS_SAMPLE_RATE`, is sampled by
+`core.middleware.MetricsMiddleware`. Code on the hot path reports to the
+sample of the current thread with `add` and `timer`, which do nothing if
+the request is not sampled, so the overhead of unsampled requests is a
+lookup of a thread-local attribute.
+
+Each process keeps its own metrics, Prometheus sums them over targets.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+SECONDS_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+_local = threading.local()
+
+
+def _labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ''
+    escaped = (
+        (name, value.replace('\\', r'\\').replace('"', r'\"').replace(
+            '\n', r'\n'
+        ))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = ''
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[Tuple[str, str], ...], list] = {}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.type}',
+        ]
+        for name, labels, value in self.samples():
+            lines.append(f'{name}{labels} {_number(value)}')
+        return lines
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, value: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counter = self._values.setdefault(key, [0])
+            counter[0] += value
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, (value,) in values:
+            yield f'{self.name}_total', _labels(key), value
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] = [value]
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, (value,) in values:
+            yield self.name, _labels(key), value
+
+
+class Histogram(Metric):
+    """Counts observations in buckets by upper bounds, as Prometheus does.
+
+    Counts are stored per bucket and summed up when rendered.
+    """
+    type = 'histogram'
+
+    def __init__(self, name, documentation, buckets=SECONDS_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(buckets) + (float('inf'),)
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            # Counts of buckets, the sum and the count of observations
+            values = self._values.get(key)
+            if values is None:
+                values = self._values[key] = [0] * len(self.buckets) + [0, 0]
+            values[index] += 1
+            values[-2] += value
+            values[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            values = sorted(
+                (key, list(counts)) for key, counts in self._values.items()
+            )
+        for key, counts in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield (
+                    f'{self.name}_bucket',
+                    _labels(key + (('le', _number(bound)),)),
+                    cumulative,
+                )
+            yield f'{self.name}_sum', _labels(key), counts[-2]
+            yield f'{self.name}_count', _labels(key), counts[-1]
+
+
+REQUEST_SECONDS = Histogram(
+    'yatube_request_seconds', 'Wall time of sampled requests.'
+)
+DB_QUERIES = Histogram(
+    'yatube_db_queries', 'Database queries of sampled requests.',
+    COUNT_BUCKETS,
+)
+DB_SECONDS = Histogram(
+    'yatube_db_seconds', 'Time of database queries of sampled requests.'
+)
+TEMPLATE_SECONDS = Histogram(
+    'yatube_template_seconds', 'Time of rendering templates of sampled '
+    'requests.'
+)
+# Variants are generated after the response, so each generation is
+# recorded and not only those of sampled requests
+THUMBNAIL_SECONDS = Histogram(
+    'yatube_thumbnail_seconds', 'Time of generating image variants, '
+    'including the wait for a worker process.'
+)
+CACHE_HITS = Counter('yatube_cache_hits', 'Cache hits of sampled requests.')
+CACHE_MISSES = Counter(
+    'yatube_cache_misses', 'Cache misses of sampled requests.'
+)
+SAMPLE_RATE = Gauge(
+    'yatube_metrics_sample_rate', 'Share of sampled requests, divide '
+    'counts by it to estimate totals.'
+)
+
+REGISTRY: List[Metric] = [
+    REQUEST_SECONDS,
+    DB_QUERIES,
+    DB_SECONDS,
+    TEMPLATE_SECONDS,
+    THUMBNAIL_SECONDS,
+    CACHE_HITS,
+    CACHE_MISSES,
+    SAMPLE_RATE,
+]
+
+
+class Sample:
+    """Values collected during a sampled request."""
+    __slots__ = (
+        'cache_hits', 'cache_misses', 'db_queries', 'db_seconds',
+        'template_seconds',
+    )
+
+    def __init__(self):
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.db_queries += 1
+
+
+def start() -> Sample:
+    _local.sample = Sample()
+    return _local.sample
+
+
+def finish() -> Optional[Sample]:
+    sample = getattr(_local, 'sample', None)
+    _local.sample = None
+    return sample
+
+
+def add(field: str, value: float = 1) -> None:
+    """Adds the `value` to the `field` of the sample of the request."""
+    sample = getattr(_local, 'sample', None)
+    if sample is not None:
+        setattr(sample, field, getattr(sample, field) + value)
+
+
+@contextmanager
+def timer(field: str) -> Iterator[None]:
+    """Adds the time of the block to the `field` of the sample."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add(field, time.perf_counter() - started)
+
+
+def record(view: str, seconds: float, sample: Sample) -> None:
+    REQUEST_SECONDS.observe(seconds, view=view)
+    DB_QUERIES.observe(sample.db_queries, view=view)
+    DB_SECONDS.observe(sample.db_seconds, view=view)
+    TEMPLATE_SECONDS.observe(sample.template_seconds, view=view)
+    if sample.cache_hits:
+        CACHE_HITS.inc(sample.cache_hits, view=view)
+    if sample.cache_misses:
+        CACHE_MISSES.inc(sample.cache_misses, view=view)
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def clear() -> None:
+    for metric in REGISTRY:
+        metric.clear()
@@ -0,0 +1,74 @@
+import random
+import time
+
+from django.conf import settings
+
+from . import metrics
+from .db import routers
+from .db.queries import wrap_queries
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+class MetricsMiddleware:
+    """Records metrics of a share of requests per view name.
+
+    The middleware should be the first one, so the time and queries of
+    other middleware are counted too.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        metrics.SAMPLE_RATE.set(settings.METRICS_SAMPLE_RATE)
+
+    def __call__(self, request):
+        if random.random() >= settings.METRICS_SAMPLE_RATE:
+            return self.get_response(request)
+
+        sample = metrics.start()
+        started = time.perf_counter()
+        try:
+            with wrap_queries(sample.execute_wrapper):
+                response = self.get_response(request)
+        finally:
+            metrics.finish()
+        match = request.resolver_match
+        metrics.record(
+            match.view_name if match is not None else 'unresolved',
+            time.perf_counter() - started,
+            sample,
+        )
+        return response
+
+
+class ReplicaMiddleware:
+    """Pins requests to the primary database to read own writes.
+
+    Requests with unsafe methods read from the primary. A request that
+    wrote sets a cookie pinning requests of the client to the primary for
+    `REPLICA_STICKY_SECONDS`, while replicas catch up.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        routers.reset(read_replica=(
+            request.method in SAFE_METHODS
+            and settings.REPLICA_STICKY_COOKIE not in request.COOKIES
+        ))
+        try:
+            response = self.get_response(request)
+            wrote = routers.wrote()
+        finally:
+            routers.reset()
+        if wrote:
+            response.set_cookie(
+                settings.REPLICA_STICKY_COOKIE,
+                '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
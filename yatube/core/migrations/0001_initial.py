@@ -0,0 +1,37 @@
+# Generated by Django 2.2.28 on 2026-10-18 03:05
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Task',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('args', models.TextField(verbose_name='Аргументы')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Число попыток')),
+                ('error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+                ('failed', models.BooleanField(default=False, help_text='Попытки исчерпаны, задача не будет запущена', verbose_name='Провалена')),
+                ('locked_until', models.DateTimeField(blank=True, null=True, verbose_name='Выполняется до')),
+                ('name', models.CharField(max_length=200, verbose_name='Функция')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Время запуска')),
+            ],
+            options={
+                'verbose_name': 'Задача',
+                'verbose_name_plural': 'Задачи',
+                'ordering': ['run_at', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['failed', 'run_at'], name='task_due_idx'),
+        ),
+    ]
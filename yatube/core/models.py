@@ -0,0 +1,41 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """A call of a function of `core.tasks` waiting to be run."""
+    args = models.TextField(verbose_name='Аргументы')
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Число попыток',
+    )
+    error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+    failed = models.BooleanField(
+        default=False,
+        help_text='Попытки исчерпаны, задача не будет запущена',
+        verbose_name='Провалена',
+    )
+    locked_until = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Выполняется до',
+    )
+    name = models.CharField(max_length=200, verbose_name='Функция')
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Время запуска',
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['failed', 'run_at'],
+                name='task_due_idx'
+            ),
+        ]
+        ordering = ['run_at', 'id']
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,184 @@
+from collections.abc import Sequence
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+# The field that together with the primary key forms the seek key
+DEFAULT_FIELD: str = 'pub_date'
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(value: datetime, pk: int) -> str:
+    """Returns an URL safe cursor pointing to the `(value, pk)` key.
+
+    The datetime is stored as an exact number of microseconds since the
+    epoch, so the decoded key is equal to the one stored in the database.
+    """
+    epoch = EPOCH if value.tzinfo else EPOCH.replace(tzinfo=None)
+    return f'{(value - epoch) // MICROSECOND}_{pk}'
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        micros, pk = cursor.split('_')
+        value = EPOCH + timedelta(microseconds=int(micros))
+        pk = int(pk)
+    except (OverflowError, TypeError, ValueError) as error:
+        raise InvalidCursor(cursor) from error
+    if not settings.USE_TZ:
+        value = value.replace(tzinfo=None)
+    return value, pk
+
+
+class CursorPage(Sequence):
+    """A page of the `CursorPaginator` compatible with Django `Page`.
+
+    The page does not know its number and the total number of pages, so
+    `number` is always `None`.
+    """
+    number = None
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<Cursor page of {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+
+class CursorPaginator:
+    """Keyset paginator over `object_list` in descending `(field, pk)` order.
+
+    Unlike Django `Paginator`, the next and previous pages are selected by a
+    seek on the key of the last or first object of the current page, so the
+    cost of a page does not depend on its depth. With `descending=False` the
+    objects are in ascending order, e.g. comments from the oldest one. The
+    `pk_field` replaces the primary key when objects are ordered by columns
+    of a joined table, e.g. posts of the feed by its entries.
+    """
+
+    def __init__(
+        self,
+        object_list,
+        per_page,
+        field=DEFAULT_FIELD,
+        descending=True,
+        pk_field='pk'
+    ):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.field = field
+        self.descending = descending
+        self.pk_field = pk_field
+
+    @cached_property
+    def count(self):
+        """Returns the total number of objects, it costs a `COUNT(*)`."""
+        return self.object_list.count()
+
+    def _seek(self, cursor, descending, inclusive=False):
+        value, pk = decode_cursor(cursor)
+        lookup = 'lt' if descending else 'gt'
+        pk_lookup = lookup + 'e' if inclusive else lookup
+        prefix = '-' if descending else ''
+        return self.object_list.filter(
+            Q(**{f'{self.field}__{lookup}': value})
+            | Q(**{self.field: value, f'{self.pk_field}__{pk_lookup}': pk})
+        ).order_by(prefix + self.field, prefix + self.pk_field)
+
+    def first_page(self):
+        prefix = '-' if self.descending else ''
+        objects = list(
+            self.object_list.order_by(
+                prefix + self.field, prefix + self.pk_field
+            )[:self.per_page + 1]
+        )
+        return CursorPage(
+            objects[:self.per_page],
+            self,
+            has_next=len(objects) > self.per_page,
+            has_previous=False,
+        )
+
+    def page_after(
+        self,
+        cursor: str,
+        with_previous: bool = True
+    ) -> CursorPage:
+        """Returns the page of objects that follow the `cursor`.
+
+        Whether the previous page exists costs a query, without
+        `with_previous` it is not checked and `has_previous()` is `None`.
+        """
+        objects = list(
+            self._seek(cursor, self.descending)[:self.per_page + 1]
+        )
+        return CursorPage(
+            objects[:self.per_page],
+            self,
+            has_next=len(objects) > self.per_page,
+            has_previous=self._seek(
+                cursor, not self.descending, inclusive=True
+            ).exists() if with_previous else None,
+        )
+
+    def page_before(self, cursor: str) -> CursorPage:
+        """Returns the page of objects that precede the `cursor`."""
+        objects = list(
+            self._seek(cursor, not self.descending)[:self.per_page + 1]
+        )
+        return CursorPage(
+            objects[:self.per_page][::-1],
+            self,
+            has_next=self._seek(
+                cursor, self.descending, inclusive=True
+            ).exists(),
+            has_previous=len(objects) > self.per_page,
+        )
+
+    def get_page(
+        self,
+        after: Optional[str] = None,
+        before: Optional[str] = None
+    ) -> CursorPage:
+        """Returns a valid page, even if the cursor is invalid or stale.
+
+        An invalid cursor or a cursor beyond the end of the list leads to
+        the first page.
+        """
+        try:
+            if after:
+                page = self.page_after(after)
+            elif before:
+                page = self.page_before(before)
+            else:
+                return self.first_page()
+        except InvalidCursor:
+            return self.first_page()
+        return page if len(page) else self.first_page()
@@ -0,0 +1,202 @@
+"""Static files of production.
+
+`collectstatic` stores files with hashes of their contents in the names, so
+browsers keep them for a year, see `core.views.serve_static`. Rules of
+style sheets listed in `STATIC_PURGE_CSS` whose selectors name classes or
+ids found nowhere in the code are removed before hashing. Text files are
+stored compressed beside, `.gz` and `.br` if `brotli` is installed, so
+they are not compressed per request.
+"""
+import gzip
+import os
+import re
+from typing import Iterator, Optional, Set, Tuple
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSED_EXTENSIONS = {'.css', '.ico', '.js', '.json', '.svg', '.txt'}
+# Files where used classes and ids are looked for
+SOURCE_EXTENSIONS = {'.html', '.js', '.py'}
+SKIPPED_DIRECTORIES = {'__pycache__', 'cache', 'migrations', 'tests'}
+
+NAME = re.compile(r'[\w-]+')
+# Classes and ids of selectors, `:not()` and attribute selectors do not
+# restrict elements they match, so their names are not looked at
+SELECTOR_NAME = re.compile(r'[.#](-?[_a-zA-Z][\w-]*)')
+NOT_RESTRICTING = re.compile(r':not\([^)]*\)|\[[^\]]*\]')
+# At-rules containing rules, other ones are kept as they are
+NESTED_AT_RULES = ('@media', '@supports')
+
+
+def used_names(directories) -> Set[str]:
+    """Returns words of source files in `directories`, names included.
+
+    Collected static files and uploaded media are not looked at.
+    """
+    skipped = {settings.MEDIA_ROOT, settings.STATIC_ROOT}
+    names = set()
+    for directory in directories:
+        for root, subdirectories, files in os.walk(directory):
+            subdirectories[:] = [
+                subdirectory for subdirectory in subdirectories
+                if subdirectory not in SKIPPED_DIRECTORIES
+                and not subdirectory.startswith('.')
+                and os.path.join(root, subdirectory) not in skipped
+            ]
+            for file in files:
+                if os.path.splitext(file)[1] not in SOURCE_EXTENSIONS:
+                    continue
+                path = os.path.join(root, file)
+                with open(path, encoding='utf-8', errors='ignore') as source:
+                    names.update(NAME.findall(source.read()))
+    return names
+
+
+def _blocks(css: str) -> Iterator[Tuple[str, Optional[str]]]:
+    """Yields preludes and bodies of top level blocks of `css`.
+
+    The body is `None` for statements, e.g. `@charset`, and comments.
+    """
+    position, length = 0, len(css)
+    while position < length:
+        if css.startswith('/*', position):
+            end = css.find('*/', position + 2)
+            end = length if end < 0 else end + 2
+            yield css[position:end], None
+            position = end
+            continue
+        start, depth, quote = position, 0, None
+        while position < length:
+            char = css[position]
+            if quote:
+                if char == '\\':
+                    position += 1
+                elif char == quote:
+                    quote = None
+            elif char in '"\'':
+                quote = char
+            elif char == '{':
+                if depth == 0:
+                    body_start = position + 1
+                depth += 1
+            elif char == '}':
+                depth -= 1
+                if depth == 0:
+                    yield (
+                        css[start:body_start - 1].strip(),
+                        css[body_start:position],
+                    )
+                    position += 1
+                    break
+            elif char == ';' and depth == 0:
+                yield css[start:position + 1].strip(), None
+                position += 1
+                break
+            position += 1
+        else:
+            if css[start:].strip():
+                yield css[start:].strip(), None
+
+
+def _split_selectors(prelude: str) -> Iterator[str]:
+    depth, start = 0, 0
+    for position, char in enumerate(prelude):
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            yield prelude[start:position]
+            start = position + 1
+    yield prelude[start:]
+
+
+def purge_css(css: str, used: Set[str]) -> str:
+    """Returns `css` without selectors naming classes or ids not `used`.
+
+    Comments are removed except `/*!` ones, e.g. licenses.
+    """
+    purged = []
+    for prelude, body in _blocks(css):
+        if body is None:
+            if not prelude.startswith('/*') or prelude.startswith('/*!'):
+                purged.append(prelude)
+        elif prelude.startswith(NESTED_AT_RULES):
+            body = purge_css(body, used)
+            if body:
+                purged.append(f'{prelude}{{{body}}}')
+        elif prelude.startswith('@'):
+            purged.append(f'{prelude}{{{body}}}')
+        else:
+            selectors = [
+                selector for selector in _split_selectors(prelude)
+                if set(SELECTOR_NAME.findall(
+                    NOT_RESTRICTING.sub('', selector)
+                )) <= used
+            ]
+            if selectors:
+                purged.append(f'{",".join(selectors)}{{{body}}}')
+    return ''.join(purged)
+
+
+class StaticFilesStorage(ManifestStaticFilesStorage):
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Files are not collected, e.g. in development and tests
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            paths = self.purge(paths)
+        yield from super().post_process(paths, dry_run, **options)
+        if not dry_run:
+            for name in {*paths, *self.hashed_files.values()}:
+                self.compress(name)
+
+    def purge(self, paths: dict) -> dict:
+        """Purges collected style sheets of `STATIC_PURGE_CSS`.
+
+        Returns `paths` where purged ones are read from the storage, files
+        are hashed as they are read from `paths`.
+        """
+        paths = dict(paths)
+        used = None
+        for name in settings.STATIC_PURGE_CSS:
+            if name not in paths:
+                continue
+            if used is None:
+                used = used_names([settings.BASE_DIR])
+            storage, path = paths[name]
+            with storage.open(path) as file:
+                css = file.read().decode('utf-8')
+            self.delete(name)
+            self._save(name, ContentFile(purge_css(css, used).encode()))
+            paths[name] = (self, name)
+        return paths
+
+    def compress(self, name: str) -> None:
+        if os.path.splitext(name)[1] not in COMPRESSED_EXTENSIONS:
+            return
+        if not self.exists(name):
+            return
+        with self.open(name) as file:
+            content = file.read()
+        compressors = [('.gz', lambda data: gzip.compress(data, 9))]
+        if brotli is not None:
+            compressors.append(('.br', brotli.compress))
+        for extension, compress in compressors:
+            compressed = compress(content)
+            # Compressed files are served only when they are smaller
+            if len(compressed) < len(content):
+                if self.exists(name + extension):
+                    self.delete(name + extension)
+                self._save(name + extension, ContentFile(compressed))
@@ -0,0 +1,178 @@
+"""Background tasks stored in the database.
+
+Side effects of writes are run as tasks, so write requests do not wait for
+them. A task is stored as a `Task` row in the transaction of the write, so
+it is run if and only if the write is committed. A failed task is retried
+with an exponential backoff up to `max_attempts` times. Tasks run out of a
+transaction and could be run again after a crash, so they should be
+idempotent.
+
+Tasks are run according to `TASKS_MODE`:
+
+* `eager`: at once by the caller, errors are raised, e.g. in tests;
+* `thread`: by a thread of the process woken when a transaction commits;
+* `worker`: by processes of `python manage.py run_worker`.
+"""
+import json
+import logging
+import threading
+import traceback
+from datetime import timedelta
+from functools import partial
+from typing import Callable, List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS: int = 5
+# Delay (in seconds) before the first retry, it doubles on each failure
+RETRY_DELAY: int = 10
+# Time (in seconds) a claimed task is not run by others, a task of a
+# crashed worker is run again after it
+LEASE: int = 10 * 60
+BATCH_SIZE: int = 20
+
+
+class TaskFunction:
+    """A function run as a task by `delay`.
+
+    The function is found by its dotted path, so its arguments should be
+    JSON serializable and it should be defined at the module level.
+    """
+    def __init__(self, function: Callable, max_attempts: int):
+        self.function = function
+        self.max_attempts = max_attempts
+        self.name = f'{function.__module__}.{function.__qualname__}'
+        self.__doc__ = function.__doc__
+
+    def __call__(self, *args):
+        return self.function(*args)
+
+    def __repr__(self):
+        return f'<Task {self.name}>'
+
+    def delay(self, *args) -> None:
+        if settings.TASKS_MODE == 'eager':
+            self.function(*args)
+            return
+        Task.objects.create(name=self.name, args=json.dumps(args))
+        if settings.TASKS_MODE == 'thread':
+            transaction.on_commit(_wake_thread)
+
+
+def task(max_attempts: int = MAX_ATTEMPTS):
+    """Makes the decorated function a `TaskFunction`."""
+    def decorator(function):
+        return TaskFunction(function, max_attempts)
+    return decorator
+
+
+def after_commit(function: Callable, *args) -> None:
+    """Runs a cheap side effect of a write after the commit.
+
+    Unlike tasks, it is not retried and is lost if the process crashes.
+    """
+    if settings.TASKS_MODE == 'eager':
+        function(*args)
+    else:
+        transaction.on_commit(partial(function, *args))
+
+
+def _claim(limit: int) -> List[Task]:
+    now = timezone.now()
+    due = Task.objects.filter(
+        Q(locked_until=None) | Q(locked_until__lt=now),
+        failed=False,
+        run_at__lte=now,
+    )[:limit]
+    claimed = []
+    for due_task in due:
+        # Another worker could claim the task since it was read
+        if Task.objects.filter(
+            id=due_task.id,
+            locked_until=due_task.locked_until,
+        ).update(
+            attempts=F('attempts') + 1,
+            locked_until=now + timedelta(seconds=LEASE),
+        ):
+            due_task.attempts += 1
+            claimed.append(due_task)
+    return claimed
+
+
+def _run(claimed: Task) -> None:
+    function = None
+    try:
+        function = import_string(claimed.name)
+        if not isinstance(function, TaskFunction):
+            raise TypeError(f'{claimed.name} is not a task')
+        function(*json.loads(claimed.args))
+    except Exception:
+        logger.exception('Task %s %s failed', claimed.id, claimed.name)
+        failed = (
+            not isinstance(function, TaskFunction)
+            or claimed.attempts >= function.max_attempts
+        )
+        delay = RETRY_DELAY * 2 ** (claimed.attempts - 1)
+        Task.objects.filter(id=claimed.id).update(
+            error=traceback.format_exc(),
+            failed=failed,
+            locked_until=None,
+            run_at=timezone.now() + timedelta(seconds=delay),
+        )
+    else:
+        Task.objects.filter(id=claimed.id).delete()
+
+
+def run_pending(limit: Optional[int] = None) -> int:
+    """Runs due tasks until there are none or `limit` are run.
+
+    Returns the number of run tasks, failed ones included.
+    """
+    run = 0
+    while limit is None or run < limit:
+        size = BATCH_SIZE if limit is None else min(BATCH_SIZE, limit - run)
+        claimed = _claim(size)
+        if not claimed:
+            break
+        for claimed_task in claimed:
+            _run(claimed_task)
+        run += len(claimed)
+    return run
+
+
+_wakeup = threading.Event()
+_thread_lock = threading.Lock()
+_thread = None
+
+
+def _work() -> None:
+    while True:
+        _wakeup.wait(timeout=settings.TASKS_POLL_SECONDS)
+        _wakeup.clear()
+        try:
+            run_pending()
+        except Exception:
+            logger.exception('Tasks are not run')
+        finally:
+            close_old_connections()
+
+
+def _wake_thread() -> None:
+    global _thread
+    with _thread_lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(
+                target=_work,
+                name='tasks',
+                daemon=True,
+            )
+            _thread.start()
+    _wakeup.set()
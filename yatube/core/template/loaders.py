@@ -0,0 +1,93 @@
+"""Template loading of production.
+
+Templates are compiled once by the cached loader. Includes of constant
+template names, e.g. `{% include "posts/includes/paginator.html" %}`, are
+resolved to compiled templates at load time, so rendering them neither
+looks the name up nor builds a cache key. `warm_up` loads all templates,
+so the first requests of a process do not compile them.
+"""
+import logging
+import os
+
+from django.template import (
+    TemplateDoesNotExist, TemplateSyntaxError, engines
+)
+from django.template.backends.django import DjangoTemplates
+from django.template.loader_tags import IncludeNode
+from django.template.loaders import cached
+
+logger = logging.getLogger(__name__)
+
+
+class ResolvedInclude:
+    """Constant template name of `IncludeNode` resolved to its template.
+
+    It resolves to itself, `IncludeNode` renders its `template` as the one
+    of a backend template.
+    """
+    def __init__(self, template):
+        self.template = template
+        self.render = template.render
+
+    def resolve(self, context):
+        return self
+
+
+class Loader(cached.Loader):
+    def get_template(self, template_name, skip=None):
+        template = super().get_template(template_name, skip)
+        if not getattr(template, 'includes_resolved', False):
+            # Marked at first for templates that include themselves
+            template.includes_resolved = True
+            self.resolve_includes(template)
+        return template
+
+    def resolve_includes(self, template):
+        for node in template.nodelist.get_nodes_by_type(IncludeNode):
+            name = getattr(node.template, 'var', None)
+            if not isinstance(name, str) or node.template.filters:
+                continue
+            try:
+                node.template = ResolvedInclude(
+                    self.engine.get_template(name)
+                )
+            except TemplateDoesNotExist:
+                # The error is raised by the render, if it includes it
+                continue
+
+
+def warm_up() -> int:
+    """Loads templates of Django engines using `Loader`.
+
+    Returns the number of loaded templates, templates that fail to compile
+    are skipped, they fail on render.
+    """
+    loaded = 0
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        engine = backend.engine
+        directories = [
+            directory
+            for loader in engine.template_loaders
+            if isinstance(loader, Loader)
+            for source in loader.loaders
+            for directory in source.get_dirs()
+        ]
+        for directory in directories:
+            for root, _, files in os.walk(directory):
+                for file in files:
+                    name = os.path.relpath(
+                        os.path.join(root, file), directory
+                    ).replace(os.sep, '/')
+                    try:
+                        engine.get_template(name)
+                    except (
+                        TemplateDoesNotExist,
+                        TemplateSyntaxError,
+                        UnicodeDecodeError,
+                    ) as error:
+                        logger.debug('%s is not loaded: %s', name, error)
+                    else:
+                        loaded += 1
+    return loaded
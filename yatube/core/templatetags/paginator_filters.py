@@ -2,12 +2,20 @@ from typing import Sequence
 
 from django import template
 
+from core.paginator import DEFAULT_FIELD, encode_cursor
+
 # The number of pages
 ON_EACH_SIDE: int = 3
 
 register = template.Library()
 
 
+@register.filter
+def cursor(obj, field: str = DEFAULT_FIELD) -> str:
+    """Returns the cursor of `obj` for `after`/`before` page links."""
+    return encode_cursor(getattr(obj, field), obj.pk)
+
+
 @register.filter
 def page(page_range: Sequence[int], number: int) -> Sequence[int]:
     """Returns fixed `page_range` range iterator of page numbers.
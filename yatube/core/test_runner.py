@@ -0,0 +1,37 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """Runs background tasks at once, so tests see side effects of writes.
+
+    Image variants are generated by the task itself, not by a pool of
+    processes. The cache is kept in a temporary file, so clearing it in
+    tests does not clear the cache shared by processes of the site.
+    """
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_directory = tempfile.mkdtemp()
+        caches = {
+            alias: {
+                **cache,
+                'LOCATION': os.path.join(self.cache_directory, alias),
+            }
+            for alias, cache in settings.CACHES.items()
+        }
+        self.test_settings = override_settings(
+            CACHES=caches,
+            POST_THUMBNAIL_WORKERS=0,
+            TASKS_MODE='eager',
+        )
+        self.test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.test_settings.disable()
+        shutil.rmtree(self.cache_directory, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,190 @@
+import asyncio
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.wsgi import get_wsgi_application
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from ..asgi import ASGIAdapter, FileWrapper
+
+
+def run(application, scope, messages, sent=None):
+    """Returns messages sent by the ASGI `application`."""
+    sent = [] if sent is None else sent
+    messages = list(messages)
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    return sent
+
+
+def http_scope(path, method='GET', query_string=b'', headers=()):
+    return {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': query_string,
+        'headers': list(headers),
+        'client': ('127.0.0.1', 50000),
+        'server': ('testserver', 80),
+    }
+
+
+def echo(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [
+        environ['PATH_INFO'].encode('latin-1'),
+        b'|',
+        environ['QUERY_STRING'].encode(),
+        b'|',
+        environ.get('HTTP_COOKIE', '').encode(),
+        b'|',
+        environ['wsgi.input'].read(),
+    ]
+
+
+def form(environ, start_response):
+    request = WSGIRequest(environ)
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [request.POST['text'].encode()]
+
+
+def file(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return environ['wsgi.file_wrapper'](open(__file__, 'rb'))
+
+
+def failing(environ, start_response):
+    raise RuntimeError('Failure')
+
+
+class ASGIAdapterTests(SimpleTestCase):
+    def test_request_is_passed_to_wsgi_application(self):
+        sent = run(
+            ASGIAdapter(echo, max_workers=2),
+            http_scope(
+                '/пост/',
+                method='POST',
+                query_string=b'page=2',
+                headers=[(b'cookie', b'a=1'), (b'cookie', b'b=2')],
+            ),
+            [
+                {'type': 'http.request', 'body': b'te', 'more_body': True},
+                {'type': 'http.request', 'body': b'xt'},
+            ],
+        )
+        self.assertEqual(sent[0], {
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(b'content-type', b'text/plain')],
+        })
+        body = b''.join(message.get('body', b'') for message in sent[1:])
+        self.assertEqual(body, '/пост/|page=2|a=1; b=2|text'.encode())
+        self.assertFalse(sent[-1].get('more_body', False))
+
+    def test_chunked_form_is_read(self):
+        sent = run(
+            ASGIAdapter(form, max_workers=1),
+            http_scope(
+                '/',
+                method='POST',
+                headers=[
+                    (b'content-type', b'application/x-www-form-urlencoded'),
+                    (b'transfer-encoding', b'chunked'),
+                ],
+            ),
+            [
+                {
+                    'type': 'http.request',
+                    'body': b'text=te',
+                    'more_body': True,
+                },
+                {'type': 'http.request', 'body': b'xt'},
+            ],
+        )
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertEqual(
+            b''.join(message.get('body', b'') for message in sent[1:]),
+            b'text',
+        )
+
+    def test_too_large_body_is_rejected(self):
+        sent = run(
+            ASGIAdapter(failing, max_workers=1, max_body_size=4),
+            http_scope('/', method='POST'),
+            [
+                {'type': 'http.request', 'body': b'te', 'more_body': True},
+                {'type': 'http.request', 'body': b'xt', 'more_body': True},
+                {'type': 'http.request', 'body': b'!', 'more_body': True},
+            ],
+        )
+        self.assertEqual(sent[0]['status'], 413)
+        self.assertEqual(len(sent), 2)
+
+    def test_failure_is_internal_server_error(self):
+        sent = []
+        with self.assertRaises(RuntimeError):
+            run(
+                ASGIAdapter(failing, max_workers=1),
+                http_scope('/'),
+                [{'type': 'http.request'}],
+                sent,
+            )
+        self.assertEqual(sent[0]['status'], 500)
+
+    def test_lifespan(self):
+        sent = run(
+            ASGIAdapter(echo, max_workers=1),
+            {'type': 'lifespan'},
+            [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}],
+        )
+        self.assertEqual(
+            [message['type'] for message in sent],
+            ['lifespan.startup.complete', 'lifespan.shutdown.complete'],
+        )
+
+    def test_serves_django_pages(self):
+        sent = run(
+            ASGIAdapter(get_wsgi_application(), max_workers=2),
+            http_scope(reverse('about:author')),
+            [{'type': 'http.request'}],
+        )
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn(
+            b'<html',
+            b''.join(message.get('body', b'') for message in sent[1:]),
+        )
+
+    def test_files_are_sent_with_zero_copy_extension(self):
+        scope = http_scope('/')
+        scope['extensions'] = {'http.response.zerocopysend': {}}
+        sent = run(
+            ASGIAdapter(file, max_workers=1),
+            scope,
+            [{'type': 'http.request'}],
+        )
+        self.assertEqual(sent[1]['type'], 'http.response.zerocopysend')
+        self.assertEqual(sent[1]['file'].name, __file__)
+        self.assertTrue(sent[1]['file'].closed)
+
+        sent = run(
+            ASGIAdapter(file, max_workers=1),
+            http_scope('/'),
+            [{'type': 'http.request'}],
+        )
+        with open(__file__, 'rb') as source:
+            self.assertEqual(
+                b''.join(message.get('body', b'') for message in sent[1:]),
+                source.read(),
+            )
+        self.assertEqual(len(sent), 3)
+
+    def test_file_wrapper_reads_large_chunks(self):
+        with open(__file__, 'rb') as source:
+            wrapper = FileWrapper(source, 8)
+            self.assertEqual(wrapper.block_size, 64 * 1024)
@@ -0,0 +1,90 @@
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from ..cache.backends import SQLiteCache
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = SQLiteCache(
+            f'{self.directory}/cache.sqlite3',
+            {
+                'OPTIONS': {
+                    'CULL_EVERY': 1,
+                    'CULL_FREQUENCY': 2,
+                    'MAX_ENTRIES': 4,
+                },
+            }
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_stores_values(self):
+        values = {
+            'int': 1,
+            'bool': True,
+            'str': 'Text',
+            'dict': {'list': [1, 2]},
+        }
+        for key, value in values.items():
+            with self.subTest(key=key):
+                self.cache.set(key, value)
+                self.assertEqual(self.cache.get(key), value)
+                self.assertIs(type(self.cache.get(key)), type(value))
+
+        self.assertFalse(self.cache.add('str', 'Other text'))
+        self.assertTrue(self.cache.add('new', 'New text'))
+        self.assertEqual(self.cache.get('str'), 'Text')
+        self.cache.delete('str')
+        self.assertIsNone(self.cache.get('str'))
+
+    def test_entries_expire(self):
+        self.cache.set('key', 'value', timeout=10)
+        with mock.patch('time.time', return_value=time.time() + 11):
+            self.assertFalse(self.cache.has_key('key'))
+            self.assertIsNone(self.cache.get('key'))
+            self.assertTrue(self.cache.add('key', 'new value'))
+
+    def test_incr_is_atomic_for_integers(self):
+        self.cache.set('counter', 1)
+        self.assertEqual(self.cache.incr('counter', 2), 3)
+        self.assertEqual(self.cache.decr('counter'), 2)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_least_recently_used_entries_are_culled(self):
+        now = time.time()
+        for number in range(4):
+            with mock.patch('time.time', return_value=now + number * 10):
+                self.cache.set(f'key{number}', number)
+        with mock.patch('time.time', return_value=now + 40):
+            self.cache.get('key0')
+        with mock.patch('time.time', return_value=now + 50):
+            self.cache.set('key4', 4)
+
+        self.assertTrue(self.cache.has_key('key0'))
+        self.assertFalse(self.cache.has_key('key1'))
+        self.assertFalse(self.cache.has_key('key2'))
+        self.assertTrue(self.cache.has_key('key4'))
+
+    def test_entries_are_counted_once_in_cull_every_writes(self):
+        cache = SQLiteCache(
+            f'{self.directory}/sampled.sqlite3',
+            {'OPTIONS': {'CULL_EVERY': 5, 'MAX_ENTRIES': 2}}
+        )
+        for number in range(4):
+            cache.set(f'key{number}', number)
+        self.assertEqual(
+            len(cache.get_many([f'key{number}' for number in range(4)])), 4
+        )
+
+        cache.set('key4', 4)
+        self.assertEqual(
+            len(cache.get_many([f'key{number}' for number in range(5)])), 4
+        )
@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+from django.test.utils import override_settings
+
+from posts.models import Post
+
+from ..db import routers
+from ..middleware import ReplicaMiddleware
+
+router = routers.ReplicaRouter()
+
+
+def reading_view(request):
+    return HttpResponse(router.db_for_read(Post))
+
+
+def writing_view(request):
+    database = router.db_for_read(Post)
+    router.db_for_write(Post)
+    return HttpResponse(database)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        routers.reset(read_replica=True)
+
+    def tearDown(self):
+        super().tearDown()
+        routers.reset()
+
+    def serve(self, view, request):
+        response = ReplicaMiddleware(view)(request)
+        return response.content.decode(), response
+
+    def test_reads_go_to_replica_and_writes_to_primary(self):
+        self.assertEqual(router.db_for_read(Post), 'replica')
+        self.assertEqual(router.db_for_write(Post), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_reads_go_to_primary_without_replicas(self):
+        routers.reset(read_replica=True)
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_reads_out_of_requests_go_to_primary(self):
+        routers.reset()
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_primary_block_reads_from_primary(self):
+        with routers.primary():
+            self.assertEqual(router.db_for_read(Post), 'default')
+        self.assertEqual(router.db_for_read(Post), 'replica')
+
+    def test_migrations_are_not_applied_to_replicas(self):
+        self.assertIs(router.allow_migrate('replica', 'posts'), False)
+        self.assertIsNone(router.allow_migrate('default', 'posts'))
+
+    def test_safe_request_reads_from_replica(self):
+        database, response = self.serve(reading_view, self.factory.get('/'))
+        self.assertEqual(database, 'replica')
+        self.assertNotIn(settings.REPLICA_STICKY_COOKIE, response.cookies)
+        # Reads after the request go to the primary
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_unsafe_request_reads_from_primary(self):
+        database, _ = self.serve(reading_view, self.factory.post('/'))
+        self.assertEqual(database, 'default')
+
+    def test_writer_reads_from_primary_for_a_while(self):
+        database, response = self.serve(writing_view, self.factory.post('/'))
+        self.assertEqual(database, 'default')
+        cookie = response.cookies[settings.REPLICA_STICKY_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_STICKY_SECONDS)
+
+        request = self.factory.get('/')
+        request.COOKIES[settings.REPLICA_STICKY_COOKIE] = cookie.value
+        database, _ = self.serve(reading_view, request)
+        self.assertEqual(database, 'default')
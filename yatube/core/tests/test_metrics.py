@@ -0,0 +1,121 @@
+from contextlib import contextmanager
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from .. import metrics
+from ..db.queries import wrap_queries
+
+
+class HistogramTests(SimpleTestCase):
+    def test_renders_cumulative_buckets(self):
+        histogram = metrics.Histogram('test_seconds', 'Test.', (0.1, 1))
+        histogram.observe(0.05, view='posts:index')
+        histogram.observe(0.5, view='posts:index')
+        histogram.observe(2, view='posts:index')
+        self.assertEqual(histogram.render(), [
+            '# HELP test_seconds Test.',
+            '# TYPE test_seconds histogram',
+            'test_seconds_bucket{view="posts:index",le="0.1"} 1',
+            'test_seconds_bucket{view="posts:index",le="1"} 2',
+            'test_seconds_bucket{view="posts:index",le="+Inf"} 3',
+            'test_seconds_sum{view="posts:index"} 2.55',
+            'test_seconds_count{view="posts:index"} 3',
+        ])
+
+    def test_escapes_label_values(self):
+        counter = metrics.Counter('test', 'Test.')
+        counter.inc(view='a"b\\c')
+        self.assertIn('test_total{view="a\\"b\\\\c"} 1', counter.render())
+
+    def test_adds_only_to_sample_of_request(self):
+        metrics.add('cache_hits')
+        sample = metrics.start()
+        metrics.add('cache_hits')
+        with metrics.timer('template_seconds'):
+            pass
+        self.assertIs(metrics.finish(), sample)
+        metrics.add('cache_hits')
+        self.assertEqual(sample.cache_hits, 1)
+        self.assertGreater(sample.template_seconds, 0)
+
+    def test_queries_of_every_database_are_wrapped(self):
+        wrapped = []
+
+        class Connection:
+            def __init__(self, alias):
+                self.alias = alias
+
+            @contextmanager
+            def execute_wrapper(self, wrapper):
+                wrapped.append((self.alias, wrapper))
+                yield
+
+        connections = [Connection('default'), Connection('replica')]
+        with mock.patch('core.db.queries.connections') as patched:
+            patched.all.return_value = connections
+            with wrap_queries(print):
+                pass
+        self.assertEqual(wrapped, [('default', print), ('replica', print)])
+
+
+@override_settings(METRICS_TOKEN='secret')
+class MetricsMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='Author')
+        Post.objects.create(text='Test post', author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        metrics.clear()
+
+    def tearDown(self):
+        super().tearDown()
+        metrics.clear()
+        cache.clear()
+
+    @override_settings(METRICS_SAMPLE_RATE=1)
+    def test_sampled_request_is_recorded(self):
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret'
+        )
+        self.assertEqual(response['Content-Type'].split(';')[0], 'text/plain')
+        text = response.content.decode()
+        for line in (
+            'yatube_request_seconds_count{view="posts:index"} 2',
+            'yatube_db_queries_count{view="posts:index"} 2',
+            'yatube_template_seconds_count{view="posts:index"} 2',
+            'yatube_cache_misses_total{view="posts:index"}',
+            'yatube_cache_hits_total{view="posts:index"}',
+            'yatube_metrics_sample_rate 1',
+        ):
+            with self.subTest(line=line):
+                self.assertIn(line, text)
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_not_sampled_request_is_not_recorded(self):
+        self.client.get(reverse('posts:index'))
+        self.assertNotIn('view="posts:index"', metrics.render())
+
+    def test_metrics_are_hidden_without_token(self):
+        for headers in ({}, {'HTTP_AUTHORIZATION': 'Bearer other'}):
+            with self.subTest(headers=headers):
+                response = self.client.get(reverse('metrics'), **headers)
+                self.assertEqual(response.status_code, 404)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_metrics_are_off_by_default(self):
+        response = self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer '
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,87 @@
+import gzip
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+
+from ..staticfiles import purge_css
+
+CSS = (
+    '@charset "UTF-8";/*! License */:root{--color:#fff}'
+    '.used,.unused{color:red}.unused p{margin:0}'
+    '.used:not(.unused){padding:0}a[href="a.b"]{color:blue}'
+    '@media (min-width:576px){.unused{width:1px}.used>.used{width:2px}}'
+    '@keyframes spin{to{transform:rotate(360deg)}}'
+)
+
+
+class PurgeTests(SimpleTestCase):
+    def test_rules_of_unused_names_are_removed(self):
+        self.assertEqual(
+            purge_css(CSS, {'used'}),
+            '@charset "UTF-8";/*! License */:root{--color:#fff}'
+            '.used{color:red}.used:not(.unused){padding:0}'
+            'a[href="a.b"]{color:blue}'
+            '@media (min-width:576px){.used>.used{width:2px}}'
+            '@keyframes spin{to{transform:rotate(360deg)}}'
+        )
+
+
+class CollectStaticTests(SimpleTestCase):
+    def setUp(self):
+        self.static_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.settings = override_settings(STATIC_ROOT=self.static_root)
+        self.settings.enable()
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.static_root, ignore_errors=True)
+
+    def test_files_are_hashed_purged_compressed_and_served(self):
+        call_command('collectstatic', interactive=False, stdout=StringIO())
+
+        url = staticfiles_storage.url('css/bootstrap.min.css')
+        self.assertRegex(
+            url, r'^/static/css/bootstrap\.min\.[0-9a-f]{12}\.css$'
+        )
+        name = staticfiles_storage.stored_name('css/bootstrap.min.css')
+        with staticfiles_storage.open(name) as file:
+            css = file.read()
+        self.assertIn(b'.navbar', css)
+        self.assertNotIn(b'.carousel', css)
+        self.assertLess(
+            len(css),
+            os.path.getsize(
+                os.path.join(settings.BASE_DIR, 'static/css/bootstrap.min.css')
+            ),
+        )
+        with staticfiles_storage.open(name + '.gz') as file:
+            self.assertEqual(gzip.decompress(file.read()), css)
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)), css
+        )
+        response.close()
+
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get('/static/css/bootstrap.min.css')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertNotIn('immutable', response['Cache-Control'])
+        response.close()
+
+        response = self.client.get('/static/../manage.py')
+        self.assertEqual(response.status_code, 404)
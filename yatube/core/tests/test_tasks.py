@@ -0,0 +1,131 @@
+from io import StringIO
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from posts.models import Post, User
+from posts.search import search_posts
+
+from ..models import Task
+from ..tasks import run_pending, task
+
+CALLS = []
+
+
+@task(max_attempts=2)
+def record(value):
+    if value == 'fail':
+        raise ValueError(value)
+    CALLS.append(value)
+
+
+@override_settings(TASKS_MODE='worker')
+class TasksTests(TestCase):
+    def tearDown(self):
+        super().tearDown()
+        CALLS.clear()
+
+    def test_task_is_run_by_worker(self):
+        record.delay('done')
+        self.assertEqual(CALLS, [])
+
+        self.assertEqual(run_pending(), 1)
+
+        self.assertEqual(CALLS, ['done'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_failed_task_is_retried(self):
+        record.delay('fail')
+
+        with self.assertLogs('core.tasks', 'ERROR'):
+            run_pending()
+        retried = Task.objects.get()
+        self.assertEqual(retried.attempts, 1)
+        self.assertFalse(retried.failed)
+        self.assertIn('ValueError', retried.error)
+        self.assertGreater(retried.run_at, timezone.now())
+        self.assertEqual(run_pending(), 0)
+
+        Task.objects.update(run_at=timezone.now())
+        with self.assertLogs('core.tasks', 'ERROR'):
+            run_pending()
+        self.assertTrue(Task.objects.get().failed)
+
+    def test_unknown_task_fails(self):
+        Task.objects.create(name='core.tests.test_tasks.missing', args='[]')
+        with self.assertLogs('core.tasks', 'ERROR'):
+            run_pending()
+        self.assertTrue(Task.objects.get().failed)
+
+    @override_settings(TASKS_MODE='eager')
+    def test_eager_task_is_run_at_once(self):
+        record.delay('done')
+        self.assertEqual(CALLS, ['done'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_command_runs_tasks(self):
+        record.delay('done')
+        out = StringIO()
+        call_command('run_worker', once=True, stdout=out)
+        self.assertIn('Run 1 tasks', out.getvalue())
+        self.assertEqual(CALLS, ['done'])
+
+    @override_settings(
+        EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+        QUEUED_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    )
+    def test_emails_are_sent_by_tasks(self):
+        mail.send_mail('Subject', 'Body', 'from@yatube.ru', ['to@yatube.ru'])
+        self.assertEqual(mail.outbox, [])
+
+        run_pending()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Subject')
+        self.assertEqual(mail.outbox[0].to, ['to@yatube.ru'])
+
+    @override_settings(
+        EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+        QUEUED_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    )
+    def test_queued_emails_keep_content_type(self):
+        message = mail.EmailMessage(
+            'Subject', '<p>Body</p>', 'from@yatube.ru', ['to@yatube.ru']
+        )
+        message.content_subtype = 'html'
+        message.encoding = 'koi8-r'
+        message.send()
+
+        run_pending()
+
+        sent = mail.outbox[0].message()
+        self.assertEqual(sent.get_content_type(), 'text/html')
+        self.assertEqual(sent.get_content_charset(), 'koi8-r')
+
+    @override_settings(
+        EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+        QUEUED_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    )
+    def test_emails_of_other_classes_are_sent_at_once(self):
+        class Message(mail.EmailMessage):
+            pass
+
+        Message('Subject', 'Body', 'from@yatube.ru', ['to@yatube.ru']).send()
+
+        self.assertIsInstance(mail.outbox[0], Message)
+
+    def test_side_effects_of_posts_are_run_by_tasks(self):
+        post = Post.objects.create(
+            text='Отложенная индексация',
+            author=User.objects.create_user(username='Author'),
+        )
+        page, _ = search_posts('индексация', 10)
+        self.assertEqual(list(page), [])
+
+        run_pending()
+
+        page, _ = search_posts('индексация', 10)
+        self.assertEqual(list(page), [post])
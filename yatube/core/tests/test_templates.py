@@ -0,0 +1,52 @@
+from django.template import Context, Engine, engines
+from django.template.loader_tags import IncludeNode
+from django.test import SimpleTestCase
+
+from ..template.loaders import Loader, ResolvedInclude, warm_up
+
+TEMPLATES = {
+    'list.html': (
+        '{% for name in names %}'
+        '{% include "name.html" with name=name %}'
+        '{% include template_name %}'
+        '{% endfor %}'
+    ),
+    'name.html': '<b>{{ name }}</b>',
+    'missing.html': '{% if false %}{% include "nothing.html" %}{% endif %}',
+}
+
+
+class LoaderTests(SimpleTestCase):
+    def setUp(self):
+        self.engine = Engine(loaders=[
+            ('core.template.loaders.Loader', [
+                ('django.template.loaders.locmem.Loader', TEMPLATES),
+            ]),
+        ])
+
+    def test_constant_includes_are_resolved(self):
+        template = self.engine.get_template('list.html')
+
+        constant, variable = template.nodelist.get_nodes_by_type(IncludeNode)
+        self.assertIsInstance(constant.template, ResolvedInclude)
+        self.assertNotIsInstance(variable.template, ResolvedInclude)
+        self.assertEqual(
+            template.render(Context({
+                'names': ['a', 'b'],
+                'template_name': 'name.html',
+            })),
+            '<b>a</b><b>a</b><b>b</b><b>b</b>'
+        )
+
+    def test_missing_include_fails_on_render_only(self):
+        template = self.engine.get_template('missing.html')
+        self.assertEqual(template.render(Context()), '')
+
+
+class WarmUpTests(SimpleTestCase):
+    def test_templates_are_loaded(self):
+        self.assertGreater(warm_up(), 0)
+
+        loader, = engines.all()[0].engine.template_loaders
+        self.assertIsInstance(loader, Loader)
+        self.assertIn('posts/index.html', loader.get_template_cache)
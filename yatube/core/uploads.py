@@ -0,0 +1,112 @@
+"""Uploads checked while they arrive.
+
+`MaxSizeUploadHandler` counts bytes of each uploaded file and drops the
+ones exceeding `MAX_UPLOAD_SIZE` chunk by chunk, so a large upload is
+neither kept in memory nor written to disk. `ProbedImageField` reads only
+headers of images, their full decoding is left to background tasks, see
+`core.images.prepare_image`.
+"""
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from PIL import Image
+
+
+class OversizedUploadedFile(UploadedFile):
+    """A file dropped by `MaxSizeUploadHandler`, it has no content."""
+    def __init__(self, name, content_type, size, charset=None):
+        super().__init__(None, name, content_type, size, charset)
+
+    def open(self, mode=None):
+        raise ValueError('The file is dropped as it is too large.')
+
+
+class MaxSizeUploadHandler(FileUploadHandler):
+    """Drops chunks of files larger than `MAX_UPLOAD_SIZE`.
+
+    The handler goes first in `FILE_UPLOAD_HANDLERS`: while a file fits the
+    limit its chunks are passed to the next handlers, the chunks past the
+    limit are swallowed and the file is replaced by `OversizedUploadedFile`
+    rejected by forms.
+    """
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.size = 0
+        self.oversized = False
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > settings.MAX_UPLOAD_SIZE:
+            self.oversized = True
+            return None
+        return raw_data
+
+    def file_complete(self, file_size):
+        if not self.oversized:
+            return None
+        return OversizedUploadedFile(
+            self.file_name,
+            self.content_type,
+            file_size,
+            self.charset,
+        )
+
+
+class ProbedImageField(forms.ImageField):
+    """Image field checking the format and the size from the header.
+
+    Unlike `forms.ImageField` the image is not decoded, so broken images
+    pass and are removed by the background task generating their variants.
+    """
+    default_error_messages = {
+        **forms.ImageField.default_error_messages,
+        'too_large': 'Файл больше %(max_size)s.',
+        'too_many_pixels': 'Изображение больше %(max_pixels)s пикселей.',
+    }
+
+    def to_python(self, data):
+        f = forms.FileField.to_python(self, data)
+        if f is None:
+            return None
+
+        if (
+            isinstance(f, OversizedUploadedFile)
+            or f.size > settings.MAX_UPLOAD_SIZE
+        ):
+            raise ValidationError(
+                self.error_messages['too_large'],
+                code='too_large',
+                params={
+                    'max_size': filesizeformat(settings.MAX_UPLOAD_SIZE),
+                },
+            )
+
+        try:
+            # Only the header is read until the image is loaded
+            image = Image.open(f)
+        except Exception as error:
+            raise ValidationError(
+                self.error_messages['invalid_image'],
+                code='invalid_image',
+            ) from error
+        if image.format not in settings.UPLOAD_IMAGE_FORMATS:
+            raise ValidationError(
+                self.error_messages['invalid_image'],
+                code='invalid_image',
+            )
+        width, height = image.size
+        if width * height > settings.UPLOAD_IMAGE_MAX_PIXELS:
+            raise ValidationError(
+                self.error_messages['too_many_pixels'],
+                code='too_many_pixels',
+                params={'max_pixels': settings.UPLOAD_IMAGE_MAX_PIXELS},
+            )
+
+        f.image = image
+        f.content_type = Image.MIME.get(image.format)
+        if hasattr(f, 'seek') and callable(f.seek):
+            f.seek(0)
+        return f
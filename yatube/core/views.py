@@ -1,12 +1,118 @@
+import hmac
+import mimetypes
+import os
+import re
 from http import HTTPStatus
 
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified
+)
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from . import metrics as core_metrics
+
+
+# Names of collected static files containing hashes of their contents
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+# Year, the longest time browsers keep files for
+IMMUTABLE_SECONDS = 60 * 60 * 24 * 365
+# Encodings of files stored compressed beside, in the order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _serve_file(request, path, document_root, cache_seconds,
+                immutable=False):
+    """Returns the file at `path` of `document_root`.
+
+    Browsers keep the file for `cache_seconds`, for a year if it is
+    `immutable`. A compressed file stored beside is returned if the client
+    accepts it.
+    `FileResponse` is sent with `wsgi.file_wrapper`, so servers send files
+    with `sendfile` without copying them to the process.
+    """
+    try:
+        full_path = safe_join(document_root, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    stat = os.stat(full_path)
+    if not was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'),
+        stat.st_mtime,
+        stat.st_size,
+    ):
+        return HttpResponseNotModified()
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    accepted = {
+        value.split(';')[0].strip()
+        for value in request.META.get('HTTP_ACCEPT_ENCODING', '').split(',')
+    }
+    if encoding is None:
+        for name, extension in ENCODINGS:
+            if name in accepted and os.path.isfile(full_path + extension):
+                encoding, full_path = name, full_path + extension
+                break
+    response = FileResponse(
+        open(full_path, 'rb'),
+        content_type=content_type or 'application/octet-stream',
+    )
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if immutable:
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_SECONDS, immutable=True
+        )
+    else:
+        patch_cache_control(response, public=True, max_age=cache_seconds)
+    return response
+
+
+def serve_static(request, path):
+    """Serves collected static files, for sites without a front proxy."""
+    return _serve_file(
+        request,
+        path,
+        settings.STATIC_ROOT,
+        settings.STATIC_CACHE_SECONDS,
+        immutable=bool(HASHED_NAME.search(path)),
+    )
+
+
+def serve_media(request, path):
+    """Serves uploaded files, for sites without a front proxy."""
+    return _serve_file(
+        request, path, settings.MEDIA_ROOT, settings.MEDIA_CACHE_SECONDS
+    )
 
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
 
 
+def metrics(request):
+    # Behind a proxy every request comes from its address, so the client
+    # is checked by the token, the page is off without it
+    token = settings.METRICS_TOKEN
+    if not token or not hmac.compare_digest(
+        request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'
+    ):
+        raise Http404
+    return HttpResponse(
+        core_metrics.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
 def page_not_found(request, exception):
     return render(
         request,
@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from .counters import reconcile_posts
 from .models import Comment, Group, Post
 
 
@@ -16,6 +17,7 @@ class CommentAdmin(admin.ModelAdmin):
 
 
 class PostAdmin(admin.ModelAdmin):
+    actions = ('recount_comments',)
     empty_value_display = '-пусто-'
     list_display = (
         'pk',
@@ -23,11 +25,17 @@ class PostAdmin(admin.ModelAdmin):
         'pub_date',
         'author',
         'group',
+        'comments_count',
     )
     list_editable = ('group',)
     list_filter = ('pub_date',)
     search_fields = ('text',)
 
+    def recount_comments(self, request, queryset):
+        fixed = reconcile_posts(queryset)
+        self.message_user(request, f'Исправлено счётчиков: {fixed}')
+    recount_comments.short_description = 'Пересчитать комментарии'
+
 
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Group)
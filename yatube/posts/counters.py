@@ -0,0 +1,104 @@
+"""Denormalized counters of posts, comments and follows.
+
+The counters are changed with atomic `UPDATE ... SET n = n + 1` statements
+when objects are created or deleted, and can be reconciled with the actual
+number of objects if they drift, e.g. after a bulk import.
+"""
+from django.db.models import (
+    F, Func, IntegerField, OuterRef, Subquery, Value
+)
+from django.db.models.functions import Greatest
+
+from users.models import Profile
+
+from .models import Comment, Follow, Post
+
+
+def _changed(field, delta):
+    # A drifted counter must not fail a deletion, it is fixed later by the
+    # `reconcile_counters` command
+    if delta < 0:
+        return Greatest(F(field) + delta, Value(0))
+    return F(field) + delta
+
+
+def change_profile(user_id, delta, *fields):
+    Profile.objects.filter(user_id=user_id).update(
+        **{field: _changed(field, delta) for field in fields}
+    )
+
+
+def get_profile(user):
+    """Returns the profile of the `user`, creating a missing one.
+
+    Users saved without signals, e.g. by `bulk_create` or `loaddata`, have
+    no profile, it is created with counters of their objects.
+    """
+    try:
+        return user.profile
+    except Profile.DoesNotExist:
+        pass
+    profile, created = Profile.objects.get_or_create(user=user)
+    if created:
+        reconcile_profiles(Profile.objects.filter(id=profile.id))
+        profile.refresh_from_db()
+    user.profile = profile
+    return profile
+
+
+def change_post(post_id, delta):
+    Post.objects.filter(id=post_id).update(
+        comments_count=_changed('comments_count', delta)
+    )
+
+
+def _count(model, **lookups):
+    """Returns a subquery counting objects of `model` that match lookups."""
+    return Subquery(
+        model.objects.filter(**lookups).order_by().annotate(
+            count=Func(F('id'), function='COUNT')
+        ).values('count'),
+        output_field=IntegerField(),
+    )
+
+
+def reconcile_profiles(profiles=None):
+    """Fixes drifted counters of `profiles`, returns their number."""
+    if profiles is None:
+        profiles = Profile.objects.all()
+    drifted = profiles.annotate(
+        actual_followers=_count(Follow, author=OuterRef('user')),
+        actual_following=_count(Follow, user=OuterRef('user')),
+        actual_posts=_count(Post, author=OuterRef('user')),
+    ).exclude(
+        followers_count=F('actual_followers'),
+        following_count=F('actual_following'),
+        posts_count=F('actual_posts'),
+    )
+    fixed = 0
+    for profile in drifted.iterator():
+        Profile.objects.filter(id=profile.id).update(
+            followers_count=profile.actual_followers,
+            following_count=profile.actual_following,
+            posts_count=profile.actual_posts,
+        )
+        fixed += 1
+    return fixed
+
+
+def reconcile_posts(posts=None):
+    """Fixes drifted counters of `posts`, returns their number."""
+    if posts is None:
+        posts = Post.objects.all()
+    drifted = posts.annotate(
+        actual_comments=_count(Comment, post=OuterRef('id')),
+    ).exclude(
+        comments_count=F('actual_comments'),
+    ).order_by()
+    fixed = 0
+    for post in drifted.iterator():
+        Post.objects.filter(id=post.id).update(
+            comments_count=post.actual_comments
+        )
+        fixed += 1
+    return fixed
@@ -0,0 +1,169 @@
+"""Materialized follow feed.
+
+A new post is pushed (fan-out-on-write) into the feed of every follower of
+its author, so reading the feed is a range read over `FeedEntry` rows of a
+single user. Posts of authors with more than `FEED_FANOUT_MAX_FOLLOWERS`
+followers are not pushed, they are pulled (fan-out-on-read) when the feed
+is read.
+
+Entries keep a copy of `pub_date` of their posts, so a page of the feed
+is a seek over the `(user, -pub_date, -post)` index of entries, see
+`FEED_KEY`.
+
+An author is switched to pulling by the `feed_pulled` flag of the profile
+when the followers cross the limit. When unfollows bring them back under
+it, the flag is cleared first and then the feeds of all followers are
+backfilled, so no post published while the author was pulled is lost.
+"""
+from django.conf import settings
+from django.db.models import F, Q
+
+from users.models import Profile
+
+from .models import FeedEntry, Follow, Post
+
+# Annotations of posts of the feed ordering them, the `field` and the
+# `pk_field` of `CursorPaginator`
+FEED_KEY = {'field': 'feed_pub_date', 'pk_field': 'feed_post'}
+
+
+def pulled_authors(user):
+    """Returns ids of followed authors whose posts are read on demand."""
+    return Follow.objects.filter(
+        user=user,
+        author__profile__feed_pulled=True,
+    ).values_list('author', flat=True)
+
+
+def _is_pulled(author_id):
+    return Profile.objects.filter(user_id=author_id, feed_pulled=True).exists()
+
+
+def start_pulling(author_id):
+    """Pulls posts of the author if followers exceed the limit."""
+    Profile.objects.filter(
+        user_id=author_id,
+        feed_pulled=False,
+        followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS,
+    ).update(feed_pulled=True)
+
+
+def stop_pulling(author_id):
+    """Pushes posts of the author again if followers fit the limit.
+
+    Returns whether the author was pulled, then the feeds of the followers
+    have to be backfilled by `backfill_followers`.
+    """
+    return bool(
+        Profile.objects.filter(
+            user_id=author_id,
+            feed_pulled=True,
+            followers_count__lte=settings.FEED_FANOUT_MAX_FOLLOWERS,
+        ).update(feed_pulled=False)
+    )
+
+
+def get_feed(user):
+    """Returns posts of the follow feed of the `user` ordered by `FEED_KEY`.
+
+    Posts pushed into the feed are read in the order of its entries. Posts
+    of pulled authors are not in entries, then the feed is sorted after the
+    lookup of both.
+    """
+    authors = list(pulled_authors(user))
+    if not authors:
+        posts = Post.objects.filter(feed_entries__user=user).annotate(
+            feed_pub_date=F('feed_entries__pub_date'),
+            feed_post=F('feed_entries__post'),
+        )
+    else:
+        entries = FeedEntry.objects.filter(user=user).values('post')
+        posts = Post.objects.filter(
+            Q(id__in=entries) | Q(author__in=authors)
+        ).annotate(feed_pub_date=F('pub_date'), feed_post=F('id'))
+    return posts.order_by('-feed_pub_date', '-feed_post')
+
+
+def fan_out_post(post):
+    """Pushes the `post` into the feeds of followers of its author."""
+    if _is_pulled(post.author_id):
+        return
+    followers = Follow.objects.filter(author_id=post.author_id)
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(post_id=post.id, user_id=user_id, pub_date=post.pub_date)
+            for user_id in followers.values_list('user_id', flat=True)
+        ),
+        batch_size=settings.FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def _latest_posts(author_id):
+    return list(
+        Post.objects.filter(
+            author_id=author_id
+        ).values_list('id', 'pub_date')[:settings.FEED_BACKFILL_POSTS]
+    )
+
+
+def add_follow(follow):
+    """Backfills the feed of a new follower with latest posts of author."""
+    if _is_pulled(follow.author_id):
+        return
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                post_id=post_id, user_id=follow.user_id, pub_date=pub_date
+            )
+            for post_id, pub_date in _latest_posts(follow.author_id)
+        ),
+        batch_size=settings.FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill_followers(author_id):
+    """Backfills feeds of all followers with latest posts of the author."""
+    if _is_pulled(author_id):
+        return
+    posts = _latest_posts(author_id)
+    followers = Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True)
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(post_id=post_id, user_id=user_id, pub_date=pub_date)
+            for user_id in followers.iterator()
+            for post_id, pub_date in posts
+        ),
+        batch_size=settings.FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def update_pulled_authors():
+    """Switches authors whose followers crossed the limit.
+
+    Counters changed by bulk writes do not send signals, this is run after
+    they are reconciled.
+    """
+    Profile.objects.filter(
+        feed_pulled=False,
+        followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS,
+    ).update(feed_pulled=True)
+    pushed = Profile.objects.filter(
+        feed_pulled=True,
+        followers_count__lte=settings.FEED_FANOUT_MAX_FOLLOWERS,
+    ).values_list('user_id', flat=True)
+    for author_id in list(pushed):
+        if stop_pulling(author_id):
+            backfill_followers(author_id)
+
+
+def remove_follow(follow):
+    """Removes posts of the unfollowed author from the follower feed."""
+    FeedEntry.objects.filter(
+        post__author_id=follow.author_id,
+        user_id=follow.user_id,
+    ).delete()
@@ -1,5 +1,7 @@
 from django import forms
 
+from core.uploads import ProbedImageField
+
 from .models import Comment, Post
 
 
@@ -13,3 +15,5 @@ class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
+        # Images are decoded by the task generating their variants
+        field_classes = {'image': ProbedImageField}
@@ -0,0 +1,89 @@
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.transfer import (
+    FIELDS, FORMATS, batched, export_rows, write_records
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Exports groups, posts, comments and follows to files of the '
+        'directory, one file per model, and images of posts to its media/ '
+        'subdirectory.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory')
+        parser.add_argument('--format', choices=FORMATS, default='ndjson')
+        parser.add_argument(
+            '--models',
+            choices=list(FIELDS),
+            default=list(FIELDS),
+            nargs='+',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            default=2000,
+            type=int,
+            help='Number of rows read from the database at once.',
+        )
+        parser.add_argument(
+            '--no-images',
+            action='store_true',
+            help='Do not copy images of posts.',
+        )
+        parser.add_argument(
+            '--workers',
+            default=4,
+            type=int,
+            help='Number of threads copying images.',
+        )
+
+    def copy_images(self, media_root, workers):
+        def copy(name):
+            source = default_storage.path(name)
+            if not os.path.isfile(source):
+                return False
+            target = os.path.join(media_root, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(source, target)
+            return True
+
+        names = Post.objects.exclude(image='').order_by('id').values_list(
+            'image', flat=True
+        ).iterator()
+        copied = missing = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # `map` submits all names at once, so they are fed in chunks
+            for chunk in batched(names, workers * 16):
+                for result in executor.map(copy, chunk):
+                    copied += result
+                    missing += not result
+        return copied, missing
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        os.makedirs(directory, exist_ok=True)
+        for name in options['models']:
+            path = os.path.join(directory, f'{name}.{options["format"]}')
+            with open(path, 'w', encoding='utf-8', newline='') as file:
+                written = write_records(
+                    export_rows(name, options['chunk_size']),
+                    file,
+                    options['format'],
+                )
+            self.stdout.write(f'Exported {written} {name}.')
+        if 'posts' in options['models'] and not options['no_images']:
+            copied, missing = self.copy_images(
+                os.path.join(directory, 'media'), options['workers']
+            )
+            self.stdout.write(
+                f'Copied {copied} images, {missing} images are missing.'
+            )
+        self.stdout.write(self.style.SUCCESS('Export is finished.'))
@@ -0,0 +1,88 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+from contextlib import ExitStack
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.images import InvalidImage, process_image
+from posts.models import Post
+from posts.thumbnails import remove_image, store_variants, variants_args
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates thumbnails and responsive variants of images of posts '
+        'stored in MEDIA_ROOT/posts/. Images are checked and stripped of '
+        'metadata as uploads are, broken ones are removed from posts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Regenerate variants of posts that already have them.',
+        )
+        parser.add_argument(
+            '--workers',
+            default=settings.POST_THUMBNAIL_WORKERS,
+            type=int,
+            help='Number of processes, 0 generates variants in the command.',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='')
+        if not options['all']:
+            posts = posts.filter(image_variants='')
+        posts = posts.order_by('id').values_list('id', 'image').iterator()
+
+        generated = removed = failed = 0
+        workers = options['workers']
+        # Posts are processed in chunks to keep memory constant
+        chunk_size = max(workers, 1) * 4
+        with ExitStack() as stack:
+            executor = stack.enter_context(
+                ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+            ) if workers else None
+            while True:
+                chunk = list(islice(posts, chunk_size))
+                if not chunk:
+                    break
+                if executor:
+                    futures = [
+                        executor.submit(
+                            process_image,
+                            *variants_args(image_name)
+                        )
+                        for _, image_name in chunk
+                    ]
+                    wait(futures)
+                for index, (post_id, image_name) in enumerate(chunk):
+                    try:
+                        if executor:
+                            variants = futures[index].result()
+                        else:
+                            variants = process_image(
+                                *variants_args(image_name)
+                            )
+                        store_variants(post_id, image_name, variants)
+                    except InvalidImage as error:
+                        remove_image(post_id, image_name)
+                        removed += 1
+                        self.stderr.write(f'Post {post_id}: {error}')
+                    except Exception as error:
+                        failed += 1
+                        self.stderr.write(f'Post {post_id}: {error}')
+                    else:
+                        generated += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Generated variants of {generated} posts, removed '
+                f'{removed} broken images, failed {failed}.'
+            )
+        )
@@ -0,0 +1,111 @@
+import os
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.transfer import (
+    FIELDS, FORMATS, Checkpoint, ConflictingIds, Importer, MissingUsers,
+    batched, read_records, rebuild_derived_data, reset_sequences
+)
+
+CHECKPOINT_NAME = '.import-checkpoint.json'
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports groups, posts, comments and follows from files written by '
+        'the `export_data` command. Counters, the search index and follow '
+        'feeds are rebuilt afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory')
+        parser.add_argument('--format', choices=FORMATS, default='ndjson')
+        parser.add_argument(
+            '--batch-size',
+            default=1000,
+            type=int,
+            help='Number of rows inserted at once.',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue an interrupted import from its checkpoint.',
+        )
+        parser.add_argument(
+            '--media',
+            help='Directory with images of posts, DIRECTORY/media by '
+                 'default.',
+        )
+        parser.add_argument(
+            '--workers',
+            default=4,
+            type=int,
+            help='Number of threads copying images.',
+        )
+        parser.add_argument(
+            '--create-users',
+            action='store_true',
+            help='Create missing authors and followers with unusable '
+                 'passwords.',
+        )
+        parser.add_argument(
+            '--skip-rebuild',
+            action='store_true',
+            help='Do not rebuild counters, the search index and feeds, e.g. '
+                 'if more imports follow.',
+        )
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        checkpoint = Checkpoint(os.path.join(directory, CHECKPOINT_NAME))
+        if options['resume']:
+            checkpoint.load()
+        else:
+            checkpoint.remove()
+        importer = Importer(
+            media_root=options['media'] or os.path.join(directory, 'media'),
+            workers=options['workers'],
+            create_users=options['create_users'],
+        )
+        try:
+            for name in FIELDS:
+                path = os.path.join(directory, f'{name}.{options["format"]}')
+                if not os.path.exists(path):
+                    continue
+                done = checkpoint.done.get(name, 0)
+                with open(path, encoding='utf-8', newline='') as file:
+                    records = islice(
+                        read_records(file, options['format']), done, None
+                    )
+                    for batch in batched(records, options['batch_size']):
+                        importer.import_batch(name, batch)
+                        done += len(batch)
+                        checkpoint.save(name, done)
+                self.stdout.write(f'Imported {done} {name}.')
+        except ConflictingIds as error:
+            raise CommandError(
+                f'Ids of {error} are taken by other objects. Import into '
+                'a database without them.'
+            )
+        except MissingUsers as error:
+            raise CommandError(
+                f'Users are missing: {error}. Create them or use '
+                '--create-users, then run the command with --resume.'
+            )
+        finally:
+            importer.close()
+        reset_sequences()
+        if importer.missing_images:
+            self.stderr.write(
+                f'{importer.missing_images} images are missing.'
+            )
+
+        if not options['skip_rebuild']:
+            rebuild_derived_data()
+            self.stdout.write(
+                'Counters, the search index and feeds are rebuilt. Run '
+                '`generate_image_variants` to make thumbnails of images.'
+            )
+        checkpoint.remove()
+        self.stdout.write(self.style.SUCCESS('Import is finished.'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import reconcile_posts, reconcile_profiles
+from posts.feed import update_pulled_authors
+
+
+class Command(BaseCommand):
+    help = (
+        'Fixes counters of posts, comments and follows that drifted from '
+        'the actual number of objects.'
+    )
+
+    def handle(self, *args, **options):
+        profiles = reconcile_profiles()
+        posts = reconcile_posts()
+        update_pulled_authors()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Fixed counters of {profiles} profiles and {posts} posts.'
+            )
+        )
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.28 on 2026-10-18 02:33
+
+from django.db import migrations, models
+
+
+def count_comments(apps, schema_editor):
+    Comment = apps.get_model('posts', 'Comment')
+    Post = apps.get_model('posts', 'Post')
+    comments = Comment.objects.values_list('post').annotate(
+        count=models.Count('id')
+    ).order_by()
+    for post_id, count in comments:
+        Post.objects.filter(id=post_id).update(comments_count=count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_feedentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число комментариев'),
+        ),
+        migrations.RunPython(count_comments, migrations.RunPython.noop),
+    ]
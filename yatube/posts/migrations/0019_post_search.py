@@ -0,0 +1,47 @@
+from django.db import migrations
+
+from ._search_0019 import TABLE, normalize
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        Post = apps.get_model('posts', 'Post')
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE {TABLE} USING fts5('
+            "text, tokenize='unicode61 remove_diacritics 2')"
+        )
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {TABLE} (rowid, text) VALUES (%s, %s)',
+                [
+                    (post_id, normalize(text))
+                    for post_id, text in Post.objects.values_list(
+                        'id', 'text'
+                    ).iterator()
+                ]
+            )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX posts_post_text_search ON posts_post USING GIN '
+            "(to_tsvector('russian'::regconfig, COALESCE(text, '')))"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE {TABLE}')
+    elif vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX posts_post_text_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
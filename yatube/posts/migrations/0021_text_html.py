@@ -0,0 +1,42 @@
+# Generated by Django 2.2.28 on 2026-10-18 02:54
+
+import core.fields
+from django.db import migrations
+
+from ._text_html_0021 import text_html
+
+BATCH_SIZE = 500
+
+
+def render_texts(apps, schema_editor):
+    for model_name in ('Comment', 'Post'):
+        model = apps.get_model('posts', model_name)
+        batch = []
+        for obj in model.objects.only('id', 'text').iterator():
+            obj.text_html = text_html(obj.text)
+            batch.append(obj)
+            if len(batch) == BATCH_SIZE:
+                model.objects.bulk_update(batch, ['text_html'])
+                batch = []
+        model.objects.bulk_update(batch, ['text_html'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_post_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='text_html',
+            field=core.fields.RenderedTextField(blank=True, editable=False, verbose_name='HTML текста комментария'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=core.fields.RenderedTextField(blank=True, editable=False, verbose_name='HTML текста поста'),
+        ),
+        migrations.RunPython(render_texts, migrations.RunPython.noop),
+    ]
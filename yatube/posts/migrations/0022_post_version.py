@@ -0,0 +1,19 @@
+# Generated by Django 2.2.28 on 2026-10-18 02:56
+
+import core.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_text_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='version',
+            field=core.fields.VersionField(default=0, editable=False, verbose_name='Версия'),
+        ),
+    ]
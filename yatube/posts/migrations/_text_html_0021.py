@@ -0,0 +1,22 @@
+"""Rendering of texts frozen for `0021_text_html`.
+
+A copy of `core.fields` as of the migration, so changes of the rendering
+do not change what the migration does. The module is not a migration, as
+its name starts with `_`.
+"""
+import zlib
+
+from django.template.defaultfilters import linebreaksbr
+
+
+def render_text(text):
+    return linebreaksbr(text, autoescape=True)
+
+
+def text_version(text):
+    return format(zlib.crc32(text.encode()), 'x')
+
+
+def text_html(text):
+    """Returns the value of `RenderedTextField` of the `text`."""
+    return f'{text_version(text)}:{render_text(text)}'
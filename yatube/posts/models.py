@@ -1,8 +1,12 @@
+import json
 import os
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils.functional import cached_property
+
+from core.fields import RenderedTextField, VersionField, rendered
 
 User = get_user_model()
 
@@ -20,6 +24,8 @@ class Comment(models.Model):
     )
     post = models.ForeignKey(
         'Post',
+        # Covered by the `comment_post_created_idx` index
+        db_index=False,
         on_delete=models.CASCADE,
         related_name='comments',
         verbose_name='Комментарий'
@@ -28,12 +34,57 @@ class Comment(models.Model):
         help_text='Текст нового комментария',
         verbose_name='Текст комментария',
     )
+    text_html = RenderedTextField(verbose_name='HTML текста комментария')
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=['post', 'created'],
+                name='comment_post_created_idx'
+            ),
+        ]
         ordering = ['created']
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
+    @property
+    def text_as_html(self):
+        return rendered(self.text_html, self.text)
+
+
+class FeedEntry(models.Model):
+    """A post delivered to the follow feed of a user."""
+    post = models.ForeignKey(
+        'Post',
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Пост'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Подписчик'
+    )
+    # A copy of `Post.pub_date`, so the feed is read in the index order
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='uniq_user_post'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='feed_user_pub_date_idx'
+            ),
+        ]
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+
 
 class Group(models.Model):
     description = models.TextField()
@@ -57,6 +108,8 @@ class Follow(models.Model):
     )
     user = models.ForeignKey(
         User,
+        # Covered by the `follow_user_author_idx` index
+        db_index=False,
         on_delete=models.CASCADE,
         related_name='follower',
         verbose_name='Подписчик'
@@ -73,6 +126,12 @@ class Follow(models.Model):
                     name='forbid_self_follow'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['user', 'author'],
+                name='follow_user_author_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.user} follows {self.author}'
@@ -81,13 +140,22 @@ class Follow(models.Model):
 class Post(models.Model):
     author = models.ForeignKey(
         User,
+        # Covered by the `post_author_pub_date_idx` index
+        db_index=False,
         on_delete=models.CASCADE,
         related_name='posts',
         verbose_name='Автор'
     )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число комментариев',
+    )
     group = models.ForeignKey(
         Group,
         blank=True,
+        # Covered by the `post_group_pub_date_idx` index
+        db_index=False,
         help_text='Группа, к которой будет относиться пост',
         null=True,
         on_delete=models.SET_NULL,
@@ -99,6 +167,11 @@ class Post(models.Model):
         upload_to=os.path.join('posts', ''),
         verbose_name='Картинка',
     )
+    image_variants = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Варианты картинки',
+    )
     pub_date = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Дата публикации',
@@ -107,11 +180,65 @@ class Post(models.Model):
         help_text='Текст нового поста',
         verbose_name='Текст поста',
     )
+    text_html = RenderedTextField(verbose_name='HTML текста поста')
+    thumbnail = models.ImageField(
+        blank=True,
+        editable=False,
+        upload_to=os.path.join('posts', 'thumbnails', ''),
+        verbose_name='Миниатюра',
+    )
+    thumbnail_height = models.PositiveSmallIntegerField(
+        editable=False,
+        null=True,
+        verbose_name='Высота миниатюры',
+    )
+    thumbnail_width = models.PositiveSmallIntegerField(
+        editable=False,
+        null=True,
+        verbose_name='Ширина миниатюры',
+    )
+    version = VersionField(verbose_name='Версия')
 
     class Meta:
-        ordering = ['-pub_date']
+        # Every list of posts is read in the order of `ordering`
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx'
+            ),
+        ]
+        ordering = ['-pub_date', '-id']
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
     def __str__(self):
         return self.text[:settings.LEN_POST_STR]
+
+    @property
+    def text_as_html(self):
+        return rendered(self.text_html, self.text)
+
+    @cached_property
+    def image_sources(self):
+        """Returns MIME types and `srcset` of variants of the image."""
+        if not self.image_variants:
+            return []
+        storage = self.thumbnail.storage
+        return [
+            {
+                'srcset': ', '.join(
+                    f'{storage.url(name)} {width}w'
+                    for name, width in variants
+                ),
+                'type': mime_type,
+            }
+            for mime_type, variants in json.loads(self.image_variants).items()
+        ]
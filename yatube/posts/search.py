@@ -0,0 +1,236 @@
+"""Full-text search over posts.
+
+On SQLite posts are indexed in the FTS5 table `posts_post_search` with
+words reduced to their stems, so the index is kept in sync by signals of
+posts. On PostgreSQL the GIN index over `to_tsvector('russian', text)` is
+kept in sync by the database itself. Other databases fall back to the
+`icontains` scan.
+
+Results are ordered by rank and paginated with the `(rank, id)` cursor.
+"""
+import re
+from typing import List, Optional, Tuple
+
+from django.db import connection
+from django.db.models import Q
+
+from core.paginator import CursorPage
+
+from .models import Post
+
+TABLE = 'posts_post_search'
+
+WORD = re.compile(r'\w+')
+
+# The Porter stemmer for Russian words
+RV = re.compile(r'^(.*?[аеиоуыэюя])(.*)$')
+PERFECTIVE_GERUND = re.compile(
+    r'((ив|ивши|ившись|ыв|ывши|ывшись)|((?<=[ая])(в|вши|вшись)))$'
+)
+REFLEXIVE = re.compile(r'(с[яь])$')
+ADJECTIVE = re.compile(
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых|'
+    r'ую|юю|ая|яя|ою|ею)$'
+)
+PARTICIPLE = re.compile(r'((ивш|ывш|ующ)|((?<=[ая])(ем|нн|вш|ющ|щ)))$')
+VERB = re.compile(
+    r'((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|ено|'
+    r'ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю)|((?<=[ая])(ла|на|ете|йте|ли|й|'
+    r'л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)))$'
+)
+NOUN = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем|ам|'
+    r'ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$'
+)
+DERIVATIONAL = re.compile(r'.*[^аеиоуыэюя]+[аеиоуыэюя].*ость?$')
+DERIVATIONAL_SUFFIX = re.compile(r'ость?$')
+SUPERLATIVE = re.compile(r'(ейше|ейш)$')
+
+
+def stem(word: str) -> str:
+    """Returns the stem of a lowercase Russian word, other words as is."""
+    word = word.replace('ё', 'е')
+    match = RV.match(word)
+    if match is None:
+        return word
+    prefix, rv = match.groups()
+
+    stripped = PERFECTIVE_GERUND.sub('', rv, 1)
+    if stripped == rv:
+        rv = REFLEXIVE.sub('', rv, 1)
+        stripped = ADJECTIVE.sub('', rv, 1)
+        if stripped != rv:
+            rv = PARTICIPLE.sub('', stripped, 1)
+        else:
+            stripped = VERB.sub('', rv, 1)
+            rv = NOUN.sub('', rv, 1) if stripped == rv else stripped
+    else:
+        rv = stripped
+
+    rv = re.sub(r'и$', '', rv, 1)
+    if DERIVATIONAL.match(rv):
+        rv = DERIVATIONAL_SUFFIX.sub('', rv, 1)
+    stripped = re.sub(r'ь$', '', rv, 1)
+    if stripped == rv:
+        rv = SUPERLATIVE.sub('', rv, 1)
+        rv = re.sub(r'нн$', 'н', rv, 1)
+    else:
+        rv = stripped
+    return prefix + rv
+
+
+def normalize(text: str) -> str:
+    """Returns stems of words of the `text` separated by spaces."""
+    return ' '.join(stem(word) for word in WORD.findall(text.lower()))
+
+
+def encode_cursor(rank: float, pk: int) -> str:
+    return f'{rank!r}_{pk}'
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[float, int]]:
+    try:
+        rank, pk = cursor.split('_')
+        return float(rank), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+class SQLiteBackend:
+    def index(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT OR REPLACE INTO {TABLE} (rowid, text) '
+                'VALUES (%s, %s)',
+                [post.id, normalize(post.text)]
+            )
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post_id])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE}')
+            cursor.executemany(
+                f'INSERT INTO {TABLE} (rowid, text) VALUES (%s, %s)',
+                (
+                    (post_id, normalize(text))
+                    for post_id, text in Post.objects.values_list(
+                        'id', 'text'
+                    ).iterator()
+                )
+            )
+
+    def search(self, query, limit, after=None):
+        # Every word matches as a prefix, it makes up for a rough stemmer
+        match = ' '.join(f'"{word}"*' for word in normalize(query).split())
+        if not match:
+            return []
+        sql = (
+            'SELECT rowid, score FROM ('
+            f'SELECT rowid, -bm25({TABLE}) AS score '
+            f'FROM {TABLE} WHERE {TABLE} MATCH %s)'
+        )
+        params = [match]
+        if after is not None:
+            sql += ' WHERE score < %s OR (score = %s AND rowid < %s)'
+            params += [after[0], after[0], after[1]]
+        sql += ' ORDER BY score DESC, rowid DESC LIMIT %s'
+        params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+
+class PostgreSQLBackend:
+    def index(self, post):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, query, limit, after=None):
+        from django.contrib.postgres.search import (
+            SearchQuery, SearchRank, SearchVector
+        )
+
+        vector = SearchVector('text', config='russian')
+        search_query = SearchQuery(query, config='russian')
+        posts = Post.objects.annotate(
+            rank=SearchRank(vector, search_query),
+            vector=vector,
+        ).filter(vector=search_query)
+        if after is not None:
+            posts = posts.filter(
+                Q(rank__lt=after[0]) | Q(rank=after[0], id__lt=after[1])
+            )
+        return list(
+            posts.order_by('-rank', '-id').values_list('id', 'rank')[:limit]
+        )
+
+
+class ScanBackend:
+    def index(self, post):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, query, limit, after=None):
+        words = WORD.findall(query)
+        if not words:
+            return []
+        posts = Post.objects.all()
+        for word in words:
+            posts = posts.filter(text__icontains=word)
+        if after is not None:
+            posts = posts.filter(id__lt=after[1])
+        return [
+            (post_id, 0.0)
+            for post_id in posts.order_by('-id').values_list(
+                'id', flat=True
+            )[:limit]
+        ]
+
+
+def get_backend():
+    if connection.vendor == 'sqlite':
+        return SQLiteBackend()
+    if connection.vendor == 'postgresql':
+        return PostgreSQLBackend()
+    return ScanBackend()
+
+
+def search_posts(
+    query: str,
+    per_page: int,
+    after: Optional[str] = None
+) -> Tuple[CursorPage, Optional[str]]:
+    """Returns the page of posts found by the `query` and the next cursor.
+
+    The invalid `after` cursor leads to the first page.
+    """
+    after = decode_cursor(after) if after else None
+    found: List[Tuple[int, float]] = get_backend().search(
+        query, per_page + 1, after
+    )
+    ids = [post_id for post_id, _ in found[:per_page]]
+    posts = Post.objects.select_related('author', 'group').in_bulk(ids)
+    page = CursorPage(
+        [posts[post_id] for post_id in ids if post_id in posts],
+        paginator=None,
+        has_next=len(found) > per_page,
+        has_previous=after is not None,
+    )
+    next_cursor = None
+    if page.has_next():
+        post_id, rank = found[per_page - 1]
+        next_cursor = encode_cursor(rank, post_id)
+    return page, next_cursor
@@ -0,0 +1,113 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.cache.generations import bump_generation
+from core.tasks import after_commit
+
+from . import counters, feed, tasks
+from .models import Comment, Follow, Group, Post, User
+from .thumbnails import delete_files, variant_files
+
+
+@receiver(post_save, sender=Post)
+def process_saved_post(sender, instance, created, **kwargs):
+    tasks.post_changed.delay(instance.id, created)
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.change_post(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.change_post(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_new_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.change_profile(instance.author_id, 1, 'followers_count')
+        counters.change_profile(instance.user_id, 1, 'following_count')
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    counters.change_profile(instance.author_id, -1, 'followers_count')
+    counters.change_profile(instance.user_id, -1, 'following_count')
+
+
+@receiver(pre_save, sender=Post)
+def remember_author(sender, instance, raw, **kwargs):
+    # The author can be changed in the admin
+    if instance.pk and not raw:
+        instance.saved_author_id = Post.objects.filter(
+            id=instance.pk
+        ).values_list('author_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def count_new_post(sender, instance, created, **kwargs):
+    saved_author_id = getattr(instance, 'saved_author_id', None)
+    if created:
+        counters.change_profile(instance.author_id, 1, 'posts_count')
+    elif saved_author_id and saved_author_id != instance.author_id:
+        counters.change_profile(saved_author_id, -1, 'posts_count')
+        counters.change_profile(instance.author_id, 1, 'posts_count')
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.change_profile(instance.author_id, -1, 'posts_count')
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    tasks.post_changed.delay(instance.id)
+
+
+@receiver(post_delete, sender=Post)
+def delete_variants(sender, instance, **kwargs):
+    after_commit(
+        delete_files,
+        variant_files(instance.image_variants, instance.thumbnail.name),
+    )
+
+
+@receiver(post_save, sender=Follow)
+def backfill_feed(sender, instance, created, **kwargs):
+    if created:
+        # After the counters, the author may have crossed the limit
+        feed.start_pulling(instance.author_id)
+        tasks.backfill_feed.delay(instance.id)
+
+
+@receiver(post_delete, sender=Follow)
+def clean_feed(sender, instance, **kwargs):
+    feed.remove_follow(instance)
+    if feed.stop_pulling(instance.author_id):
+        tasks.backfill_followers.delay(instance.author_id)
+
+
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Follow)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Follow)
+@receiver(post_save, sender=Post)
+def invalidate_cached_pages(sender, **kwargs):
+    # After the commit, so the pages are not cached again with old data
+    after_commit(bump_generation, 'posts')
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Group)
+@receiver(post_save, sender=User)
+def invalidate_pages_of_names(sender, update_fields=None, **kwargs):
+    # Pages show names of users and groups, logins update `last_login` only
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    after_commit(bump_generation, 'posts')
+    # Validators of pages are computed from rows of posts without names
+    after_commit(bump_generation, 'names')
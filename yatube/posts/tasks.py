@@ -0,0 +1,36 @@
+"""Side effects of writes of posts and follows run as background tasks.
+
+Tasks get ids and read the objects when they run, so a task of an object
+deleted meanwhile does nothing or undoes its effect.
+"""
+from core.tasks import task
+
+from . import feed, search
+from .models import Follow, Post
+
+
+@task()
+def post_changed(post_id, created=False):
+    """Indexes the post for search and pushes a new post into feeds.
+
+    A deleted post is removed from the index.
+    """
+    post = Post.objects.filter(id=post_id).only('id', 'author', 'text').first()
+    if post is None:
+        search.get_backend().remove(post_id)
+        return
+    search.get_backend().index(post)
+    if created:
+        feed.fan_out_post(post)
+
+
+@task()
+def backfill_feed(follow_id):
+    follow = Follow.objects.filter(id=follow_id).first()
+    if follow is not None:
+        feed.add_follow(follow)
+
+
+@task()
+def backfill_followers(author_id):
+    feed.backfill_followers(author_id)
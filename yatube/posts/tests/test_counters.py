@@ -0,0 +1,97 @@
+from http import HTTPStatus
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from users.models import Profile
+
+from ..models import Comment, Follow, Post, User
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+
+    def tearDown(self):
+        super().tearDown()
+        cache.clear()
+
+    def get_profile(self, user):
+        return Profile.objects.get(user=user)
+
+    def test_counters_follow_creation_and_deletion(self):
+        post = Post.objects.create(text='Test post', author=self.author)
+        comment = Comment.objects.create(
+            text='Test comment',
+            author=self.reader,
+            post=post,
+        )
+        follow = Follow.objects.create(author=self.author, user=self.reader)
+
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(self.get_profile(self.author).posts_count, 1)
+        self.assertEqual(self.get_profile(self.author).followers_count, 1)
+        self.assertEqual(self.get_profile(self.reader).following_count, 1)
+
+        comment.delete()
+        follow.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        self.assertEqual(self.get_profile(self.author).followers_count, 0)
+        self.assertEqual(self.get_profile(self.reader).following_count, 0)
+
+        post.delete()
+        self.assertEqual(self.get_profile(self.author).posts_count, 0)
+
+    def test_command_reconciles_drifted_counters(self):
+        post = Post.objects.create(text='Test post', author=self.author)
+        Comment.objects.create(
+            text='Test comment',
+            author=self.reader,
+            post=post,
+        )
+        Post.objects.filter(id=post.id).update(comments_count=5)
+        Profile.objects.filter(user=self.author).update(
+            posts_count=0,
+            followers_count=3,
+        )
+
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+
+        self.assertIn('1 profiles and 1 posts', out.getvalue())
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        profile = self.get_profile(self.author)
+        self.assertEqual(profile.posts_count, 1)
+        self.assertEqual(profile.followers_count, 0)
+
+    def test_post_count_moves_with_author(self):
+        post = Post.objects.create(text='Test post', author=self.author)
+        post.author = self.reader
+        post.save()
+
+        self.assertEqual(self.get_profile(self.author).posts_count, 0)
+        self.assertEqual(self.get_profile(self.reader).posts_count, 1)
+
+    def test_missing_profile_is_created_on_pages(self):
+        post = Post.objects.create(text='Test post', author=self.author)
+        Profile.objects.filter(user=self.author).delete()
+
+        pages = [
+            reverse('posts:profile', kwargs={'username': 'Author'}),
+            reverse('posts:post_detail', kwargs={'post_id': post.id}),
+        ]
+        for page in pages:
+            with self.subTest(page=page):
+                response = Client().get(page)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(self.get_profile(self.author).posts_count, 1)
@@ -0,0 +1,164 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.paginator import encode_cursor
+
+from ..models import FeedEntry, Follow, Post, User
+
+
+class FollowFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.old_post = Post.objects.create(
+            text='Old post',
+            author=cls.author,
+        )
+
+        cls.authorized_client_reader = Client()
+        cls.authorized_client_reader.force_login(user=FollowFeedTests.reader)
+
+    def tearDown(self):
+        super().tearDown()
+        cache.clear()
+
+    def get_feed_post_ids(self):
+        response = FollowFeedTests.authorized_client_reader.get(
+            reverse('posts:follow_index')
+        )
+        return [post.id for post in response.context['page_obj']]
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        Follow.objects.create(
+            author=FollowFeedTests.author,
+            user=FollowFeedTests.reader,
+        )
+        new_post = Post.objects.create(
+            text='New post',
+            author=FollowFeedTests.author,
+        )
+        self.assertTrue(
+            FeedEntry.objects.filter(
+                post=new_post,
+                user=FollowFeedTests.reader,
+            ).exists()
+        )
+        self.assertEqual(
+            self.get_feed_post_ids(),
+            [new_post.id, FollowFeedTests.old_post.id]
+        )
+
+    def test_feed_is_paged_by_cursor_over_entries(self):
+        Follow.objects.create(
+            author=FollowFeedTests.author,
+            user=FollowFeedTests.reader,
+        )
+        posts = [
+            Post.objects.create(
+                text=f'New post {post_num}',
+                author=FollowFeedTests.author,
+            )
+            for post_num in range(settings.NUM_INDEX_POST)
+        ]
+        for post in posts:
+            with self.subTest(post=post.id):
+                self.assertEqual(
+                    FeedEntry.objects.get(post=post).pub_date, post.pub_date
+                )
+
+        response = FollowFeedTests.authorized_client_reader.get(
+            reverse('posts:follow_index')
+        )
+        page_obj = response.context['page_obj']
+        self.assertEqual(
+            [post.id for post in page_obj],
+            [post.id for post in reversed(posts)]
+        )
+        self.assertTrue(page_obj.has_next())
+        last = page_obj[-1]
+        response = FollowFeedTests.authorized_client_reader.get(
+            reverse('posts:follow_index')
+            + f'?after={encode_cursor(last.pub_date, last.id)}'
+        )
+        self.assertEqual(
+            [post.id for post in response.context['page_obj']],
+            [FollowFeedTests.old_post.id]
+        )
+
+    def test_follow_backfills_and_unfollow_cleans_feed(self):
+        follow = Follow.objects.create(
+            author=FollowFeedTests.author,
+            user=FollowFeedTests.reader,
+        )
+        self.assertEqual(
+            self.get_feed_post_ids(),
+            [FollowFeedTests.old_post.id]
+        )
+
+        follow.delete()
+        self.assertFalse(
+            FeedEntry.objects.filter(user=FollowFeedTests.reader).exists()
+        )
+        self.assertEqual(self.get_feed_post_ids(), [])
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=0)
+    def test_posts_of_popular_authors_are_read_on_demand(self):
+        Follow.objects.create(
+            author=FollowFeedTests.author,
+            user=FollowFeedTests.reader,
+        )
+        new_post = Post.objects.create(
+            text='New post',
+            author=FollowFeedTests.author,
+        )
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(
+            self.get_feed_post_ids(),
+            [new_post.id, FollowFeedTests.old_post.id]
+        )
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=2)
+    def test_feeds_are_backfilled_when_author_is_pushed_again(self):
+        other_reader = User.objects.create_user(username='OtherReader')
+        latecomer = User.objects.create_user(username='Latecomer')
+        Follow.objects.create(
+            author=FollowFeedTests.author,
+            user=FollowFeedTests.reader,
+        )
+        other_follow = Follow.objects.create(
+            author=FollowFeedTests.author,
+            user=other_reader,
+        )
+        # The third follower makes the author pulled
+        Follow.objects.create(author=FollowFeedTests.author, user=latecomer)
+        pulled_post = Post.objects.create(
+            text='Pulled post',
+            author=FollowFeedTests.author,
+        )
+        self.assertFalse(FeedEntry.objects.filter(post=pulled_post).exists())
+        self.assertEqual(
+            self.get_feed_post_ids(),
+            [pulled_post.id, FollowFeedTests.old_post.id]
+        )
+
+        other_follow.delete()
+        for user in (FollowFeedTests.reader, latecomer):
+            with self.subTest(user=user.username):
+                self.assertEqual(
+                    set(
+                        FeedEntry.objects.filter(
+                            user=user
+                        ).values_list('post', flat=True)
+                    ),
+                    {pulled_post.id, FollowFeedTests.old_post.id}
+                )
+        self.assertEqual(
+            self.get_feed_post_ids(),
+            [pulled_post.id, FollowFeedTests.old_post.id]
+        )
@@ -1,15 +1,20 @@
 import shutil
 import tempfile
+from http import HTTPStatus
+from io import BytesIO, StringIO
 from pathlib import Path
 
 from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import Client, TestCase
 from django.test.utils import override_settings
 from django.urls import reverse
+from PIL import Image
 
 from ..models import Comment, Group, Post, User
+from ..thumbnails import variant_files
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -166,6 +171,185 @@ class PostFormTests(TestCase):
         }
         self.check_edit_post(form_data, post.id)
 
+    @override_settings(POST_THUMBNAIL_WORKERS=0)
+    def test_thumbnail_is_stored_on_save(self):
+        post = Post.objects.create(
+            text='Test post',
+            author=PostFormTests.author,
+        )
+        form_data = {
+            'text': 'Post changes',
+            'image': self.uploaded
+        }
+        PostFormTests.authorized_client_author.post(
+            path=reverse('posts:post_edit', kwargs={'post_id': post.id}),
+            data=form_data,
+        )
+
+        post.refresh_from_db()
+        self.assertEqual(
+            (post.thumbnail_width, post.thumbnail_height),
+            settings.POST_THUMBNAIL_SIZE
+        )
+        self.assertTrue(Path(post.thumbnail.path).is_file())
+        response = PostFormTests.authorized_client_author.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.id})
+        )
+        self.assertContains(response, post.thumbnail.url)
+
+        self.assertIn(
+            {'type': 'image/jpeg'},
+            [{'type': source['type']} for source in post.image_sources]
+        )
+        for source in post.image_sources:
+            with self.subTest(type=source['type']):
+                self.assertEqual(
+                    len(source['srcset'].split(', ')),
+                    len(settings.POST_IMAGE_WIDTHS) + 1
+                )
+                self.assertContains(response, f'srcset="{source["srcset"]}"')
+
+    @override_settings(POST_THUMBNAIL_WORKERS=0)
+    def test_command_generates_missing_variants(self):
+        post = Post.objects.create(
+            text='Test post',
+            author=PostFormTests.author,
+            image=self.uploaded,
+        )
+        out = StringIO()
+        call_command('generate_image_variants', stdout=out)
+
+        self.assertIn('Generated variants of 1 posts', out.getvalue())
+        post.refresh_from_db()
+        self.assertNotEqual(post.image_variants, '')
+        self.assertTrue(Path(post.thumbnail.path).is_file())
+
+    @override_settings(POST_THUMBNAIL_WORKERS=0)
+    def test_command_removes_broken_images(self):
+        jpeg = BytesIO()
+        Image.effect_noise((64, 64), 64).save(jpeg, 'JPEG')
+        post = Post.objects.create(
+            text='Test post',
+            author=PostFormTests.author,
+            image=SimpleUploadedFile('broken.jpg', jpeg.getvalue()[:-1000]),
+        )
+        out = StringIO()
+        call_command('generate_image_variants', stdout=out, stderr=StringIO())
+
+        self.assertIn(
+            'Generated variants of 0 posts, removed 1 broken images',
+            out.getvalue()
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, '')
+        self.assertFalse(
+            any(Path(TEMP_MEDIA_ROOT, 'posts').glob('broken*'))
+        )
+
+    @override_settings(POST_THUMBNAIL_WORKERS=0)
+    def test_variants_of_images_do_not_collide_and_are_deleted(self):
+        png = BytesIO()
+        Image.new('RGB', (2, 1)).save(png, 'PNG')
+        posts = [
+            Post.objects.create(
+                text='Test post',
+                author=PostFormTests.author,
+            )
+            for _ in range(2)
+        ]
+        uploads = [
+            self.uploaded,
+            SimpleUploadedFile('small.png', png.getvalue()),
+        ]
+        for post, upload in zip(posts, uploads):
+            PostFormTests.authorized_client_author.post(
+                path=reverse('posts:post_edit', kwargs={'post_id': post.id}),
+                data={'text': 'Post changes', 'image': upload},
+            )
+            post.refresh_from_db()
+        first, second = posts
+        self.assertNotEqual(first.thumbnail.name, second.thumbnail.name)
+        files = variant_files(first.image_variants, first.thumbnail.name)
+        self.assertTrue(files)
+
+        PostFormTests.authorized_client_author.post(
+            path=reverse('posts:post_edit', kwargs={'post_id': first.id}),
+            data={'text': 'Post changes', 'image-clear': 'on'},
+        )
+        for name in files:
+            with self.subTest(name=name):
+                self.assertFalse(Path(TEMP_MEDIA_ROOT, name).exists())
+        self.assertTrue(Path(second.thumbnail.path).is_file())
+
+        second.delete()
+        self.assertFalse(Path(second.thumbnail.path).exists())
+
+    @override_settings(MAX_UPLOAD_SIZE=1024)
+    def test_invalid_images_are_rejected(self):
+        bmp = BytesIO()
+        Image.new('RGB', (2, 1)).save(bmp, 'BMP')
+        invalid_images = {
+            'too_large': PostFormTests.small_gif + b'\x00' * 1024,
+            'not_image': b'Not an image',
+            'bmp': bmp.getvalue(),
+        }
+        for name, content in invalid_images.items():
+            with self.subTest(name=name):
+                response = PostFormTests.authorized_client_author.post(
+                    path=reverse('posts:post_create'),
+                    data={
+                        'text': 'Test post',
+                        'image': SimpleUploadedFile(f'{name}.gif', content),
+                    },
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertTrue(response.context['form'].errors['image'])
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(POST_THUMBNAIL_WORKERS=0)
+    def test_image_metadata_is_removed(self):
+        exif = Image.Exif()
+        # GPS information and orientation rotating the image
+        exif[0x8825] = {2: (1.0, 2.0, 3.0)}
+        exif[0x0112] = 6
+        jpeg = BytesIO()
+        Image.new('RGB', (4, 2)).save(jpeg, 'JPEG', exif=exif)
+        PostFormTests.authorized_client_author.post(
+            path=reverse('posts:post_create'),
+            data={
+                'text': 'Test post',
+                'image': SimpleUploadedFile('photo.jpg', jpeg.getvalue()),
+            },
+        )
+
+        post = Post.objects.get()
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (2, 4))
+            self.assertFalse(image.getexif())
+        self.assertNotEqual(post.image_variants, '')
+
+    @override_settings(POST_THUMBNAIL_WORKERS=0)
+    def test_broken_image_is_removed(self):
+        jpeg = BytesIO()
+        Image.effect_noise((64, 64), 64).save(jpeg, 'JPEG')
+        with self.assertLogs('posts.thumbnails', 'WARNING'):
+            PostFormTests.authorized_client_author.post(
+                path=reverse('posts:post_create'),
+                data={
+                    'text': 'Test post',
+                    'image': SimpleUploadedFile(
+                        'broken.jpg', jpeg.getvalue()[:-1000]
+                    ),
+                },
+            )
+
+        post = Post.objects.get()
+        self.assertEqual(post.image.name, '')
+        self.assertEqual(post.image_variants, '')
+        self.assertFalse(
+            any(Path(TEMP_MEDIA_ROOT, 'posts').glob('broken*'))
+        )
+
     def test_add_comment(self):
         post = Post.objects.create(
             text='Test post',
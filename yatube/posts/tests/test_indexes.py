@@ -0,0 +1,125 @@
+import re
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.paginator import encode_cursor
+
+from ..models import Comment, Follow, Group, Post, User
+
+# A step of the plan reading the whole table without an index
+FULL_SCAN = re.compile(r'^SCAN (?!.*\b(INDEX|PRIMARY KEY|VIRTUAL TABLE)\b)')
+SORT = 'USE TEMP B-TREE FOR ORDER BY'
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN of SQLite')
+class QueryPlanViewsTest(TestCase):
+    """Checks that queries of views are served by indexes.
+
+    Each SELECT run by a view is explained, no step of its plan may read a
+    table without an index or sort rows that an index returns in order.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Test group',
+            slug='test-slug',
+            description='Test description',
+        )
+        Follow.objects.create(author=cls.author, user=cls.reader)
+        for post_num in range(settings.NUM_INDEX_POST + 3):
+            cls.post = Post.objects.create(
+                text=f'Тестовый пост {post_num}',
+                author=cls.author,
+                group=cls.group,
+            )
+        for comment_num in range(3):
+            Comment.objects.create(
+                text=f'Test comment {comment_num}',
+                author=cls.reader,
+                post=cls.post,
+            )
+
+        cls.authorized_client_reader = Client()
+        cls.authorized_client_reader.force_login(
+            user=QueryPlanViewsTest.reader
+        )
+
+    def tearDown(self):
+        super().tearDown()
+        cache.clear()
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertServedByIndexes(self, url, allow_sort=False):
+        with CaptureQueriesContext(connection) as context:
+            QueryPlanViewsTest.authorized_client_reader.get(url)
+        selects = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+        ]
+        self.assertTrue(selects)
+        for sql in selects:
+            plan = self.explain(sql)
+            with self.subTest(url=url, sql=sql[:80]):
+                for step in plan:
+                    self.assertIsNone(FULL_SCAN.match(step), plan)
+                if not allow_sort:
+                    self.assertNotIn(SORT, plan)
+
+    def test_lists_of_posts_are_read_in_index_order(self):
+        cursor = encode_cursor(
+            QueryPlanViewsTest.post.pub_date, QueryPlanViewsTest.post.id
+        )
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:index') + f'?after={cursor}',
+            reverse(
+                'posts:group_list',
+                kwargs={'slug': QueryPlanViewsTest.group.slug}
+            ),
+            reverse(
+                'posts:profile',
+                kwargs={'username': QueryPlanViewsTest.author.username}
+            ),
+            reverse(
+                'posts:post_detail',
+                kwargs={'post_id': QueryPlanViewsTest.post.id}
+            ),
+        )
+        for url in urls:
+            self.assertServedByIndexes(url)
+
+    def test_feed_is_read_in_index_order(self):
+        cursor = encode_cursor(
+            QueryPlanViewsTest.post.pub_date, QueryPlanViewsTest.post.id
+        )
+        urls = (
+            reverse('posts:follow_index'),
+            reverse('posts:follow_index') + f'?after={cursor}',
+            reverse('posts:follow_index_more') + f'?after={cursor}',
+        )
+        for url in urls:
+            self.assertServedByIndexes(url)
+
+    def test_search_page_uses_indexes(self):
+        # Search results are sorted by the rank after the lookup
+        self.assertServedByIndexes(
+            reverse('posts:search') + '?q=пост', allow_sort=True
+        )
+
+    def test_full_scan_is_detected(self):
+        plan = self.explain('SELECT * FROM posts_post WHERE text = \'x\'')
+        self.assertTrue(any(FULL_SCAN.match(step) for step in plan))
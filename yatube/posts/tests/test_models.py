@@ -56,3 +56,23 @@ class PostModelTest(TestCase):
                     post._meta.get_field(field).help_text,
                     expected_value
                 )
+
+    def test_text_html_is_rendered_on_save(self):
+        post = Post.objects.create(
+            text='<b>First</b>\nSecond',
+            author=PostModelTest.user,
+        )
+        expected = '&lt;b&gt;First&lt;/b&gt;<br>Second'
+        self.assertTrue(post.text_html.endswith(expected))
+        self.assertEqual(Post.objects.get(id=post.id).text_as_html, expected)
+
+        post.text = 'Edited'
+        post.save()
+        self.assertEqual(Post.objects.get(id=post.id).text_as_html, 'Edited')
+
+    def test_stale_text_html_is_not_used(self):
+        Post.objects.filter(id=PostModelTest.post.id).update(text='A\nB')
+        self.assertEqual(
+            Post.objects.get(id=PostModelTest.post.id).text_as_html,
+            'A<br>B'
+        )
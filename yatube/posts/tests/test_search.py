@@ -0,0 +1,105 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from ..models import Post, User
+from ..search import normalize, stem
+
+
+class StemmerTests(TestCase):
+    def test_word_forms_have_same_stem(self):
+        word_forms = {
+            'кошки': 'кошка',
+            'котами': 'кот',
+            'бегущий': 'бегущая',
+            'программирование': 'программированием',
+        }
+        for word, other_form in word_forms.items():
+            with self.subTest(word=word):
+                self.assertEqual(stem(word), stem(other_form))
+
+    def test_normalize_keeps_other_words(self):
+        self.assertEqual(normalize('Django и Ёлки!'), 'django и елк')
+
+
+class SearchViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='Author')
+        cls.cat_post = Post.objects.create(
+            text='Мои кошки любят спать',
+            author=cls.author,
+        )
+        cls.cats_post = Post.objects.create(
+            text='Кошка и кошки, кошкам и кошками',
+            author=cls.author,
+        )
+        cls.dog_post = Post.objects.create(
+            text='Собака любит гулять',
+            author=cls.author,
+        )
+
+        cls.guest_client = Client()
+
+    def tearDown(self):
+        super().tearDown()
+        cache.clear()
+
+    def search(self, query, **params):
+        response = SearchViewTests.guest_client.get(
+            reverse('posts:search'),
+            {'q': query, **params}
+        )
+        return response
+
+    def get_found_ids(self, response):
+        return [post.id for post in response.context['page_obj']]
+
+    def test_search_finds_word_forms_ranked(self):
+        response = self.search('кошкой')
+        self.assertTemplateUsed(response, 'posts/search.html')
+        self.assertEqual(
+            self.get_found_ids(response),
+            [SearchViewTests.cats_post.id, SearchViewTests.cat_post.id]
+        )
+
+    def test_index_follows_changes_of_posts(self):
+        post = Post.objects.create(
+            text='Попугай говорит',
+            author=SearchViewTests.author,
+        )
+        self.assertEqual(self.get_found_ids(self.search('попугаи')), [post.id])
+
+        post.text = 'Ворона молчит'
+        post.save()
+        self.assertEqual(self.get_found_ids(self.search('попугаи')), [])
+        self.assertEqual(self.get_found_ids(self.search('вороны')), [post.id])
+
+        post.delete()
+        self.assertEqual(self.get_found_ids(self.search('вороны')), [])
+
+    @override_settings(NUM_SEARCH_POST=1)
+    def test_results_are_paginated_with_cursor(self):
+        response = self.search('любит')
+        first_ids = self.get_found_ids(response)
+        self.assertEqual(len(first_ids), 1)
+        self.assertIsNotNone(response.context['next_cursor'])
+
+        response = self.search(
+            'любит',
+            after=response.context['next_cursor']
+        )
+        second_ids = self.get_found_ids(response)
+        self.assertEqual(len(second_ids), 1)
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertEqual(
+            set(first_ids + second_ids),
+            {SearchViewTests.cat_post.id, SearchViewTests.dog_post.id}
+        )
+
+    def test_empty_query_shows_only_form(self):
+        response = self.search('')
+        self.assertIsNone(response.context['page_obj'])
@@ -0,0 +1,174 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from ..models import Comment, FeedEntry, Follow, Group, Post, User
+from ..search import search_posts
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class TransferCommandsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Test group',
+            slug='test-slug',
+            description='Test description',
+        )
+        cls.post = Post.objects.create(
+            text='Пост с картинкой',
+            author=cls.author,
+            group=cls.group,
+            image=SimpleUploadedFile(
+                name='small.gif',
+                content=b'GIF89a',
+                content_type='image/gif',
+            ),
+        )
+        cls.other_post = Post.objects.create(
+            text='Пост без группы',
+            author=cls.reader,
+        )
+        Comment.objects.create(
+            text='Test comment',
+            author=cls.reader,
+            post=cls.post,
+        )
+        Follow.objects.create(author=cls.author, user=cls.reader)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.directory, ignore_errors=True)
+        cache.clear()
+
+    def snapshot(self):
+        return {
+            'groups': list(Group.objects.values_list(
+                'slug', 'title', 'description'
+            )),
+            'posts': list(Post.objects.values_list(
+                'id', 'author__username', 'group__slug', 'pub_date', 'text',
+                'image',
+            )),
+            'comments': list(Comment.objects.values_list(
+                'id', 'post', 'author__username', 'created', 'text',
+            )),
+            'follows': list(Follow.objects.values_list(
+                'user__username', 'author__username',
+            )),
+        }
+
+    def export_and_clear(self, data_format):
+        call_command(
+            'export_data', self.directory, format=data_format,
+            stdout=StringIO(),
+        )
+        Group.objects.all().delete()
+        Post.objects.all().delete()
+        Follow.objects.all().delete()
+
+    def test_round_trip(self):
+        for data_format in ('ndjson', 'csv'):
+            with self.subTest(format=data_format):
+                expected = self.snapshot()
+                self.export_and_clear(data_format)
+                shutil.rmtree(os.path.join(TEMP_MEDIA_ROOT, 'posts'))
+
+                call_command(
+                    'import_data', self.directory, format=data_format,
+                    stdout=StringIO(),
+                )
+
+                self.assertEqual(self.snapshot(), expected)
+                self.assertTrue(os.path.isfile(os.path.join(
+                    TEMP_MEDIA_ROOT, TransferCommandsTests.post.image.name
+                )))
+                self.assertFalse(os.path.exists(os.path.join(
+                    self.directory, '.import-checkpoint.json'
+                )))
+
+    def test_derived_data_is_rebuilt(self):
+        self.export_and_clear('ndjson')
+
+        call_command('import_data', self.directory, stdout=StringIO())
+
+        post = Post.objects.get(id=TransferCommandsTests.post.id)
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(post.author.profile.posts_count, 1)
+        self.assertEqual(post.author.profile.followers_count, 1)
+        self.assertTrue(FeedEntry.objects.filter(
+            post=post, user=TransferCommandsTests.reader
+        ).exists())
+        page, _ = search_posts('картинкой', 10)
+        self.assertEqual(list(page), [post])
+
+    def test_import_resumes_from_checkpoint(self):
+        self.export_and_clear('ndjson')
+        # The import crashed after the first post and its comment
+        with open(
+            os.path.join(self.directory, '.import-checkpoint.json'), 'w'
+        ) as file:
+            json.dump({'groups': 1, 'posts': 1, 'comments': 1}, file)
+
+        call_command(
+            'import_data', self.directory, resume=True, stdout=StringIO()
+        )
+
+        self.assertFalse(Group.objects.exists())
+        self.assertEqual(
+            list(Post.objects.values_list('id', flat=True)),
+            [TransferCommandsTests.other_post.id],
+        )
+
+    def test_missing_users_stop_import(self):
+        self.export_and_clear('ndjson')
+        User.objects.filter(username='Reader').delete()
+
+        with self.assertRaises(CommandError):
+            call_command('import_data', self.directory, stdout=StringIO())
+        call_command(
+            'import_data', self.directory, resume=True, create_users=True,
+            stdout=StringIO(),
+        )
+
+        self.assertTrue(Follow.objects.filter(user__username='Reader'))
+        self.assertFalse(User.objects.get(
+            username='Reader'
+        ).has_usable_password())
+
+    def test_taken_ids_stop_import(self):
+        call_command(
+            'export_data', self.directory, format='ndjson',
+            stdout=StringIO(),
+        )
+        Post.objects.filter(id=TransferCommandsTests.post.id).update(
+            text='Other post'
+        )
+
+        with self.assertRaises(CommandError):
+            call_command('import_data', self.directory, stdout=StringIO())
+        # The comment is not imported again under the other post
+        self.assertEqual(Comment.objects.count(), 1)
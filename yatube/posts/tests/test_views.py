@@ -1,5 +1,7 @@
 import shutil
 import tempfile
+from http import HTTPStatus
+from unittest import mock
 
 from django import forms
 from django.conf import settings
@@ -9,6 +11,9 @@ from django.test import Client, TestCase
 from django.test.utils import override_settings
 from django.urls import reverse
 
+from core.db.routers import ReplicaRouter
+from core.paginator import encode_cursor
+
 from ..models import Comment, Follow, Group, Post, User
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -111,7 +116,7 @@ class PostPagesTests(TestCase):
         response = PostPagesTests.guest_client.get(reverse('posts:index'))
         self.assertIn(new_post.text.encode('utf8'), response.content)
 
-        Post.objects.get(id=new_post.id).delete()
+        Post.objects.filter(id=new_post.id).update(text='Updated text')
         response = PostPagesTests.guest_client.get(reverse('posts:index'))
         self.assertIn(new_post.text.encode('utf8'), response.content)
 
@@ -119,6 +124,170 @@ class PostPagesTests(TestCase):
         response = PostPagesTests.guest_client.get(reverse('posts:index'))
         self.assertNotIn(new_post.text.encode('utf8'), response.content)
 
+    def test_index_page_is_cached_regardless_of_other_parameters(self):
+        new_post = Post.objects.create(
+            text='Test post caching',
+            author=PostPagesTests.author,
+        )
+        url = reverse('posts:index')
+        PostPagesTests.guest_client.get(url, {'utm_source': 'mail'})
+
+        Post.objects.filter(id=new_post.id).update(text='Updated text')
+        response = PostPagesTests.guest_client.get(url, {'x': '1'})
+        self.assertContains(response, new_post.text)
+
+    def test_index_page_body_is_shared_by_all_users(self):
+        new_post = Post.objects.create(
+            text='Test post caching',
+            author=PostPagesTests.author,
+        )
+        PostPagesTests.guest_client.get(reverse('posts:index'))
+
+        Post.objects.filter(id=new_post.id).update(text='Updated text')
+        response = PostPagesTests.authorized_client_reader.get(
+            reverse('posts:index')
+        )
+        self.assertContains(response, new_post.text)
+        self.assertContains(
+            response,
+            f'Пользователь: {PostPagesTests.reader.username}'
+        )
+
+    def test_index_page_cache_is_invalidated_on_changes(self):
+        new_post = Post.objects.create(
+            text='Test post caching',
+            author=PostPagesTests.author,
+        )
+        response = PostPagesTests.guest_client.get(reverse('posts:index'))
+        self.assertIn(new_post.text.encode('utf8'), response.content)
+
+        Post.objects.get(id=new_post.id).delete()
+        response = PostPagesTests.guest_client.get(reverse('posts:index'))
+        self.assertNotIn(new_post.text.encode('utf8'), response.content)
+
+    def test_posts_of_lists_are_cached_until_changed(self):
+        post = Post.objects.get(id=PostPagesTests.post.id)
+        url = reverse('posts:group_list', kwargs={'slug': post.group.slug})
+        PostPagesTests.guest_client.get(url)
+
+        Post.objects.filter(id=post.id).update(text='Updated text')
+        response = PostPagesTests.guest_client.get(url)
+        self.assertContains(response, post.text)
+
+        post.text = 'Edited text'
+        post.save()
+        response = PostPagesTests.guest_client.get(url)
+        self.assertContains(response, post.text)
+
+        User.objects.filter(id=post.author.id).update(first_name='Renamed')
+        response = PostPagesTests.guest_client.get(url)
+        self.assertContains(response, 'Renamed')
+
+    def test_pages_are_not_modified_until_posts_change(self):
+        post = PostPagesTests.post
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': post.group.slug}),
+            reverse('posts:profile', kwargs={'username': 'Author'}),
+            reverse('posts:post_detail', kwargs={'post_id': post.id}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                # Forms of the first response set the CSRF cookie
+                PostPagesTests.guest_client.get(url)
+                response = PostPagesTests.guest_client.get(url)
+                etag = response['ETag']
+                modified = response['Last-Modified']
+                response = PostPagesTests.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+                response = PostPagesTests.guest_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=modified
+                )
+                self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+                response = PostPagesTests.authorized_client_reader.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+                Comment.objects.create(
+                    text='New comment',
+                    author=PostPagesTests.reader,
+                    post=post,
+                )
+                response = PostPagesTests.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_validators_depend_on_rows_of_the_page(self):
+        url = reverse(
+            'posts:group_list', kwargs={'slug': PostPagesTests.group.slug}
+        )
+        group_post = Post.objects.create(
+            text='Group post',
+            author=PostPagesTests.reader,
+            group=PostPagesTests.group,
+        )
+        PostPagesTests.guest_client.get(url)
+        response = PostPagesTests.guest_client.get(url)
+        etag = response['ETag']
+        modified = response['Last-Modified']
+
+        Post.objects.create(text='Other post', author=PostPagesTests.reader)
+        response = PostPagesTests.guest_client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        response = PostPagesTests.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=modified
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+        group_post.delete()
+        response = PostPagesTests.guest_client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+        author = User.objects.get(id=PostPagesTests.author.id)
+        author.first_name = 'Renamed'
+        author.save()
+        response = PostPagesTests.guest_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    def test_pages_are_read_from_primary_while_replicas_lag(self):
+        routed = []
+        db_for_read = ReplicaRouter.db_for_read
+
+        def lagging_replica(router, model, **hints):
+            routed.append(db_for_read(router, model, **hints))
+            # The test database stands in for the replica
+            return 'default'
+
+        url = reverse(
+            'posts:group_list', kwargs={'slug': PostPagesTests.group.slug}
+        )
+        with mock.patch.object(ReplicaRouter, 'db_for_read', lagging_replica):
+            Post.objects.create(
+                text='New post',
+                author=PostPagesTests.author,
+                group=PostPagesTests.group,
+            )
+            Client().get(url)
+            self.assertTrue(routed)
+            self.assertEqual(set(routed), {'default'})
+
+            routed.clear()
+            with override_settings(REPLICA_STICKY_SECONDS=0):
+                Client().get(url)
+            self.assertIn('replica', routed)
+
     def test_index_page_shows_correct_context(self):
         response = PostPagesTests.guest_client.get(reverse('posts:index'))
 
@@ -635,3 +804,272 @@ class PaginatorViewsTest(TestCase):
                     len(response.context['page_obj']),
                     num_posts
                 )
+
+    def test_cursor_pages_follow_each_other(self):
+        urls_per_page = {
+            reverse('posts:index'): settings.NUM_INDEX_POST,
+            reverse(
+                'posts:group_list',
+                kwargs={'slug': PaginatorViewsTest.group.slug}
+            ): settings.NUM_GROUP_POST,
+            reverse(
+                'posts:profile',
+                kwargs={'username': PaginatorViewsTest.author.username}
+            ): settings.NUM_USER_POST
+        }
+        expected_ids = list(
+            Post.objects.order_by('-pub_date', '-id').values_list(
+                'id', flat=True
+            )
+        )
+        for url, per_page in urls_per_page.items():
+            with self.subTest(url=url):
+                response = PaginatorViewsTest.guest_client.get(url)
+                last_post = response.context['page_obj'][-1]
+                cursor = encode_cursor(last_post.pub_date, last_post.id)
+                response = PaginatorViewsTest.guest_client.get(
+                    url, {'after': cursor}
+                )
+                second_page = response.context['page_obj']
+                self.assertEqual(
+                    [post.id for post in second_page],
+                    expected_ids[per_page:2 * per_page]
+                )
+                self.assertTrue(second_page.has_previous())
+                self.assertFalse(second_page.has_next())
+                self.assertContains(response, '?before=')
+
+                cursor = encode_cursor(
+                    second_page[0].pub_date,
+                    second_page[0].id
+                )
+                response = PaginatorViewsTest.guest_client.get(
+                    url, {'before': cursor}
+                )
+                self.assertEqual(
+                    [post.id for post in response.context['page_obj']],
+                    expected_ids[:per_page]
+                )
+                self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_invalid_cursor_returns_first_page(self):
+        response = PaginatorViewsTest.guest_client.get(
+            reverse('posts:index'),
+            {'after': 'invalid'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            len(response.context['page_obj']),
+            settings.NUM_INDEX_POST
+        )
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_comments_are_loaded_by_pages(self):
+        post = PaginatorViewsTest.post
+        Comment.objects.bulk_create(
+            Comment(
+                text=f'Test comment {comment_num}',
+                author=PaginatorViewsTest.author,
+                post=post,
+            )
+            for comment_num in range(settings.NUM_POST_COMMENTS + 3)
+        )
+        expected_ids = list(
+            post.comments.order_by('created', 'id').values_list(
+                'id', flat=True
+            )
+        )
+        response = PaginatorViewsTest.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.id})
+        )
+        first_page = response.context['comments']
+        self.assertEqual(
+            [comment.id for comment in first_page],
+            expected_ids[:settings.NUM_POST_COMMENTS]
+        )
+        more_url = reverse('posts:post_comments', kwargs={'post_id': post.id})
+        self.assertContains(response, more_url)
+
+        cursor = encode_cursor(first_page[-1].created, first_page[-1].id)
+        response = PaginatorViewsTest.guest_client.get(
+            more_url, {'after': cursor}
+        )
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertEqual(
+            [comment.id for comment in response.context['comments']],
+            expected_ids[settings.NUM_POST_COMMENTS:]
+        )
+        self.assertNotContains(response, more_url)
+
+        response = PaginatorViewsTest.guest_client.get(
+            more_url, {'after': cursor, 'format': 'json'}
+        )
+        data = response.json()
+        self.assertEqual(
+            [comment['id'] for comment in data['comments']],
+            expected_ids[settings.NUM_POST_COMMENTS:]
+        )
+        self.assertIsNone(data['next'])
+
+        response = PaginatorViewsTest.guest_client.get(
+            more_url, {'after': 'invalid'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_posts_are_loaded_by_batches(self):
+        reader = User.objects.create_user(username='Reader')
+        Follow.objects.create(user=reader, author=PaginatorViewsTest.author)
+        authorized_client = Client()
+        authorized_client.force_login(user=reader)
+        expected_ids = list(
+            Post.objects.order_by('-pub_date', '-id').values_list(
+                'id', flat=True
+            )
+        )
+        urls_more_urls = {
+            reverse('posts:index'): (
+                reverse('posts:index_more'), settings.NUM_INDEX_POST
+            ),
+            reverse(
+                'posts:group_list',
+                kwargs={'slug': PaginatorViewsTest.group.slug}
+            ): (
+                reverse(
+                    'posts:group_list_more',
+                    kwargs={'slug': PaginatorViewsTest.group.slug}
+                ),
+                settings.NUM_GROUP_POST,
+            ),
+            reverse(
+                'posts:profile',
+                kwargs={'username': PaginatorViewsTest.author.username}
+            ): (
+                reverse(
+                    'posts:profile_more',
+                    kwargs={'username': PaginatorViewsTest.author.username}
+                ),
+                settings.NUM_USER_POST,
+            ),
+            reverse('posts:follow_index'): (
+                reverse('posts:follow_index_more'), settings.NUM_INDEX_POST
+            ),
+        }
+        for url, (more_url, per_page) in urls_more_urls.items():
+            with self.subTest(url=url):
+                response = authorized_client.get(url)
+                first_page = response.context['page_obj']
+                cursor = encode_cursor(
+                    first_page[-1].pub_date, first_page[-1].id
+                )
+                self.assertContains(response, f'{more_url}?after={cursor}')
+
+                response = authorized_client.get(more_url, {'after': cursor})
+                self.assertTemplateUsed(
+                    response, 'posts/includes/posts_batch.html'
+                )
+                self.assertTemplateNotUsed(response, 'base.html')
+                self.assertEqual(
+                    [post.id for post in response.context['page_obj']],
+                    expected_ids[per_page:2 * per_page]
+                )
+                self.assertNotContains(response, more_url)
+
+                response = authorized_client.get(more_url, {'format': 'json'})
+                data = response.json()
+                self.assertEqual(
+                    [post['id'] for post in data['posts']],
+                    expected_ids[:per_page]
+                )
+                self.assertEqual(data['next'], cursor)
+
+                response = authorized_client.get(
+                    more_url, {'after': 'invalid'}
+                )
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+class QueryBudgetViewsTest(TestCase):
+    """Checks that views run a fixed number of queries on any data size."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Test group',
+            slug='test-slug',
+            description='Test description',
+        )
+        Follow.objects.create(author=cls.author, user=cls.reader)
+        for post_num in range(settings.NUM_INDEX_POST + 3):
+            cls.post = Post.objects.create(
+                text=f'Test post {post_num}',
+                author=cls.author,
+                group=cls.group,
+            )
+        for comment_num in range(10):
+            Comment.objects.create(
+                text=f'Test comment {comment_num}',
+                author=cls.reader if comment_num % 2 else cls.author,
+                post=cls.post,
+            )
+
+        cls.guest_client = Client()
+
+        cls.authorized_client_reader = Client()
+        cls.authorized_client_reader.force_login(
+            user=QueryBudgetViewsTest.reader
+        )
+
+    def tearDown(self):
+        super().tearDown()
+        cache.clear()
+
+    def test_views_fit_query_budget(self):
+        # Session and user queries of an authorized client
+        auth_queries = 2
+        cursor = encode_cursor(
+            QueryBudgetViewsTest.post.pub_date, QueryBudgetViewsTest.post.id
+        )
+        # Validators of pages read the rows of the page first, numbered
+        # pages count them as well
+        urls_budgets = {
+            reverse('posts:index'): 4,
+            reverse(
+                'posts:group_list',
+                kwargs={'slug': QueryBudgetViewsTest.group.slug}
+            ): 5,
+            reverse(
+                'posts:profile',
+                kwargs={'username': QueryBudgetViewsTest.author.username}
+            ): 7,
+            reverse(
+                'posts:post_detail',
+                kwargs={'post_id': QueryBudgetViewsTest.post.id}
+            ): 3,
+            reverse('posts:index_more'): 2,
+            reverse('posts:index_more') + f'?after={cursor}': 2,
+            reverse(
+                'posts:group_list_more',
+                kwargs={'slug': QueryBudgetViewsTest.group.slug}
+            ): 3,
+            reverse(
+                'posts:profile_more',
+                kwargs={'username': QueryBudgetViewsTest.author.username}
+            ): 3,
+        }
+        for url, budget in urls_budgets.items():
+            with self.subTest(url=url):
+                with self.assertNumQueries(budget):
+                    QueryBudgetViewsTest.guest_client.get(url)
+                cache.clear()
+                with self.assertNumQueries(budget + auth_queries):
+                    QueryBudgetViewsTest.authorized_client_reader.get(url)
+                cache.clear()
+
+        # Pulled authors and the page of the feed, it is not counted
+        with self.assertNumQueries(2 + auth_queries):
+            QueryBudgetViewsTest.authorized_client_reader.get(
+                reverse('posts:follow_index')
+            )
@@ -0,0 +1,174 @@
+"""Thumbnails and responsive variants of post images.
+
+Variants are generated by a background task when a post is saved, in a
+pool of processes, since resizing is CPU-bound. The thumbnail name and
+size and the variants are stored in the post row, so rendering a post
+needs no image I/O. Uploads are decoded first by the task, broken ones
+are removed from their posts. Files of variants are deleted when they are
+replaced, or when the image or the post is removed.
+"""
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from core.cache.generations import bump_generation
+from core.fields import new_version
+from core.images import (
+    MIME_TYPES, InvalidImage, process_image, supported_formats, variant_name
+)
+from core.metrics import THUMBNAIL_SECONDS
+from core.tasks import task
+
+from .models import Post
+
+VARIANTS_DIRECTORY = os.path.join('posts', 'thumbnails')
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_executor(max_workers=None):
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=max_workers or settings.POST_THUMBNAIL_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+    return _executor
+
+
+def _stem(image_name):
+    # Names of images differ in directories or extensions only, e.g.
+    # `posts/cat.jpg` and `posts/cat.png`, so the full name is hashed
+    digest = hashlib.md5(image_name.encode()).hexdigest()[:8]
+    return f'{os.path.splitext(os.path.basename(image_name))[0]}_{digest}'
+
+
+def thumbnail_name(image_name):
+    return os.path.join(
+        VARIANTS_DIRECTORY,
+        variant_name(_stem(image_name), settings.POST_THUMBNAIL_SIZE, 'JPEG')
+    )
+
+
+def variants_args(image_name):
+    """Returns arguments of `make_variants` and `process_image`."""
+    return (
+        default_storage.path(image_name),
+        default_storage.path(
+            os.path.join(VARIANTS_DIRECTORY, _stem(image_name))
+        ),
+        settings.POST_THUMBNAIL_SIZE,
+        settings.POST_IMAGE_WIDTHS + (settings.POST_THUMBNAIL_SIZE[0],),
+        # JPEG is required for the thumbnail
+        supported_formats(
+            dict.fromkeys(settings.POST_IMAGE_FORMATS + ('JPEG',))
+        ),
+    )
+
+
+def variant_files(image_variants, thumbnail):
+    """Returns names of files of variants stored in a post row."""
+    names = {thumbnail} if thumbnail else set()
+    if image_variants:
+        for sources in json.loads(image_variants).values():
+            names.update(name for name, _ in sources)
+    return names
+
+
+def delete_files(names):
+    for name in names:
+        default_storage.delete(name)
+
+
+def _stored_files(post_id):
+    row = Post.objects.filter(id=post_id).values_list(
+        'image_variants', 'thumbnail'
+    ).first()
+    return variant_files(*row) if row else set()
+
+
+def store_variants(post_id, image_name, variants):
+    sources = {}
+    for format_, name, width, _ in variants:
+        sources.setdefault(MIME_TYPES[format_], []).append(
+            [os.path.join(VARIANTS_DIRECTORY, name), width]
+        )
+    thumbnail = thumbnail_name(image_name)
+    names = variant_files(json.dumps(sources), thumbnail)
+    width, height = settings.POST_THUMBNAIL_SIZE
+    replaced = _stored_files(post_id)
+    # The image could be replaced while the variants were generated
+    updated = Post.objects.filter(id=post_id, image=image_name).update(
+        image_variants=json.dumps(sources),
+        thumbnail=thumbnail,
+        thumbnail_height=height,
+        thumbnail_width=width,
+        version=new_version(),
+    )
+    if not updated:
+        delete_files(names - replaced)
+        return
+    delete_files(replaced - names)
+    bump_generation('posts')
+
+
+def _clear_variants(posts, **fields):
+    return posts.update(
+        image_variants='',
+        thumbnail='',
+        thumbnail_height=None,
+        thumbnail_width=None,
+        version=new_version(),
+        **fields
+    )
+
+
+def remove_image(post_id, image_name):
+    """Removes the broken image from the post and from the storage."""
+    replaced = _stored_files(post_id)
+    posts = Post.objects.filter(id=post_id, image=image_name)
+    if _clear_variants(posts, image=''):
+        delete_files(replaced)
+        bump_generation('posts')
+    default_storage.delete(image_name)
+
+
+@task()
+def generate_variants(post_id, image_name):
+    """Checks the uploaded image of the post and generates its variants.
+
+    The image is processed in the pool of `POST_THUMBNAIL_WORKERS`
+    processes, or in the task if it is `0`.
+    """
+    started = time.perf_counter()
+    args = variants_args(image_name)
+    try:
+        if settings.POST_THUMBNAIL_WORKERS:
+            variants = get_executor().submit(process_image, *args).result()
+        else:
+            variants = process_image(*args)
+    except InvalidImage as error:
+        logger.warning('Image of post %s is removed: %s', post_id, error)
+        remove_image(post_id, image_name)
+        return
+    THUMBNAIL_SECONDS.observe(time.perf_counter() - started)
+    store_variants(post_id, image_name, variants)
+
+
+def schedule_variants(post):
+    """Generates variants of the `post` image by a background task."""
+    if not post.image:
+        replaced = _stored_files(post.id)
+        _clear_variants(Post.objects.filter(id=post.id))
+        delete_files(replaced)
+        return
+    generate_variants.delay(post.id, post.image.name)
@@ -0,0 +1,365 @@
+"""Streaming export and import of groups, posts, comments and follows.
+
+Rows are streamed through generators in batches, so memory does not grow
+with the size of the data. Users are referred to by usernames and groups
+by slugs, posts and comments keep their ids, so comments keep referring
+to their posts.
+
+Import writes a batch with one `bulk_create`, which skips signals of
+models. Rows that exist are ignored, so a batch imported twice after a
+crash is harmless, but ids taken by other posts or comments stop the
+import. Denormalized data maintained by the signals is rebuilt
+once after the import by `rebuild_derived_data`.
+"""
+import csv
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.cache.generations import bump_generation
+from users.models import Profile
+
+from . import feed
+from .counters import reconcile_posts, reconcile_profiles
+from .models import Comment, Follow, Group, Post, User
+from .search import get_backend
+
+FORMATS = ('ndjson', 'csv')
+# Names of files in the order of import
+FIELDS = {
+    'groups': ('slug', 'title', 'description'),
+    'posts': ('id', 'author', 'group', 'pub_date', 'text', 'image'),
+    'comments': ('id', 'post', 'author', 'created', 'text'),
+    'follows': ('user', 'author'),
+}
+IMAGES_DIRECTORY = 'posts/'
+
+
+def _querysets():
+    return {
+        'groups': Group.objects.order_by('id').values_list(*FIELDS['groups']),
+        'posts': Post.objects.order_by('id').values_list(
+            'id', 'author__username', 'group__slug', 'pub_date', 'text',
+            'image',
+        ),
+        'comments': Comment.objects.order_by('id').values_list(
+            'id', 'post', 'author__username', 'created', 'text',
+        ),
+        'follows': Follow.objects.order_by('id').values_list(
+            'user__username', 'author__username',
+        ),
+    }
+
+
+def export_rows(name: str, chunk_size: int) -> Iterator[dict]:
+    for row in _querysets()[name].iterator(chunk_size=chunk_size):
+        yield dict(zip(FIELDS[name], row))
+
+
+def _plain(record):
+    # Dates keep microseconds, unlike `DjangoJSONEncoder`, since lists of
+    # posts are paginated by them
+    return {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in record.items()
+    }
+
+
+def write_records(records: Iterable[dict], file, format_: str) -> int:
+    """Writes `records` to the text `file`, returns their number."""
+    written = 0
+    if format_ == 'csv':
+        writer = None
+        for record in records:
+            if writer is None:
+                writer = csv.DictWriter(file, fieldnames=list(record))
+                writer.writeheader()
+            writer.writerow(_plain(record))
+            written += 1
+        return written
+    for record in records:
+        file.write(json.dumps(_plain(record), ensure_ascii=False))
+        file.write('\n')
+        written += 1
+    return written
+
+
+def read_records(file, format_: str) -> Iterator[dict]:
+    if format_ == 'csv':
+        for record in csv.DictReader(file):
+            # CSV has no nulls
+            yield {
+                key: value if value != '' else None
+                for key, value in record.items()
+            }
+        return
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def batched(records: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    records = iter(records)
+    while True:
+        batch = list(islice(records, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _datetime(value):
+    return parse_datetime(value) if value else timezone.now()
+
+
+class MissingUsers(Exception):
+    pass
+
+
+class ConflictingIds(Exception):
+    pass
+
+
+# Fields with `auto_now_add`, which `bulk_create` sets to the current time
+DATE_FIELDS = {
+    'comments': 'created',
+    'posts': 'pub_date',
+}
+# Fields telling whether a row with the id of an imported object is the
+# object imported before or another one
+IDENTITY_FIELDS = {
+    'comments': ('author_id', 'post_id', 'text'),
+    'posts': ('author_id', 'text'),
+}
+
+
+class Importer:
+    """Imports batches of records, copying images of posts in parallel.
+
+    Images are copied from `media_root` to `MEDIA_ROOT` by `workers`
+    threads, copying is I/O-bound. Posts whose image is missing in
+    `media_root` are imported and counted in `missing_images`.
+    """
+    def __init__(self, media_root=None, workers=4, create_users=False):
+        self.media_root = media_root
+        self.create_users = create_users
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.groups: Dict[str, int] = {}
+        self.missing_images = 0
+
+    def close(self):
+        self.executor.shutdown()
+
+    def _user_ids(self, usernames):
+        usernames = set(usernames)
+        users = dict(
+            User.objects.filter(username__in=usernames).values_list(
+                'username', 'id'
+            )
+        )
+        missing = usernames - users.keys()
+        if missing and not self.create_users:
+            raise MissingUsers(', '.join(sorted(missing)))
+        if missing:
+            # Imported users can log in after resetting the password
+            User.objects.bulk_create(
+                User(username=username, password='!') for username in missing
+            )
+            created = dict(
+                User.objects.filter(username__in=missing).values_list(
+                    'username', 'id'
+                )
+            )
+            Profile.objects.bulk_create(
+                Profile(user_id=user_id) for user_id in created.values()
+            )
+            users.update(created)
+        return users
+
+    def _group_ids(self, slugs):
+        # Groups are few, all of them are cached
+        missing = set(slugs) - self.groups.keys() - {None}
+        if missing:
+            self.groups.update(
+                Group.objects.filter(slug__in=missing).values_list(
+                    'slug', 'id'
+                )
+            )
+        return self.groups
+
+    def _copy_image(self, name):
+        # Raises `SuspiciousFileOperation` if the name leaves MEDIA_ROOT
+        target = default_storage.path(name)
+        source = os.path.join(self.media_root, name)
+        if not os.path.isfile(source):
+            return False
+        if (
+            os.path.exists(target)
+            and os.path.getsize(target) == os.path.getsize(source)
+        ):
+            return True
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(source, target)
+        return True
+
+    def groups_objects(self, batch):
+        return [
+            Group(
+                description=record['description'] or '',
+                slug=record['slug'],
+                title=record['title'],
+            )
+            for record in batch
+        ]
+
+    def posts_objects(self, batch):
+        users = self._user_ids(record['author'] for record in batch)
+        groups = self._group_ids(record['group'] for record in batch)
+        return [
+            Post(
+                author_id=users[record['author']],
+                group_id=groups.get(record['group']),
+                id=int(record['id']),
+                image=record['image'] or '',
+                pub_date=_datetime(record['pub_date']),
+                text=record['text'] or '',
+            )
+            for record in batch
+        ]
+
+    def comments_objects(self, batch):
+        users = self._user_ids(record['author'] for record in batch)
+        return [
+            Comment(
+                author_id=users[record['author']],
+                created=_datetime(record['created']),
+                id=int(record['id']),
+                post_id=int(record['post']),
+                text=record['text'] or '',
+            )
+            for record in batch
+        ]
+
+    def follows_objects(self, batch):
+        users = self._user_ids(
+            username
+            for record in batch
+            for username in (record['user'], record['author'])
+        )
+        return [
+            Follow(
+                author_id=users[record['author']],
+                user_id=users[record['user']],
+            )
+            for record in batch
+        ]
+
+    def _check_ids(self, name, objects):
+        fields = IDENTITY_FIELDS.get(name)
+        if not fields:
+            return
+        existing = {
+            row[0]: row[1:]
+            for row in objects[0]._meta.model.objects.filter(
+                id__in=[obj.id for obj in objects]
+            ).values_list('id', *fields)
+        }
+        conflicting = [
+            obj.id
+            for obj in objects
+            if obj.id in existing and existing[obj.id] != tuple(
+                getattr(obj, field) for field in fields
+            )
+        ]
+        if conflicting:
+            raise ConflictingIds(
+                f'{name} {", ".join(map(str, conflicting))}'
+            )
+
+    def import_batch(self, name: str, batch: List[dict]) -> None:
+        """Saves the batch, returns after its images are copied."""
+        objects = getattr(self, f'{name}_objects')(batch)
+        futures = []
+        if name == 'posts' and self.media_root:
+            for post in objects:
+                if not post.image:
+                    continue
+                if not post.image.name.startswith(IMAGES_DIRECTORY):
+                    raise SuspiciousFileOperation(
+                        f'Image {post.image.name} is not in '
+                        f'{IMAGES_DIRECTORY}'
+                    )
+                futures.append(
+                    self.executor.submit(self._copy_image, post.image.name)
+                )
+        model = objects[0]._meta.model
+        date_field = DATE_FIELDS.get(name)
+        dates = [getattr(obj, date_field) for obj in objects] if (
+            date_field
+        ) else []
+        with transaction.atomic():
+            self._check_ids(name, objects)
+            model.objects.bulk_create(objects, ignore_conflicts=True)
+            if date_field:
+                for obj, date in zip(objects, dates):
+                    setattr(obj, date_field, date)
+                model.objects.bulk_update(objects, [date_field])
+        for future in wait(futures).done:
+            if not future.result():
+                self.missing_images += 1
+
+
+class Checkpoint:
+    """Numbers of imported records of each file, stored after each batch."""
+    def __init__(self, path):
+        self.path = path
+        self.done: Dict[str, int] = {}
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as file:
+                self.done = json.load(file)
+
+    def save(self, name, done):
+        self.done[name] = done
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(self.done, file)
+        # The checkpoint is replaced atomically, it is never half-written
+        os.replace(temporary, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def reset_sequences():
+    """Moves sequences of ids past ids of imported posts and comments."""
+    statements = connection.ops.sequence_reset_sql(
+        no_style(), [Comment, Post]
+    )
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def rebuild_derived_data():
+    """Rebuilds data that signals keep in sync, after a bulk import."""
+    reconcile_profiles()
+    reconcile_posts()
+    feed.update_pulled_authors()
+    get_backend().rebuild()
+    # Backfilling is idempotent, feed entries that exist are skipped
+    for follow in Follow.objects.iterator():
+        feed.add_follow(follow)
+    bump_generation('posts')
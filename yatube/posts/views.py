@@ -1,22 +1,290 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
 from django.core.paginator import Paginator
+from django.db.models import Exists, OuterRef, Subquery
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
-from django.views.decorators.http import require_http_methods
-from django.views.decorators.vary import vary_on_cookie
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import urlencode
+from django.views.decorators.http import condition, require_http_methods
+
+from api.resources import POSTS
+from core.cache.generations import bumped_within, get_generation
+from core.db import routers
+from core.paginator import (
+    DEFAULT_FIELD, CursorPaginator, InvalidCursor, encode_cursor
+)
+from users.models import Profile
 
+from .counters import get_profile
+from .feed import FEED_KEY, get_feed
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .models import Comment, Follow, Group, Post, User
+from .search import search_posts
+from .thumbnails import schedule_variants
 
 
 # utils
 def get_page_obj(request, object_list, per_page):
+    """Returns a page of `object_list` requested by the `request`.
+
+    The `after` and `before` cursors select a page with the keyset seek,
+    otherwise the `page` number selects a page with the `OFFSET` scan.
+    """
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    if after or before:
+        return CursorPaginator(object_list, per_page).get_page(
+            after=after,
+            before=before,
+        )
+
     paginator = Paginator(object_list, per_page)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
 
 
+def page_query(request):
+    """Returns parameters of `get_page_obj` of the request, e.g. for keys.
+
+    Other parameters, e.g. of tracking links, do not change the page.
+    """
+    return urlencode([
+        (name, request.GET[name])
+        for name in ('after', 'before', 'page')
+        if name in request.GET
+    ])
+
+
+# Fields of rows changing how posts are shown, `version` changes when the
+# post is saved
+ROW_FIELDS = ('id', 'version', 'comments_count')
+
+
+def page_rows(request, posts, per_page):
+    """Returns rows of the page of `posts` requested by the `request`.
+
+    The rows are read as `get_page_obj` reads the page, so they are the
+    posts of the page, links to other pages and, for numbered pages, the
+    number of posts.
+    """
+    page = get_page_obj(request, posts.values_list(*ROW_FIELDS), per_page)
+    count = page.paginator.count if page.number else None
+    return list(page), page.has_previous(), page.has_next(), count
+
+
+def batch_rows(request, posts, per_page, **key):
+    """Returns rows of the batch of `posts` like `page_rows`."""
+    batch = get_batch(
+        request, posts.values_list(*ROW_FIELDS), per_page, **key
+    )
+    return list(batch), batch.has_next()
+
+
+def page_etag(request, state):
+    """Returns the validator of a page showing posts in the `state`.
+
+    The state is what the page shows of rows of the database, names of
+    users and groups are covered by the generation of `names`. It differs
+    per user and per CSRF cookie, forms of pages carry its token. The body
+    differs by the masking of the token, so the validator is weak.
+    """
+    key = '|'.join((
+        state,
+        str(get_generation('names')),
+        str(request.user.id),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        request.get_full_path(),
+    ))
+    return 'W/"%s"' % hashlib.md5(key.encode()).hexdigest()
+
+
+def page_last_modified(request, state):
+    """Returns the time the page was first seen in the `state`.
+
+    Rows removed from the page leave no later time in rows of the page, so
+    the time is kept per state. A lost time restarts from the current one,
+    pages could only be reported as modified later than they were. Pages of
+    users differ while the time does not, so it is returned for anonymous
+    users only.
+    """
+    if request.user.is_authenticated:
+        return None
+    key = f'{state}|{get_generation("names")}|{request.get_full_path()}'
+    seen = cache.get_or_set(
+        f'page_modified.{hashlib.md5(key.encode()).hexdigest()}',
+        time.time(),
+        timeout=settings.PAGE_MODIFIED_TIMEOUT,
+    )
+    return datetime.fromtimestamp(seen, timezone.utc)
+
+
+def page_condition(get_state):
+    """Answers conditional requests of a page showing posts.
+
+    Validators of the page are computed from `get_state(request, *args,
+    **kwargs)` returning rows the page shows, it is read once per request.
+    Cached fragments of pages are keyed by the generation of `posts`, a
+    page read from a replica lagging behind a bump would be cached as the
+    new one. So while replicas may lag after a bump, for
+    `REPLICA_STICKY_SECONDS`, pages are read from the primary.
+    """
+    def state(request, *args, **kwargs):
+        if not hasattr(request, '_page_state'):
+            rows = get_state(request, *args, **kwargs)
+            request._page_state = hashlib.md5(
+                repr(rows).encode()
+            ).hexdigest()
+        return request._page_state
+
+    def etag(request, *args, **kwargs):
+        return page_etag(request, state(request, *args, **kwargs))
+
+    def last_modified(request, *args, **kwargs):
+        return page_last_modified(request, state(request, *args, **kwargs))
+
+    def decorator(view):
+        view = condition(
+            etag_func=etag,
+            last_modified_func=last_modified,
+        )(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if settings.DATABASE_REPLICAS and bumped_within(
+                'posts', settings.REPLICA_STICKY_SECONDS
+            ):
+                with routers.primary():
+                    return view(request, *args, **kwargs)
+            return view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def get_batch(request, posts, per_page, field=DEFAULT_FIELD, pk_field='pk'):
+    """Returns the batch of `posts` following the `after` cursor.
+
+    Without the cursor it is the first batch.
+    """
+    paginator = CursorPaginator(
+        posts, per_page, field=field, pk_field=pk_field
+    )
+    after = request.GET.get('after')
+    try:
+        if after:
+            # Batches have no link to the previous one
+            return paginator.page_after(after, with_previous=False)
+        return paginator.first_page()
+    except InvalidCursor:
+        raise Http404('Invalid cursor')
+
+
+def render_more_posts(request, posts, per_page, **key):
+    """Returns the batch of `posts` of `get_batch`.
+
+    The batch is an HTML fragment for the "load more" link of lists of
+    posts, or JSON with `format=json` whose posts are the ones of the API.
+    Posts of the fragment are cached as on pages of lists.
+    """
+    if request.GET.get('format') != 'json':
+        context = {
+            'more_url': request.path,
+            'page_obj': get_batch(request, posts, per_page, **key),
+        }
+        return render(request, 'posts/includes/posts_batch.html', context)
+
+    names = POSTS.parse_fields(None)
+    rows = posts.values(*{POSTS.fields[name] for name in names})
+    batch = get_batch(request, rows, per_page, **key)
+    last = batch[-1] if batch.has_next() else None
+    return JsonResponse({
+        'posts': POSTS.serialize(batch, names),
+        'next': last and encode_cursor(last['pub_date'], last['id']),
+    })
+
+
+# states of pages for `page_condition`
+def follow_index_more_state(request):
+    return batch_rows(
+        request, get_feed(request.user), settings.NUM_INDEX_POST, **FEED_KEY
+    )
+
+
+def group_posts_state(request, slug):
+    posts = Post.objects.filter(group__slug=slug)
+    return page_rows(request, posts, settings.NUM_GROUP_POST)
+
+
+def group_posts_more_state(request, slug):
+    posts = Post.objects.filter(group__slug=slug)
+    return batch_rows(request, posts, settings.NUM_GROUP_POST)
+
+
+def index_state(request):
+    return page_rows(request, Post.objects.all(), settings.NUM_INDEX_POST)
+
+
+def index_more_state(request):
+    return batch_rows(request, Post.objects.all(), settings.NUM_INDEX_POST)
+
+
+def post_detail_state(request, post_id):
+    """Returns the post, the number of posts of its author and comments.
+
+    Comments are shown from the oldest one, a change of them changes their
+    counter or the last comment.
+    """
+    last_comment = Comment.objects.filter(
+        post=OuterRef('id')
+    ).order_by('-created', '-id').values('id')[:1]
+    return list(
+        Post.objects.filter(id=post_id).annotate(
+            last_comment=Subquery(last_comment)
+        ).values_list(
+            *ROW_FIELDS, 'author__profile__posts_count', 'last_comment'
+        )
+    )
+
+
+def profile_state(request, username):
+    """Returns the profile, whether the user follows it and the page."""
+    following = Follow.objects.filter(
+        author=OuterRef('user'), user_id=request.user.id
+    )
+    profile = list(
+        Profile.objects.filter(user__username=username).annotate(
+            following=Exists(following)
+        ).values_list(
+            'followers_count', 'following_count', 'posts_count', 'following'
+        )
+    )
+    posts = Post.objects.filter(author__username=username)
+    return profile, page_rows(request, posts, settings.NUM_USER_POST)
+
+
+def profile_more_state(request, username):
+    posts = Post.objects.filter(author__username=username)
+    return batch_rows(request, posts, settings.NUM_USER_POST)
+
+
+def get_comments_paginator(post_id):
+    """Returns the paginator of comments of the post from the oldest one."""
+    return CursorPaginator(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        settings.NUM_POST_COMMENTS,
+        field='created',
+        descending=False,
+    )
+
+
 # views
 @login_required()
 def add_comment(request, post_id):
@@ -32,16 +300,30 @@ def add_comment(request, post_id):
 
 @login_required()
 def follow_index(request):
-    posts = Post.objects.select_related(
-        'author', 'group'
-    ).filter(author__following__user=request.user)
-    page_obj = get_page_obj(request, posts, settings.NUM_INDEX_POST)
+    posts = get_feed(request.user).select_related('author', 'group')
+    # The feed has no page numbers, counting it would read all entries
+    page_obj = CursorPaginator(
+        posts, settings.NUM_INDEX_POST, **FEED_KEY
+    ).get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
     context = {
         'page_obj': page_obj,
     }
     return render(request, 'posts/follow.html', context)
 
 
+@login_required()
+@page_condition(follow_index_more_state)
+def follow_index_more(request):
+    posts = get_feed(request.user).select_related('author', 'group')
+    return render_more_posts(
+        request, posts, settings.NUM_INDEX_POST, **FEED_KEY
+    )
+
+
+@page_condition(group_posts_state)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     posts = group.posts.select_related('author').all()
@@ -53,19 +335,39 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
-@cache_page(20, key_prefix='index_page')
-@vary_on_cookie
+@page_condition(group_posts_more_state)
+def group_posts_more(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    posts = group.posts.select_related('author')
+    return render_more_posts(request, posts, settings.NUM_GROUP_POST)
+
+
+@page_condition(index_state)
 def index(request):
     title = 'Последние обновления на сайте'
     posts = Post.objects.select_related('author', 'group')
-    page_obj = get_page_obj(request, posts, settings.NUM_INDEX_POST)
+
+    # The list of posts is cached in the template as a fragment shared by
+    # all users, so the page is fetched only when the fragment is missing.
+    page_obj = SimpleLazyObject(
+        lambda: get_page_obj(request, posts, settings.NUM_INDEX_POST)
+    )
     context = {
+        'cache_timeout': settings.INDEX_CACHE_TIMEOUT,
+        'generation': get_generation('posts'),
         'page_obj': page_obj,
+        'page_query': page_query(request),
         'title': title,
     }
     return render(request, 'posts/index.html', context)
 
 
+@page_condition(index_more_state)
+def index_more(request):
+    posts = Post.objects.select_related('author', 'group')
+    return render_more_posts(request, posts, settings.NUM_INDEX_POST)
+
+
 @login_required()
 def post_create(request):
     form = PostForm(
@@ -79,20 +381,60 @@ def post_create(request):
     post = form.save(commit=False)
     post.author = request.user
     post.save()
+    if post.image:
+        schedule_variants(post)
     return redirect('posts:profile', username=request.user.username)
 
 
+@page_condition(post_detail_state)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__profile', 'group'),
+        id=post_id
+    )
     context = {
-        'comments': post.comments.all(),
+        'comments': get_comments_paginator(post.id).first_page(),
         'form': CommentForm(),
-        'num_posts': post.author.posts.count(),
+        'num_posts': get_profile(post.author).posts_count,
         'post': post,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def post_comments(request, post_id):
+    """Returns the page of comments following the `after` cursor.
+
+    The page is an HTML fragment for the "load more" link of the post page,
+    or JSON with `format=json`.
+    """
+    try:
+        comments = get_comments_paginator(post_id).page_after(
+            request.GET.get('after', '')
+        )
+    except InvalidCursor:
+        raise Http404('Invalid cursor')
+    if request.GET.get('format') != 'json':
+        context = {
+            'comments': comments,
+            'post_id': post_id,
+        }
+        return render(request, 'posts/includes/comments.html', context)
+
+    last = comments[-1] if comments.has_next() else None
+    return JsonResponse({
+        'comments': [
+            {
+                'author': comment.author.username,
+                'created': comment.created.isoformat(),
+                'id': comment.id,
+                'text': comment.text,
+            }
+            for comment in comments
+        ],
+        'next': last and encode_cursor(last.created, last.id),
+    })
+
+
 @login_required()
 def post_edit(request, post_id):
     post = get_object_or_404(Post, id=post_id)
@@ -106,7 +448,9 @@ def post_edit(request, post_id):
     )
 
     if form.is_valid():
-        form.save()
+        post = form.save()
+        if 'image' in form.changed_data:
+            schedule_variants(post)
         return redirect('posts:post_detail', post_id=post_id)
 
     context = {
@@ -117,8 +461,14 @@ def post_edit(request, post_id):
     return render(request, 'posts/post_create.html', context)
 
 
+@page_condition(profile_state)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('profile'),
+        username=username
+    )
+    # Counters of the profile are shown by `follow_button.html`
+    get_profile(author)
     posts = author.posts.select_related('group')
     page_obj = get_page_obj(request, posts, settings.NUM_USER_POST)
 
@@ -136,6 +486,30 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+@page_condition(profile_more_state)
+def profile_more(request, username):
+    author = get_object_or_404(User, username=username)
+    posts = author.posts.select_related('group')
+    return render_more_posts(request, posts, settings.NUM_USER_POST)
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page_obj = next_cursor = None
+    if query:
+        page_obj, next_cursor = search_posts(
+            query,
+            settings.NUM_SEARCH_POST,
+            after=request.GET.get('after'),
+        )
+    context = {
+        'next_cursor': next_cursor,
+        'page_obj': page_obj,
+        'query': query,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required()
 @require_http_methods(['POST'])
 def profile_follow(request, username):
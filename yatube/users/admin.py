@@ -1,3 +1,25 @@
 from django.contrib import admin
 
-# Register your models here.
+from posts.counters import reconcile_profiles
+
+from .models import Profile
+
+
+class ProfileAdmin(admin.ModelAdmin):
+    actions = ('recount',)
+    list_display = (
+        'pk',
+        'user',
+        'posts_count',
+        'followers_count',
+        'following_count',
+    )
+    search_fields = ('user__username',)
+
+    def recount(self, request, queryset):
+        fixed = reconcile_profiles(queryset)
+        self.message_user(request, f'Исправлено профилей: {fixed}')
+    recount.short_description = 'Пересчитать счётчики'
+
+
+admin.site.register(Profile, ProfileAdmin)
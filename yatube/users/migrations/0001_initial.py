@@ -0,0 +1,63 @@
+# Generated by Django 2.2.28 on 2026-10-18 02:33
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_profiles(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    Profile = apps.get_model('users', 'Profile')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+
+    def count_by(model, field):
+        return dict(
+            model.objects.values_list(field).annotate(
+                count=models.Count('id')
+            ).order_by()
+        )
+
+    followers = count_by(Follow, 'author')
+    following = count_by(Follow, 'user')
+    posts = count_by(Post, 'author')
+    Profile.objects.bulk_create(
+        (
+            Profile(
+                followers_count=followers.get(user_id, 0),
+                following_count=following.get(user_id, 0),
+                posts_count=posts.get(user_id, 0),
+                user_id=user_id,
+            )
+            for user_id in User.objects.values_list('id', flat=True)
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0016_post_comments_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Profile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('followers_count', models.PositiveIntegerField(default=0, editable=False, verbose_name='Число подписчиков')),
+                ('following_count', models.PositiveIntegerField(default=0, editable=False, verbose_name='Число подписок')),
+                ('posts_count', models.PositiveIntegerField(default=0, editable=False, verbose_name='Число постов')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='profile', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Профиль',
+                'verbose_name_plural': 'Профили',
+            },
+        ),
+        migrations.RunPython(create_profiles, migrations.RunPython.noop),
+    ]
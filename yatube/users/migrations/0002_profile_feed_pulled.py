@@ -0,0 +1,27 @@
+# Generated by Django 2.2.28 on 2026-10-18 03:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_pulled_authors(apps, schema_editor):
+    Profile = apps.get_model('users', 'Profile')
+    Profile.objects.filter(
+        followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS
+    ).update(feed_pulled=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='feed_pulled',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Посты читаются из ленты по запросу'),
+        ),
+        migrations.RunPython(mark_pulled_authors, migrations.RunPython.noop),
+    ]
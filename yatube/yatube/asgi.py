@@ -0,0 +1,29 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Django 2.2 has no ASGI handler, so the WSGI application is served by
+``core.asgi.ASGIAdapter`` in a pool of ``ASGI_THREADS`` threads, e.g.:
+
+    $ uvicorn yatube.asgi:application --workers 4
+"""
+
+import os
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import ASGIAdapter
+from core.template.loaders import warm_up
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+application = ASGIAdapter(
+    get_wsgi_application(),
+    max_workers=settings.ASGI_THREADS,
+    # Form fields and an uploaded file, larger files are rejected by forms
+    max_body_size=(
+        settings.DATA_UPLOAD_MAX_MEMORY_SIZE + settings.MAX_UPLOAD_SIZE
+    ),
+)
+warm_up()
@@ -53,11 +53,13 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,22 +67,38 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+# DjDT is a development tool, it is not loaded in production
+if DEBUG:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
 ROOT_URLCONF = 'yatube.urls'
 
+# Loaders of template sources, wrapped by a caching loader in production
+_TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template.backends.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Templates are reloaded on changes in the debug mode, in
+            # production they are compiled once, see core.template.loaders
+            'loaders': (
+                _TEMPLATE_LOADERS if DEBUG
+                else [('core.template.loaders.Loader', _TEMPLATE_LOADERS)]
+            ),
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.cache.cache_timeouts',
                 'core.context_processors.year.year',
             ],
         },
@@ -89,6 +107,8 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
@@ -97,9 +117,28 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Threads serving requests keep their connections between requests
+        'CONN_MAX_AGE': 60,
     }
 }
 
+# Reads are routed to replicas, e.g. to try it locally with a copy of the
+# database file: $ cp db.sqlite3 db-replica.sqlite3 &&
+# DATABASE_REPLICA=db-replica.sqlite3 python3 manage.py runserver
+DATABASE_REPLICAS = []
+if os.environ.get('DATABASE_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, os.environ['DATABASE_REPLICA']),
+        'CONN_MAX_AGE': 60,
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    }
+    DATABASE_REPLICAS.append('replica')
+
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -141,10 +180,19 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = (
     os.path.join(BASE_DIR, 'static'),
 )
+# Files are collected with hashes in the names and compressed
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+STATICFILES_STORAGE = 'core.staticfiles.StaticFilesStorage'
 
 # Directory for uploads user files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Files exceeding `MAX_UPLOAD_SIZE` are dropped while they are received
+FILE_UPLOAD_HANDLERS = [
+    'core.uploads.MaxSizeUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
 
 # Overwriting default addresses of `auth`
 LOGIN_URL = 'users:login'
@@ -156,24 +204,104 @@ LOGIN_REDIRECT_URL = 'posts:index'
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 
-# Adds email driver
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Adds email driver, emails are sent by background tasks
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+QUEUED_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 
-# Adds django backend cache
+# Adds django backend cache shared by all processes of the site
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.backends.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
     },
 }
 
 
 # Constants:
+# for post.views.py time (in seconds) to keep cached pages, they are
+# invalidated explicitly when posts, comments or follows change:
+INDEX_CACHE_TIMEOUT: int = 60 * 60
+
+# for post.views.py time (in seconds) to keep the time a page was first
+# seen with its rows, the `Last-Modified` of the page:
+PAGE_MODIFIED_TIMEOUT: int = 60 * 60 * 24
+
+# for posts/includes/post_list.html time (in seconds) to keep a cached post
+# of lists, the key changes when the post or its author name changes:
+POST_CACHE_TIMEOUT: int = 60 * 60 * 24
+
 # for post.views.py number posts on different url pages:
 NUM_INDEX_POST: int = 10
 NUM_GROUP_POST: int = 10
 NUM_USER_POST: int = 10
+NUM_SEARCH_POST: int = 10
+NUM_POST_COMMENTS: int = 20
 
 # for post.models.py:
 LEN_POST_STR = 15
+
+# for posts.thumbnails.py: size of thumbnails of post images, widths and
+# formats of their responsive variants (formats unsupported by Pillow are
+# skipped) and number of processes generating them, `0` generates them in
+# the background task
+POST_THUMBNAIL_SIZE = (960, 339)
+POST_IMAGE_WIDTHS = (480, 1440)
+POST_IMAGE_FORMATS = ('AVIF', 'WEBP', 'JPEG')
+POST_THUMBNAIL_WORKERS: int = 2
+
+# for posts.feed.py: authors with more followers are read on demand, number
+# of latest posts added to the feed of a new follower, batch size of writes
+FEED_FANOUT_MAX_FOLLOWERS: int = 1000
+FEED_BACKFILL_POSTS: int = 1000
+FEED_BATCH_SIZE: int = 500
+
+# for core.middleware.py and core.views.py: share of requests whose metrics
+# are recorded and the token of the `Authorization: Bearer` header of
+# requests to /metrics/, the page is off without the token
+METRICS_SAMPLE_RATE: float = 0.1
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# for yatube.asgi.py: number of threads serving requests of the ASGI
+# application, each of them keeps a database connection
+ASGI_THREADS: int = 32
+
+# for core.tasks.py: where background tasks are run, `eager` (by the
+# caller), `thread` (by a thread of the process) or `worker` (by processes
+# of `manage.py run_worker`), and time (in seconds) between checks for
+# retried tasks
+TASKS_MODE = 'thread'
+TASKS_POLL_SECONDS: float = 5
+
+# for core.middleware.py and posts.views.py: time (in seconds) to read from
+# the primary database after a write of the user or a change of pages, it
+# should exceed the replication lag
+REPLICA_STICKY_COOKIE = 'primary'
+REPLICA_STICKY_SECONDS: int = 10
+
+# for api.views.py: default and maximum numbers of objects of a page of the
+# API and maximum number of objects fetched by `ids`
+API_PAGE_SIZE: int = 20
+API_MAX_PAGE_SIZE: int = 100
+API_MAX_IDS: int = 100
+
+# for core.staticfiles.py: collected style sheets without rules of classes
+# and ids not used by the code
+STATIC_PURGE_CSS = ('css/bootstrap.min.css',)
+
+# for yatube.urls.py: whether static and media files are served by the site
+# itself for deployments without a front proxy, and time (in seconds)
+# browsers keep static files without hashes in the names and media files
+SERVE_FILES = True
+STATIC_CACHE_SECONDS: int = 60 * 60
+MEDIA_CACHE_SECONDS: int = 60 * 60 * 24
+
+# for core.uploads.py: maximum size (in bytes) of uploaded files, formats
+# and maximum number of pixels of uploaded images
+MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024
+UPLOAD_IMAGE_FORMATS = ('GIF', 'JPEG', 'PNG', 'WEBP')
+UPLOAD_IMAGE_MAX_PIXELS: int = 40_000_000
@@ -1,14 +1,18 @@
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from core.views import metrics, serve_media, serve_static
 
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
     path('about/', include('about.urls', namespace='about')),
     path('admin/', admin.site.urls),
+    path('api/v1/', include('api.urls', namespace='api')),
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
+    path('metrics/', metrics, name='metrics'),
 
 ]
 
@@ -16,6 +20,18 @@ handler403 = 'core.views.permission_denied'
 handler404 = 'core.views.page_not_found'
 handler500 = 'core.views.server_error'
 
+if settings.SERVE_FILES and not settings.DEBUG:
+    urlpatterns += [
+        re_path(
+            rf'^{settings.STATIC_URL.lstrip("/")}(?P<path>.+)$',
+            serve_static,
+        ),
+        re_path(
+            rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>.+)$',
+            serve_media,
+        ),
+    ]
+
 if settings.DEBUG:
     import debug_toolbar
 
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Imported after the setup of Django by `get_wsgi_application`
+from core.template.loaders import warm_up  # noqa: E402
+
+warm_up()